@@ -1,49 +1,99 @@
 # bot.py - 슬래시(/) 전용 ARPG 봇 + 재고 있는 상점 + 선물 + 판매 상점 + 낚시
 
-import random
+import asyncio
+import re
+import calendar
 import datetime
+import sqlite3
+import tempfile
+import time
 from zoneinfo import ZoneInfo
 
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 import aiosqlite
 
 from settings import TOKEN
+from economy_io import detect_format, export_to, format_counts, text_records
 from db import (
     DB_PATH,
+    acquire,
+    open_pool,
+    close_pool,
+    pool,
+    start_write_queue,
+    stop_write_queue,
+    write_queue,
     init_db,
-    get_or_create_guild_settings,
+    load_guild_configs,
+    get_guild_config,
+    set_guild_channel,
     set_attend_channel,
     set_shop_channel,
     set_attend_currency,
     set_main_currency,
+    set_fishing_daily_limit,
     add_currency,
     list_currencies,
     get_currency_by_code,
-    get_or_create_user,
-    update_user_last_attend,
-    update_user_last_bonus_attend,
+    get_currency_by_id,
+    resolve_currency,
+    set_currency_active,
+    rename_currency,
+    delete_currency,
+    get_user_id,
+    identity_cache,
+    claim_attendance,
+    claim_bonus_attendance,
+    get_attendance_history,
     get_balance,
-    change_balance,
-    get_items,
+    get_wallet,
+    get_profile,
+    apply_balance_delta,
+    apply_inventory_delta,
+    get_item_quantity,
     add_item,
     delete_item,
     get_item_by_id,
     get_inventory,
     get_item_by_name,
     upsert_sell_item,
-    get_sell_items,
     get_sell_item_by_name,
     upsert_fishing_loot,
     get_fishing_loot,
-    get_fishing_daily_count,       # ✅ 추가
-    increment_fishing_daily_count, # ✅ 추가
+    delete_fishing_loot,
+    get_loot_table,
+    invalidate_loot_table,
+    cast_fishing,
+    prune_fishing_limits,
+    reset_fishing_capped,
     add_or_update_pet,   # ✅ 추가
     list_pets,           # ✅ 추가
     get_item_by_name_any,
     upsert_shop_item_by_name,
     get_shop_item_by_name,
+    purchase,
+    transfer_currency,
+    transfer_item,
+    BulkResult,
+    bulk_apply_balance_delta,
+    bulk_grant_item,
+    bulk_transfer_currency,
+    settle_all,
+    has_guild_users,
+    import_guild_economy,
+    get_shop_catalog,
+    invalidate_shop_catalog,
+    get_shop_page,
+    count_shop_items,
+    SHOP_PAGE_SIZE,
+    load_item_name_indexes,
+    get_item_name_index,
+    index_item_name,
+    held_items,
+    peek_held_items,
+    PurchaseResult,
 )
 
 # =========================================================
@@ -55,15 +105,121 @@ intents.guilds = True
 intents.members = True
 intents.message_content = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+
+
+class ArpgBot(commands.Bot):
+    async def setup_hook(self):
+        # 봇 시작 시 DB 커넥션 풀 열기 (명령어들은 여기서 빌려 씀)
+        await open_pool()
+        # 재화/인벤토리 쓰기를 모아서 커밋하는 writer
+        await start_write_queue()
+
+    async def close(self):
+        daily_rollover_task.cancel()
+        db_stats_task.cancel()
+        await super().close()
+        # 큐에 남은 쓰기를 다 커밋한 뒤 풀 닫기
+        await stop_write_queue()
+        print(f"[DB] 쓰기 큐 종료: {write_queue.stats()}")
+        print(f"[DB] 커넥션 풀 종료: {pool.stats()}")
+        print(f"[DB] 유저 id 캐시: {identity_cache.stats()}")
+        await close_pool()
+
+
+bot = ArpgBot(command_prefix="!", intents=intents)
 
 # on_ready 에서 여러번 sync되는 것 방지
 synced = False
 
 
+KST = ZoneInfo("Asia/Seoul")
+
+
+# =========================================================
+# 일일 롤오버 (KST 자정)
+# =========================================================
+
+class DailyClock:
+    """
+    한국 시간(KST) 오늘 날짜 캐시.
+    명령어마다 ZoneInfo datetime 을 만들지 않고, 다음 자정 시각과 비교만 한다.
+    (자정 작업이 늦게 돌더라도 자정이 지나면 알아서 날짜가 바뀜)
+    """
+
+    def __init__(self):
+        self._today: str | None = None
+        self._next_midnight = 0.0
+
+    def refresh(self) -> str:
+        now = datetime.datetime.now(KST)
+        tomorrow = datetime.datetime.combine(
+            now.date() + datetime.timedelta(days=1), datetime.time(0), tzinfo=KST
+        )
+        self._today = now.date().isoformat()
+        self._next_midnight = tomorrow.timestamp()
+        return self._today
+
+    def today(self) -> str:
+        if time.time() >= self._next_midnight:
+            return self.refresh()
+        return self._today
+
+
+daily_clock = DailyClock()
+
+
 def get_today_kst_str() -> str:
     """한국 시간(KST) 기준 오늘 날짜를 YYYY-MM-DD 문자열로 반환"""
-    return datetime.datetime.now(ZoneInfo("Asia/Seoul")).date().isoformat()
+    return daily_clock.today()
+
+
+# 자정마다 실행할 작업들: async def hook(today_str)
+_rollover_hooks: list = []
+
+
+def on_daily_rollover(func):
+    """자정 롤오버 작업 등록용 데코레이터. (재고 보충, 통계 스냅샷 등)"""
+    _rollover_hooks.append(func)
+    return func
+
+
+@on_daily_rollover
+async def _reset_daily_counters(today_str: str):
+    # 메모리에 들고 있는 '오늘 낚시 다 씀' 기록
+    reset_fishing_capped()
+
+
+@on_daily_rollover
+async def _prune_daily_rows(today_str: str):
+    # 오늘 이전 날짜 fishing_limits 행 (청크 단위 삭제)
+    deleted = await prune_fishing_limits(today_str)
+    if deleted:
+        print(f"[롤오버] 지난 낚시 횟수 {deleted}행 정리")
+
+
+@tasks.loop(time=datetime.time(hour=0, minute=0, second=1, tzinfo=KST))
+async def daily_rollover_task():
+    today_str = daily_clock.refresh()
+    print(f"[롤오버] {today_str} 시작")
+    for hook in _rollover_hooks:
+        started = time.perf_counter()
+        try:
+            await hook(today_str)
+        except Exception as e:
+            # 한 작업이 실패해도 나머지는 계속
+            print(f"[ERROR] 롤오버 작업 {hook.__name__} 실패: {e!r}")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"[롤오버] {hook.__name__}: {elapsed_ms:.1f}ms")
+
+
+# 운영 중 쓰기 큐 깊이 / 배치 크기 / 커밋 지연을 로그로 남기는 간격 (분)
+DB_STATS_INTERVAL_MINUTES = 5
+
+
+@tasks.loop(minutes=DB_STATS_INTERVAL_MINUTES)
+async def db_stats_task():
+    print(f"[DB] 쓰기 큐: {write_queue.stats()}")
+    print(f"[DB] 커넥션 풀: {pool.stats()}")
 # =========================================================
 # 공통 유틸 (Interaction 기반)
 # =========================================================
@@ -77,6 +233,8 @@ async def send_reply(
     content: str | None = None,
     *,
     embed: discord.Embed | None = None,
+    view: discord.ui.View | None = None,
+    file: discord.File | None = None,
     ephemeral: bool = True,
 ):
     """Interaction 응답 도우미
@@ -85,11 +243,14 @@ async def send_reply(
     - 아직이면 response.send_message
     - Unknown Interaction(404) 이 떠도 봇이 죽지 않도록 예외 처리
     """
+    extra = {"view": view} if view is not None else {}
+    if file is not None:
+        extra["file"] = file
     try:
         if inter.response.is_done():
-            await inter.followup.send(content=content, embed=embed, ephemeral=ephemeral)
+            await inter.followup.send(content=content, embed=embed, ephemeral=ephemeral, **extra)
         else:
-            await inter.response.send_message(content=content, embed=embed, ephemeral=ephemeral)
+            await inter.response.send_message(content=content, embed=embed, ephemeral=ephemeral, **extra)
     except discord.NotFound:
         # 보통 응답이 3초 이상 지연되거나, 인터렉션이 만료됐을 때 나는 에러
         print("[WARN] send_reply: Unknown interaction (404) – 이미 만료된 요청, 무시합니다.")
@@ -102,7 +263,7 @@ async def send_reply(
 # ---- 관리자용 봇채널 테이블 (command_channels) ----
 
 async def ensure_admin_channel_table():
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             """
             CREATE TABLE IF NOT EXISTS command_channels (
@@ -115,35 +276,17 @@ async def ensure_admin_channel_table():
 
 
 async def set_admin_channel(guild_id: int, channel_id: int):
-    await ensure_admin_channel_table()
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            """
-            INSERT INTO command_channels (guild_id, channel_id)
-            VALUES (?, ?)
-            ON CONFLICT(guild_id) DO UPDATE SET channel_id = excluded.channel_id
-            """,
-            (guild_id, channel_id),
-        )
-        await db.commit()
+    await set_guild_channel(guild_id, "admin_channel_id", channel_id)
 
 
 async def get_admin_channel_id(guild_id: int) -> int | None:
-    await ensure_admin_channel_table()
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            "SELECT channel_id FROM command_channels WHERE guild_id = ?",
-            (guild_id,),
-        )
-        row = await cursor.fetchone()
-        await cursor.close()
-    return row[0] if row else None
+    return (await get_guild_config(guild_id)).admin_channel_id
 
 
 # ---- 사용자용 봇채널 테이블 (user_command_channels) ----
 
 async def ensure_user_channel_table():
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             """
             CREATE TABLE IF NOT EXISTS user_command_channels (
@@ -156,35 +299,17 @@ async def ensure_user_channel_table():
 
 
 async def set_user_channel(guild_id: int, channel_id: int):
-    await ensure_user_channel_table()
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            """
-            INSERT INTO user_command_channels (guild_id, channel_id)
-            VALUES (?, ?)
-            ON CONFLICT(guild_id) DO UPDATE SET channel_id = excluded.channel_id
-            """,
-            (guild_id, channel_id),
-        )
-        await db.commit()
+    await set_guild_channel(guild_id, "user_channel_id", channel_id)
 
 
 async def get_user_channel_id(guild_id: int) -> int | None:
-    await ensure_user_channel_table()
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            "SELECT channel_id FROM user_command_channels WHERE guild_id = ?",
-            (guild_id,),
-        )
-        row = await cursor.fetchone()
-        await cursor.close()
-    return row[0] if row else None
+    return (await get_guild_config(guild_id)).user_channel_id
 
 
 # ---- 낚시 채널 테이블 (fishing_channels) ----
 
 async def ensure_fishing_channel_table():
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             """
             CREATE TABLE IF NOT EXISTS fishing_channels (
@@ -197,33 +322,15 @@ async def ensure_fishing_channel_table():
 
 
 async def set_fishing_channel(guild_id: int, channel_id: int):
-    await ensure_fishing_channel_table()
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            """
-            INSERT INTO fishing_channels (guild_id, channel_id)
-            VALUES (?, ?)
-            ON CONFLICT(guild_id) DO UPDATE SET channel_id = excluded.channel_id
-            """,
-            (guild_id, channel_id),
-        )
-        await db.commit()
+    await set_guild_channel(guild_id, "fishing_channel_id", channel_id)
 
 
 async def get_fishing_channel_id(guild_id: int) -> int | None:
-    await ensure_fishing_channel_table()
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            "SELECT channel_id FROM fishing_channels WHERE guild_id = ?",
-            (guild_id,),
-        )
-        row = await cursor.fetchone()
-        await cursor.close()
-    return row[0] if row else None
+    return (await get_guild_config(guild_id)).fishing_channel_id
 # ---- 거래 채널 테이블 (trade_channels) ----
 
 async def ensure_trade_channel_table():
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             """
             CREATE TABLE IF NOT EXISTS trade_channels (
@@ -236,29 +343,11 @@ async def ensure_trade_channel_table():
 
 
 async def set_trade_channel(guild_id: int, channel_id: int):
-    await ensure_trade_channel_table()
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            """
-            INSERT INTO trade_channels (guild_id, channel_id)
-            VALUES (?, ?)
-            ON CONFLICT(guild_id) DO UPDATE SET channel_id = excluded.channel_id
-            """,
-            (guild_id, channel_id),
-        )
-        await db.commit()
+    await set_guild_channel(guild_id, "trade_channel_id", channel_id)
 
 
 async def get_trade_channel_id(guild_id: int) -> int | None:
-    await ensure_trade_channel_table()
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            "SELECT channel_id FROM trade_channels WHERE guild_id = ?",
-            (guild_id,),
-        )
-        row = await cursor.fetchone()
-        await cursor.close()
-    return row[0] if row else None
+    return (await get_guild_config(guild_id)).trade_channel_id
 
 
 # ---- 채널 체크 공통 (Interaction용) ----
@@ -268,12 +357,12 @@ async def ensure_channel_inter(inter: discord.Interaction, kind: str) -> bool:
         await send_reply(inter, "서버 안에서만 사용할 수 있어요.", ephemeral=True)
         return False
 
-    guild_id = inter.guild.id
+    # 채널 설정은 메모리 캐시에서 바로 꺼낸다 (설정 명령이 캐시를 무효화)
+    config = await get_guild_config(inter.guild.id)
 
     if kind in ("attend", "shop"):
-        settings = await get_or_create_guild_settings(guild_id)
         if kind == "attend":
-            channel_id = settings["attend_channel_id"]
+            channel_id = config.attend_channel_id
             cmd_name = "/출석채널설정"
             not_set_msg = (
                 "아직 이 서버의 출석 채널이 설정되지 않았어요.\n"
@@ -281,7 +370,7 @@ async def ensure_channel_inter(inter: discord.Interaction, kind: str) -> bool:
             )
             wrong_channel_msg = "이 명령어는 지정된 **출석 채널**에서만 사용할 수 있어요!"
         else:
-            channel_id = settings["shop_channel_id"]
+            channel_id = config.shop_channel_id
             cmd_name = "/상점채널설정"
             not_set_msg = (
                 "아직 이 서버의 상점 채널이 설정되지 않았어요.\n"
@@ -300,7 +389,7 @@ async def ensure_channel_inter(inter: discord.Interaction, kind: str) -> bool:
         return True
 
     if kind == "admin":
-        channel_id = await get_admin_channel_id(guild_id)
+        channel_id = config.admin_channel_id
         if channel_id is None:
             await send_reply(
                 inter,
@@ -321,7 +410,7 @@ async def ensure_channel_inter(inter: discord.Interaction, kind: str) -> bool:
         return True
 
     if kind == "user":
-        channel_id = await get_user_channel_id(guild_id)
+        channel_id = config.user_channel_id
         if channel_id is None:
             await send_reply(
                 inter,
@@ -341,7 +430,7 @@ async def ensure_channel_inter(inter: discord.Interaction, kind: str) -> bool:
 
         return True
     if kind == "trade":
-        channel_id = await get_trade_channel_id(guild_id)
+        channel_id = config.trade_channel_id
         if channel_id is None:
             await send_reply(
                 inter,
@@ -362,7 +451,7 @@ async def ensure_channel_inter(inter: discord.Interaction, kind: str) -> bool:
         return True
 
     if kind == "fish":
-        channel_id = await get_fishing_channel_id(guild_id)
+        channel_id = config.fishing_channel_id
         if channel_id is None:
             await send_reply(
                 inter,
@@ -386,23 +475,123 @@ async def ensure_channel_inter(inter: discord.Interaction, kind: str) -> bool:
 
 
 async def get_currency_by_identifier(guild_id: int, identifier: str):
-    cur = await get_currency_by_code(guild_id, identifier)
-    if cur:
-        return cur
+    # 코드 → 이름 순서 (대소문자 무시), 메모리 레지스트리에서 바로 찾는다
+    return await resolve_currency(guild_id, identifier)
 
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute(
-            """
-            SELECT * FROM currencies
-            WHERE guild_id = ?
-              AND LOWER(name) = LOWER(?)
-            """,
-            (guild_id, identifier),
-        )
-        row = await cursor.fetchone()
-        await cursor.close()
-    return dict(row) if row else None
+
+# =========================================================
+# 아이템 이름 자동완성 (메모리 색인만 사용, DB 조회 없음)
+# =========================================================
+
+async def _item_name_choices(
+    inter: discord.Interaction,
+    current: str,
+    predicate=None,
+) -> list[app_commands.Choice[str]]:
+    if inter.guild is None:
+        return []
+    index = await get_item_name_index(inter.guild.id)
+    return [
+        app_commands.Choice(name=entry["name"][:100], value=entry["name"][:100])
+        for entry in index.search(current, predicate=predicate)
+    ]
+
+
+async def autocomplete_shop_item(inter: discord.Interaction, current: str):
+    """상점에 보이는 아이템 (/구매, /아이템삭제)."""
+    return await _item_name_choices(inter, current, lambda e: e["is_shop"])
+
+
+async def autocomplete_any_item(inter: discord.Interaction, current: str):
+    """이 서버의 모든 아이템 (/정산아이템, /아이템제거)."""
+    return await _item_name_choices(inter, current)
+
+
+async def autocomplete_inventory_item(inter: discord.Interaction, current: str):
+    """
+    명령을 쓰는 사람 인벤토리에 있는 아이템 (/아이템선물).
+    인벤토리를 아직 메모리에 안 읽었으면 이번엔 전체 아이템을 보여주고 뒤에서 읽어 둔다.
+    """
+    held = peek_held_items(inter.guild.id, inter.user.id) if inter.guild else None
+    if held is None:
+        return await _item_name_choices(inter, current)
+    return await _item_name_choices(inter, current, lambda e: e["id"] in held)
+
+
+async def autocomplete_sell_item(inter: discord.Interaction, current: str):
+    """판매 상점에 등록돼 있고, 알 수 있으면 인벤토리에도 있는 아이템 (/판매)."""
+    held = peek_held_items(inter.guild.id, inter.user.id) if inter.guild else None
+    if held is None:
+        return await _item_name_choices(inter, current, lambda e: e["sellable"])
+    return await _item_name_choices(
+        inter, current, lambda e: e["sellable"] and e["id"] in held
+    )
+
+
+# =========================================================
+# 이름 오타 추천 ("혹시 ○○?")
+# =========================================================
+
+async def suggest_item_names(guild_id: int, name: str, predicate=None) -> list[str]:
+    """못 찾은 이름과 자모 단위로 가장 비슷한 아이템 이름들 (메모리 색인만 사용)."""
+    index = await get_item_name_index(guild_id)
+    return [entry["name"] for entry in index.suggest(name, predicate=predicate)]
+
+
+def format_suggestions(names: list[str]) -> str:
+    if not names:
+        return ""
+    return "\n혹시 " + ", ".join(f"**{n}**" for n in names) + "?"
+
+
+class SuggestionRetryView(discord.ui.View):
+    """
+    추천 이름마다 버튼 하나. 누르면 retry(inter, 이름) 으로 같은 명령을 다시 실행한다.
+    한 번 누르면 끝 (중복 구매/판매 방지).
+    """
+
+    def __init__(self, owner_id: int, names: list[str], retry, *, timeout: float = 120):
+        super().__init__(timeout=timeout)
+        self.owner_id = owner_id
+        self.retry = retry
+        for name in names:
+            self.add_item(SuggestionButton(name))
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message(
+                "이 메뉴를 연 사용자만 사용할 수 있어요!", ephemeral=True
+            )
+            return False
+        return True
+
+
+class SuggestionButton(discord.ui.Button):
+    def __init__(self, name: str):
+        super().__init__(style=discord.ButtonStyle.primary, label=f"🔁 {name}"[:80])
+        self.item_name = name
+
+    async def callback(self, inter: discord.Interaction):
+        view: SuggestionRetryView = self.view  # type: ignore
+        if view.is_finished():
+            await inter.response.send_message("이미 처리된 요청이에요.", ephemeral=True)
+            return
+        view.stop()
+        await view.retry(inter, self.item_name)
+
+
+async def reply_item_not_found(
+    inter: discord.Interaction,
+    message: str,
+    name: str,
+    *,
+    predicate=None,
+    retry=None,
+):
+    """찾지 못했다는 안내 + "혹시 ○○?" 추천. retry 가 있으면 다시 실행 버튼도 붙인다."""
+    names = await suggest_item_names(inter.guild.id, name, predicate)
+    view = SuggestionRetryView(inter.user.id, names, retry) if names and retry else None
+    await send_reply(inter, message + format_suggestions(names), view=view, ephemeral=True)
 
 
 # =========================================================
@@ -420,6 +609,16 @@ async def on_ready():
     await ensure_user_channel_table()
     await ensure_fishing_channel_table()
     await ensure_trade_channel_table()
+    loaded = await load_guild_configs()
+    print(f"✅ 길드 설정 캐시 로드: {loaded}개 서버")
+    loaded = await load_item_name_indexes()
+    print(f"✅ 아이템 이름 색인 로드: {loaded}개 서버")
+
+    # KST 자정 롤오버 (테이블이 준비된 뒤 시작)
+    if not daily_rollover_task.is_running():
+        daily_rollover_task.start()
+    if not db_stats_task.is_running():
+        db_stats_task.start()
 
     # 글로벌 슬래시 명령 동기화
     if not synced:
@@ -575,7 +774,7 @@ async def slash_list_currencies(inter: discord.Interaction):
     if not await ensure_channel_inter(inter, "user"):
         return
 
-    await get_or_create_guild_settings(inter.guild.id)
+    await get_guild_config(inter.guild.id)
     currencies = await list_currencies(inter.guild.id)
     active_currencies = [cur for cur in currencies if cur["is_active"]]
 
@@ -614,9 +813,7 @@ async def slash_deactivate_currency(inter: discord.Interaction, identifier: str)
         )
         return
 
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("UPDATE currencies SET is_active = 0 WHERE id = ?", (cur["id"],))
-        await db.commit()
+    await set_currency_active(inter.guild.id, cur["id"], False)
 
     await send_reply(
         inter,
@@ -644,9 +841,7 @@ async def slash_activate_currency(inter: discord.Interaction, identifier: str):
         )
         return
 
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("UPDATE currencies SET is_active = 1 WHERE id = ?", (cur["id"],))
-        await db.commit()
+    await set_currency_active(inter.guild.id, cur["id"], True)
 
     await send_reply(
         inter,
@@ -666,9 +861,9 @@ async def slash_delete_currency(inter: discord.Interaction, identifier: str):
         await send_reply(inter, f"`{identifier}` 에 해당하는 재화를 찾을 수 없습니다.", ephemeral=True)
         return
 
-    settings = await get_or_create_guild_settings(inter.guild.id)
-    attend_id = settings["attend_currency_id"]
-    main_id = settings["main_currency_id"]
+    config = await get_guild_config(inter.guild.id)
+    attend_id = config.attend_currency_id
+    main_id = config.main_currency_id
 
     if attend_id == cur["id"] or main_id == cur["id"]:
         await send_reply(
@@ -679,26 +874,15 @@ async def slash_delete_currency(inter: discord.Interaction, identifier: str):
         )
         return
 
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            "SELECT COUNT(*) FROM items WHERE guild_id = ? AND currency_id = ?",
-            (inter.guild.id, cur["id"]),
+    item_count = await delete_currency(inter.guild.id, cur["id"])
+    if item_count > 0:
+        await send_reply(
+            inter,
+            f"이 재화를 사용하는 상점/아이템이 {item_count}개 있어 삭제할 수 없습니다.\n"
+            "먼저 해당 아이템들을 삭제하거나 다른 재화로 바꿔주세요.",
+            ephemeral=True,
         )
-        row = await cursor.fetchone()
-        await cursor.close()
-        item_count = row[0] if row else 0
-
-        if item_count > 0:
-            await send_reply(
-                inter,
-                f"이 재화를 사용하는 상점/아이템이 {item_count}개 있어 삭제할 수 없습니다.\n"
-                "먼저 해당 아이템들을 삭제하거나 다른 재화로 바꿔주세요.",
-                ephemeral=True,
-            )
-            return
-
-        await db.execute("DELETE FROM currencies WHERE id = ?", (cur["id"],))
-        await db.commit()
+        return
 
     await send_reply(
         inter,
@@ -745,8 +929,8 @@ async def slash_set_main_currency_name(inter: discord.Interaction, new_name: str
         )
         return
 
-    settings = await get_or_create_guild_settings(inter.guild.id)
-    main_currency_id = settings["main_currency_id"]
+    config = await get_guild_config(inter.guild.id)
+    main_currency_id = config.main_currency_id
 
     # 🔹 메인 재화가 아직 하나도 지정되지 않은 경우: 자동으로 하나 지정해 주기
     if main_currency_id is None:
@@ -767,49 +951,23 @@ async def slash_set_main_currency_name(inter: discord.Interaction, new_name: str
 
         main_currency_id = main_cur["id"]
 
-        async with aiosqlite.connect(DB_PATH) as db:
-            # guild 내 모든 재화에서 is_main 리셋 후, 선택한 것만 메인으로
-            await db.execute(
-                "UPDATE currencies SET is_main = 0 WHERE guild_id = ?",
-                (inter.guild.id,),
-            )
-            await db.execute(
-                "UPDATE currencies SET is_main = 1 WHERE id = ?",
-                (main_currency_id,),
-            )
-            # guild_settings 테이블에도 메인 재화 id 저장
-            await db.execute(
-                "UPDATE guild_settings SET main_currency_id = ? WHERE guild_id = ?",
-                (main_currency_id, inter.guild.id),
-            )
-            await db.commit()
+        # guild 내 모든 재화에서 is_main 리셋 후, 선택한 것만 메인으로
+        # (guild_settings 저장 + 설정 캐시 무효화까지 함께 처리)
+        await set_main_currency(inter.guild.id, main_currency_id)
 
     # 여기부터는 "이미 메인 재화 id는 있다"라고 보고 이름만 바꾸는 기존 로직
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute(
-            "SELECT name, code FROM currencies WHERE id = ? AND guild_id = ?",
-            (main_currency_id, inter.guild.id),
+    main_cur = await get_currency_by_id(inter.guild.id, main_currency_id)
+    if not main_cur:
+        await send_reply(
+            inter,
+            "메인 재화 정보를 찾지 못했습니다. DB 설정에 문제가 있는 것 같아요. 개발자에게 문의해주세요.",
+            ephemeral=True,
         )
-        row = await cursor.fetchone()
-        await cursor.close()
-
-        if not row:
-            await send_reply(
-                inter,
-                "메인 재화 정보를 찾지 못했습니다. DB 설정에 문제가 있는 것 같아요. 개발자에게 문의해주세요.",
-                ephemeral=True,
-            )
-            return
-
-        old_name = row["name"]
-        code = row["code"]
+        return
 
-        await db.execute(
-            "UPDATE currencies SET name = ? WHERE id = ?",
-            (new_name, main_currency_id),
-        )
-        await db.commit()
+    old_name = main_cur["name"]
+    code = main_cur["code"]
+    await rename_currency(inter.guild.id, main_currency_id, new_name)
 
     await send_reply(
         inter,
@@ -833,8 +991,8 @@ async def slash_attend(inter: discord.Interaction):
         return
 
     # ✅ 출석 재화 ID 가져오기
-    settings = await get_or_create_guild_settings(inter.guild.id)
-    attend_currency_id = settings["attend_currency_id"]
+    config = await get_guild_config(inter.guild.id)
+    attend_currency_id = config.attend_currency_id
 
     if attend_currency_id is None:
         await send_reply(
@@ -845,44 +1003,34 @@ async def slash_attend(inter: discord.Interaction):
         )
         return
 
-    # ✅ 유저 정보 + 한국 시간 기준 오늘 날짜
-    user = await get_or_create_user(inter.guild.id, inter.user.id)
-    today_str = get_today_kst_str()   # 한국 시간 기준 YYYY-MM-DD
-
-    # 이미 오늘 출석했는지 체크
-    if user["last_attend_date"] == today_str:
+    # 출석 재화 정보 조회
+    cur_row = await get_currency_by_id(inter.guild.id, attend_currency_id)
+    if not cur_row:
         await send_reply(
             inter,
-            "오늘은 이미 출석하셨어요! 내일 다시 와주세요 😊",
+            "출석 재화 설정에 문제가 있습니다. 관리자에게 문의해주세요.",
             ephemeral=False,
         )
         return
 
-    # 출석 재화 정보 조회
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            "SELECT name, code FROM currencies WHERE id = ?",
-            (attend_currency_id,),
-        )
-        cur_row = await cursor.fetchone()
-        await cursor.close()
+    cur_name, cur_code = cur_row["name"], cur_row["code"]
 
-    if not cur_row:
+    # ✅ 유저 정보 + 한국 시간 기준 오늘 날짜
+    db_user_id = await get_user_id(inter.guild.id, inter.user.id)
+    today_str = get_today_kst_str()   # 한국 시간 기준 YYYY-MM-DD
+
+    # ✅ 오늘 출석 기록 + 1d50 보상 지급을 한 번에 (이미 출석했으면 아무것도 안 바뀜)
+    result = await claim_attendance(db_user_id, attend_currency_id, today_str)
+    if not result.ok:
         await send_reply(
             inter,
-            "출석 재화 설정에 문제가 있습니다. 관리자에게 문의해주세요.",
+            "오늘은 이미 출석하셨어요! 내일 다시 와주세요 😊",
             ephemeral=False,
         )
         return
 
-    cur_name, cur_code = cur_row
-
-    # ✅ 1d50 굴려서 보상 지급
-    roll = random.randint(1, 50)
-    new_amount = await change_balance(user["id"], attend_currency_id, roll)
-
-    # ✅ 오늘 날짜를 출석일로 기록
-    await update_user_last_attend(user["id"], today_str)
+    roll = result.roll
+    new_amount = result.balance
 
     # ✅ 결과 메시지 전송
     # ✅ 결과 메시지 전송 (Embed 사용)
@@ -915,14 +1063,30 @@ async def slash_bonus_attend(inter: discord.Interaction):
     # 오늘 날짜
     today_str = get_today_kst_str()
 
-    settings = await get_or_create_guild_settings(inter.guild.id)
-    attend_currency_id = settings["attend_currency_id"]
+    config = await get_guild_config(inter.guild.id)
+    attend_currency_id = config.attend_currency_id
+
+    # 출석 재화 정보 (아이템을 쓰기 전에 먼저 확인)
+    cur_row = await get_currency_by_id(inter.guild.id, attend_currency_id)
+    if not cur_row:
+        await send_reply(
+            inter,
+            "출석 재화 설정에 문제가 있습니다. 관리자에게 문의해주세요.",
+            ephemeral=False,
+        )
+        return
+
+    cur_name, cur_code = cur_row["name"], cur_row["code"]
 
     # 유저 정보
-    user = await get_or_create_user(inter.guild.id, inter.user.id)
+    db_user_id = await get_user_id(inter.guild.id, inter.user.id)
+
+    # 오늘 출석 확인 + 재출석 기록 + 행운 아이템 1개 소모 + 1d50 지급을 한 트랜잭션으로
+    result = await claim_bonus_attendance(
+        inter.guild.id, db_user_id, attend_currency_id, today_str
+    )
 
-    # 1) 오늘 기본 출석 안 했으면 불가
-    if user["last_attend_date"] != today_str:
+    if result.status == "not_attended":
         await send_reply(
             inter,
             "아직 오늘 기본 출석을 하지 않았어요!\n"
@@ -931,9 +1095,7 @@ async def slash_bonus_attend(inter: discord.Interaction):
         )
         return
 
-    # 2) 오늘 이미 재출석 했으면 불가
-    last_bonus = user["last_bonus_attend_date"]  # Row라서 [] 로 접근
-    if last_bonus == today_str:
+    if result.status == "already_claimed":
         await send_reply(
             inter,
             "오늘은 이미 `/재출석` 을 사용했어요.\n내일 다시 사용해 주세요 😊",
@@ -941,37 +1103,7 @@ async def slash_bonus_attend(inter: discord.Interaction):
         )
         return
 
-    # 3) 인벤토리에서 행운 아이템 찾기
-    lucky_items = ["출석 주사위", "행운의 꼬리"]
-    chosen_row = None
-
-    async with aiosqlite.connect(DB_PATH) as db:
-        # 🔹 Row 객체로 받기 (중요!)
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute(
-            """
-            SELECT inv.id AS inv_id, inv.quantity, i.name
-              FROM inventories AS inv
-              JOIN items AS i ON inv.item_id = i.id
-             WHERE inv.user_id = ?
-               AND i.guild_id = ?
-               AND i.name IN (?, ?)
-            """,
-            (user["id"], inter.guild.id, lucky_items[0], lucky_items[1]),
-        )
-        rows = await cursor.fetchall()
-        await cursor.close()
-
-    # 우선순위: lucky_items[0] -> lucky_items[1]
-    for name in lucky_items:
-        for row in rows:
-            if row["name"] == name:
-                chosen_row = row
-                break
-        if chosen_row:
-            break
-
-    if not chosen_row:
+    if result.status == "no_item":
         await send_reply(
             inter,
             "인벤토리에 **출석 주사위** 또는 **행운의 꼬리**가 있어야 `/재출석` 을 사용할 수 있어요.",
@@ -979,49 +1111,9 @@ async def slash_bonus_attend(inter: discord.Interaction):
         )
         return
 
-    used_item_name = chosen_row["name"]
-    inv_id = chosen_row["inv_id"]
-    qty = chosen_row["quantity"]
-
-    # 4) 아이템 1개 소모
-    async with aiosqlite.connect(DB_PATH) as db:
-        if qty > 1:
-            await db.execute(
-                "UPDATE inventories SET quantity = ? WHERE id = ?",
-                (qty - 1, inv_id),
-            )
-        else:
-            await db.execute(
-                "DELETE FROM inventories WHERE id = ?",
-                (inv_id,),
-            )
-        await db.commit()
-
-    # 5) 출석 재화 정보
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            "SELECT name, code FROM currencies WHERE id = ?",
-            (attend_currency_id,),
-        )
-        cur_row = await cursor.fetchone()
-        await cursor.close()
-
-    if not cur_row:
-        await send_reply(
-            inter,
-            "출석 재화 설정에 문제가 있습니다. 관리자에게 문의해주세요.",
-            ephemeral=False,
-        )
-        return
-
-    cur_name, cur_code = cur_row
-
-    # 6) 1d50 보너스 지급
-    roll = random.randint(1, 50)
-    new_amount = await change_balance(user["id"], attend_currency_id, roll)
-
-    # 7) 오늘 보너스 출석 기록
-    await update_user_last_bonus_attend(user["id"], today_str)
+    used_item_name = result.used_item
+    roll = result.roll
+    new_amount = result.balance
 
     embed = discord.Embed(
         title="보너스 출석 완료! 🍀",
@@ -1042,18 +1134,59 @@ async def slash_bonus_attend(inter: discord.Interaction):
 
 
 
-# =========================================================
-# 3. 소지금 / 인벤토리
-# =========================================================
-
-@bot.tree.command(name="소지금", description="자신의 재화 소지금을 확인합니다.")
-async def slash_balance(inter: discord.Interaction, identifier: str | None = None):
-    if not await ensure_channel_inter(inter, "user"):
+@bot.tree.command(name="출석기록", description="이번 달 출석 달력과 연속 출석 일수를 확인합니다.")
+async def slash_attend_history(inter: discord.Interaction):
+    if not await ensure_channel_inter(inter, "attend"):
         return
 
-    user = await get_or_create_user(inter.guild.id, inter.user.id)
+    db_user_id = await get_user_id(inter.guild.id, inter.user.id)
+    today_str = get_today_kst_str()
+    history = await get_attendance_history(db_user_id, today_str)
+
+    year, month, today = int(today_str[:4]), int(today_str[5:7]), int(today_str[8:10])
+    days = history["days"]
+
+    # 🟩 출석 / ⬛ 결석 / ⬜ 아직 안 온 날
+    lines = ["월 화 수 목 금 토 일"]
+    for week in calendar.monthcalendar(year, month):
+        cells = []
+        for d in week:
+            if d == 0:
+                cells.append("　")
+            elif days >> (d - 1) & 1:
+                cells.append("🟩")
+            elif d < today:
+                cells.append("⬛")
+            else:
+                cells.append("⬜")
+        lines.append(" ".join(cells))
 
-    if identifier:
+    month_count = days.bit_count()
+    embed = discord.Embed(
+        title=f"{year}년 {month}월 출석 기록 📅",
+        description="\n".join(lines),
+        color=discord.Color.green(),
+    )
+    embed.add_field(name="이번 달 출석", value=f"{month_count}일", inline=True)
+    embed.add_field(name="연속 출석", value=f"{history['streak']}일", inline=True)
+    embed.add_field(name="누적 출석", value=f"{history['total']}일", inline=True)
+    embed.set_footer(text=f"{inter.user.display_name} 님의 출석 기록")
+
+    await send_reply(inter, embed=embed, ephemeral=True)
+
+
+# =========================================================
+# 3. 소지금 / 인벤토리
+# =========================================================
+
+@bot.tree.command(name="소지금", description="자신의 재화 소지금을 확인합니다.")
+async def slash_balance(inter: discord.Interaction, identifier: str | None = None):
+    if not await ensure_channel_inter(inter, "user"):
+        return
+
+    db_user_id = await get_user_id(inter.guild.id, inter.user.id)
+
+    if identifier:
         cur = await get_currency_by_identifier(inter.guild.id, identifier)
         if not cur:
             await send_reply(
@@ -1063,7 +1196,7 @@ async def slash_balance(inter: discord.Interaction, identifier: str | None = Non
             )
             return
 
-        amount = await get_balance(user["id"], cur["id"])
+        amount = await get_balance(db_user_id, cur["id"])
         await send_reply(
             inter,
             f"💰 **{inter.user.display_name}** 님의 `{cur['name']}` (`{cur['code']}`) 소지금: **{amount}**",
@@ -1071,15 +1204,14 @@ async def slash_balance(inter: discord.Interaction, identifier: str | None = Non
         )
         return
 
-    currencies = await list_currencies(inter.guild.id)
-    if not currencies:
+    wallet = await get_wallet(db_user_id, inter.guild.id)
+    if not wallet:
         await send_reply(inter, "이 서버에는 아직 재화가 없습니다.", ephemeral=True)
         return
 
     lines = []
-    for cur in currencies:
-        amount = await get_balance(user["id"], cur["id"])
-        lines.append(f"- {cur['name']} (`{cur['code']}`): {amount}")
+    for cur in wallet:
+        lines.append(f"- {cur['name']} (`{cur['code']}`): {cur['amount']}")
 
     msg = "\n".join(lines)
     await send_reply(
@@ -1096,8 +1228,8 @@ async def slash_inventory_cmd(inter: discord.Interaction):
         await send_reply(inter, "서버 안에서만 사용할 수 있어요.", ephemeral=True)
         return
 
-    user = await get_or_create_user(inter.guild.id, inter.user.id)
-    inv = await get_inventory(user["id"])
+    db_user_id = await get_user_id(inter.guild.id, inter.user.id)
+    inv = await get_inventory(db_user_id)
 
     if not inv:
         await send_reply(
@@ -1197,23 +1329,21 @@ async def slash_gift_currency(
         )
         return
 
-    giver = await get_or_create_user(inter.guild.id, inter.user.id)
-    receiver = await get_or_create_user(inter.guild.id, member.id)
+    giver_id = await get_user_id(inter.guild.id, inter.user.id)
+    receiver_id = await get_user_id(inter.guild.id, member.id)
 
-    giver_balance = await get_balance(giver["id"], cur["id"])
-    if giver_balance < amount:
+    # 잔액 확인 + 차감 + 지급을 한 트랜잭션으로
+    result = await transfer_currency(giver_id, receiver_id, cur["id"], amount)
+    if not result.ok:
         await send_reply(
             inter,
             f"재화가 부족해서 선물할 수 없어요.\n"
-            f"- 보유: {giver_balance} {cur['name']} (`{cur['code']}`)\n"
+            f"- 보유: {result.sender} {cur['name']} (`{cur['code']}`)\n"
             f"- 시도: {amount}",
             ephemeral=True,
         )
         return
 
-    await change_balance(giver["id"], cur["id"], -amount)
-    new_receiver_balance = await change_balance(receiver["id"], cur["id"], amount)
-
     # 🔹 파란색 계열 임베드로 변경
     embed = discord.Embed(
         title="🎁 재화 선물 완료!",
@@ -1221,7 +1351,7 @@ async def slash_gift_currency(
             f"{inter.user.mention} 님이 {member.mention} 님에게 재화를 선물했습니다.\n\n"
             f"💰 재화: **{cur['name']}** (`{cur['code']}`)\n"
             f"📤 선물한 양: **{amount}**\n"
-            f"📥 받는 사람 선물 후 소지금: **{new_receiver_balance} {cur['name']}**"
+            f"📥 받는 사람 선물 후 소지금: **{result.receiver} {cur['name']}**"
         ),
         color=discord.Color.gold(), 
     )
@@ -1241,6 +1371,7 @@ async def slash_gift_currency(
     item_name="선물할 아이템 이름 (인벤토리 기준 이름)",
     quantity="선물할 개수 (양수)",
 )
+@app_commands.autocomplete(item_name=autocomplete_inventory_item)
 async def slash_gift_item(
     inter: discord.Interaction,
     member: discord.Member,
@@ -1261,35 +1392,29 @@ async def slash_gift_item(
 
     item = await get_shop_item_by_name(inter.guild.id, name)
     if not item:
-        await send_reply(
+        await reply_item_not_found(
             inter,
             f"`{name}` 이름의 아이템을 찾을 수 없어요.\n"
             "아이템 이름을 정확히 입력했는지 확인하고, `/인벤토리` 또는 `/상점`에서 다시 확인해 주세요.",
-            ephemeral=True,
+            name,
+            predicate=lambda e: e["is_shop"],
         )
         return
 
-    giver = await get_or_create_user(inter.guild.id, inter.user.id)
-    receiver = await get_or_create_user(inter.guild.id, member.id)
-
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            "SELECT id, quantity FROM inventories WHERE user_id = ? AND item_id = ?",
-            (giver["id"], item["id"]),
-        )
-        row = await cursor.fetchone()
-        await cursor.close()
+    giver_id = await get_user_id(inter.guild.id, inter.user.id)
+    receiver_id = await get_user_id(inter.guild.id, member.id)
 
-        if not row:
+    # 보유 확인 + 차감 + 지급을 한 트랜잭션으로
+    result = await transfer_item(giver_id, receiver_id, item["id"], quantity)
+    if not result.ok:
+        giver_qty = result.sender
+        if giver_qty == 0:
             await send_reply(
                 inter,
                 f"당신의 인벤토리에 **{item['name']}** 이(가) 없습니다.",
                 ephemeral=True,
             )
-            return
-
-        giver_inv_id, giver_qty = row
-        if giver_qty < quantity:
+        else:
             await send_reply(
                 inter,
                 f"아이템 개수가 부족해서 선물할 수 없습니다.\n"
@@ -1297,41 +1422,7 @@ async def slash_gift_item(
                 f"- 시도: {quantity}개",
                 ephemeral=True,
             )
-            return
-
-        new_giver_qty = giver_qty - quantity
-
-        if new_giver_qty > 0:
-            await db.execute(
-                "UPDATE inventories SET quantity = ? WHERE id = ?",
-                (new_giver_qty, giver_inv_id),
-            )
-        else:
-            await db.execute(
-                "DELETE FROM inventories WHERE id = ?",
-                (giver_inv_id,),
-            )
-
-        cursor = await db.execute(
-            "SELECT id, quantity FROM inventories WHERE user_id = ? AND item_id = ?",
-            (receiver["id"], item["id"]),
-        )
-        row = await cursor.fetchone()
-        await cursor.close()
-
-        if row:
-            recv_inv_id, recv_qty = row
-            await db.execute(
-                "UPDATE inventories SET quantity = ? WHERE id = ?",
-                (recv_qty + quantity, recv_inv_id),
-            )
-        else:
-            await db.execute(
-                "INSERT INTO inventories (user_id, item_id, quantity) VALUES (?, ?, ?)",
-                (receiver["id"], item["id"], quantity),
-            )
-
-        await db.commit()
+        return
 
     # 🔹 파란색 계열 임베드로 변경
     embed = discord.Embed(
@@ -1339,7 +1430,8 @@ async def slash_gift_item(
         description=(
             f"{inter.user.mention} 님이 {member.mention} 님에게 아이템을 선물했습니다.\n\n"
             f"📦 아이템: **{item['name']}**\n"
-            f"🎁 선물한 개수: **{quantity}개**"
+            f"🎁 선물한 개수: **{quantity}개**\n"
+            f"📥 받는 사람 보유 개수: **{result.receiver}개**"
         ),
         color=discord.Color.blue(),  # 파란색 계열
     )
@@ -1365,40 +1457,112 @@ def format_stock_text(stock):
         return f"{stock}개"
 
 
+def format_shop_item_field(item) -> tuple[str, str]:
+    cur_name = item["currency_name"] or "알 수 없음"
+    cur_code = item["currency_code"] or "?"
+    stock_text = format_stock_text(item.get("stock"))
+    name = f"{item['name']} - {item['price']} {cur_name} (`{cur_code}`) | 재고: {stock_text}"
+    value = (item["description"] or "설명 없음") + f"\n(구매 예시: `/구매 {item['name']}`)"
+    return name, value
+
+
+def format_sell_item_field(s) -> tuple[str, str]:
+    name = f"{s['item_name']} - 1개당 {s['price']} {s['currency_name']} (`{s['currency_code']}`)"
+    value = s["item_description"] or "설명 없음"
+    return name, value
+
+
+# 종류 → (제목, 설명, 목록, 칸 만드는 함수)
+SHOP_EMBEDS = {
+    "all": (
+        "🛒 상점 (전체)",
+        "`/구매 아이템이름` 으로 아이템을 구매할 수 있어요.\n"
+        "메인 재화/이벤트 재화 아이템을 모두 표시합니다.",
+        lambda catalog: catalog.items,
+        format_shop_item_field,
+    ),
+    "normal": (
+        "🛒 상점 (일반)",
+        "`/구매 아이템이름` 으로 아이템을 구매할 수 있어요.\n"
+        "여기에는 **메인 재화로 구매하는 아이템**만 표시됩니다.",
+        lambda catalog: catalog.normal,
+        format_shop_item_field,
+    ),
+    "event": (
+        "🎁 이벤트 상점",
+        "`/구매 아이템이름` 으로 이벤트 아이템을 구매할 수 있어요.\n"
+        "여기에는 **이벤트 재화로 구매하는 아이템**만 표시됩니다.",
+        lambda catalog: catalog.event,
+        format_shop_item_field,
+    ),
+    "sell": (
+        "💰 판매 상점",
+        "`/판매 아이템이름 개수` 로 판매할 수 있어요.",
+        lambda catalog: catalog.sell,
+        format_sell_item_field,
+    ),
+}
+
+
+async def get_shop_embed(guild_id: int, kind: str) -> discord.Embed | None:
+    """
+    캐시된 상점 임베드. 목록이 비어 있으면 None.
+    처음 한 번만 그리고, 이후엔 재고가 바뀐 아이템 칸만 고친다.
+    상점 목록은 첫 페이지(SHOP_PAGE_SIZE 개)만 그린다. 다음 페이지는 ShopPageView 가 읽어 온다.
+    판매 상점은 한 장짜리라 디스코드 칸 제한(25개)까지만.
+    """
+    catalog = await get_shop_catalog(guild_id)
+    title, description, get_rows, format_field = SHOP_EMBEDS[kind]
+
+    cached = catalog.embeds.get(kind)
+    if cached is None:
+        rows = get_rows(catalog)
+        if not rows:
+            return None
+
+        limit = 25 if kind == "sell" else SHOP_PAGE_SIZE
+        embed = discord.Embed(title=title, description=description)
+        field_index = {}
+        for row in rows[:limit]:
+            name, value = format_field(row)
+            field_index[row.get("id", row.get("item_id"))] = len(embed.fields)
+            embed.add_field(name=name, value=value, inline=False)
+        catalog.embeds[kind] = [embed, field_index, catalog.version]
+        return embed
+
+    embed, field_index, seen_version = cached
+    # 판매 상점 칸에는 재고가 없고 (items 행이 아니라 sell 행으로 그림) 고칠 게 없다
+    if seen_version < catalog.version and kind != "sell":
+        for item_id, changed_version in catalog.changed.items():
+            if changed_version > seen_version and item_id in field_index:
+                name, value = format_field(catalog.items_by_id[item_id])
+                embed.set_field_at(field_index[item_id], name=name, value=value, inline=False)
+        cached[2] = catalog.version
+    return embed
+
+
+async def send_shop_page_view(inter: discord.Interaction, view: "ShopPageView"):
+    """페이지 뷰를 본인에게만 보여주고, 나중에 고칠 수 있게 메시지를 뷰에 저장."""
+    embed = view.make_list_embed()
+    if inter.response.is_done():
+        view.message = await inter.followup.send(embed=embed, view=view, ephemeral=True)
+    else:
+        await inter.response.send_message(embed=embed, view=view, ephemeral=True)
+        view.message = await inter.original_response()
+
+
 @bot.tree.command(name="상점", description="일반 상점(메인 재화 아이템)을 봅니다.")
 async def slash_shop(inter: discord.Interaction):
     if not await ensure_channel_inter(inter, "shop"):
         return
 
-    settings = await get_or_create_guild_settings(inter.guild.id)
-    main_currency_id = settings["main_currency_id"]
-
-    items = await get_items(inter.guild.id)
-
-    normal_items = [
-        item for item in items
-        if main_currency_id is not None and item["currency_id"] == main_currency_id
-    ]
-
-    if not normal_items:
+    view = ShopPageView(inter.guild.id, inter.user.id, category="normal")
+    await view.open()
+    if view.total == 0:
         await send_reply(inter, "현재 일반 상점(메인 재화) 아이템이 없습니다. 😢", ephemeral=True)
         return
 
-    embed = discord.Embed(
-        title="🛒 상점 (일반)",
-        description="`/구매 아이템이름` 으로 아이템을 구매할 수 있어요.\n"
-                    "여기에는 **메인 재화로 구매하는 아이템**만 표시됩니다.",
-    )
-
-    for item in normal_items:
-        cur_name = item["currency_name"] or "알 수 없음"
-        cur_code = item["currency_code"] or "?"
-        stock_text = format_stock_text(item.get("stock"))
-        name = f"{item['name']} - {item['price']} {cur_name} (`{cur_code}`) | 재고: {stock_text}"
-        value = (item["description"] or "설명 없음") + f"\n(구매 예시: `/구매 {item['name']}`)"
-        embed.add_field(name=name, value=value, inline=False)
-
-    await send_reply(inter, embed=embed, ephemeral=True)
+    await send_shop_page_view(inter, view)
 
 
 @bot.tree.command(name="이벤트상점", description="이벤트 상점(이벤트 재화 아이템)을 봅니다.")
@@ -1406,35 +1570,13 @@ async def slash_event_shop(inter: discord.Interaction):
     if not await ensure_channel_inter(inter, "shop"):
         return
 
-    settings = await get_or_create_guild_settings(inter.guild.id)
-    main_currency_id = settings["main_currency_id"]
-
-    items = await get_items(inter.guild.id)
-
-    event_items = [
-        item for item in items
-        if main_currency_id is not None and item["currency_id"] != main_currency_id
-    ]
-
-    if not event_items:
+    view = ShopPageView(inter.guild.id, inter.user.id, category="event")
+    await view.open()
+    if view.total == 0:
         await send_reply(inter, "현재 이벤트 상점 아이템이 없습니다. 🎃", ephemeral=True)
         return
 
-    embed = discord.Embed(
-        title="🎁 이벤트 상점",
-        description="`/구매 아이템이름` 으로 이벤트 아이템을 구매할 수 있어요.\n"
-                    "여기에는 **이벤트 재화로 구매하는 아이템**만 표시됩니다.",
-    )
-
-    for item in event_items:
-        cur_name = item["currency_name"] or "알 수 없음"
-        cur_code = item["currency_code"] or "?"
-        stock_text = format_stock_text(item.get("stock"))
-        name = f"{item['name']} - {item['price']} {cur_name} (`{cur_code}`) | 재고: {stock_text}"
-        value = (item["description"] or "설명 없음") + f"\n(구매 예시: `/구매 {item['name']}`)"
-        embed.add_field(name=name, value=value, inline=False)
-
-    await send_reply(inter, embed=embed, ephemeral=True)
+    await send_shop_page_view(inter, view)
 
 @bot.tree.command(
     name="아이템관리",
@@ -1450,9 +1592,9 @@ async def slash_manage_items(inter: discord.Interaction):
     guild_id = inter.guild.id
 
     # 이 명령어는 '상점 채널' 또는 '관리자용 봇채널'에서만 사용 가능
-    settings = await get_or_create_guild_settings(guild_id)
-    shop_channel_id = settings["shop_channel_id"]
-    admin_channel_id = await get_admin_channel_id(guild_id)
+    config = await get_guild_config(guild_id)
+    shop_channel_id = config.shop_channel_id
+    admin_channel_id = config.admin_channel_id
 
     if shop_channel_id is None and admin_channel_id is None:
         await send_reply(
@@ -1474,31 +1616,11 @@ async def slash_manage_items(inter: discord.Interaction):
         )
         return
 
-    # 상점에 노출 중인(is_shop = 1) 아이템 가져오기
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute(
-            """
-            SELECT i.id,
-                   i.name,
-                   i.price,
-                   i.stock,
-                   i.description,
-                   c.name AS currency_name,
-                   c.code AS currency_code
-              FROM items AS i
-              LEFT JOIN currencies AS c
-                ON i.currency_id = c.id
-             WHERE i.guild_id = ?
-               AND i.is_shop = 1
-             ORDER BY i.name
-            """,
-            (guild_id,),
-        )
-        rows = await cursor.fetchall()
-        await cursor.close()
+    # 상점에 노출 중인 아이템을 한 페이지씩 (키셋 페이지)
+    view = ItemManageView(guild_id, manager_id=inter.user.id)
+    await view.open()
 
-    if not rows:
+    if view.total == 0:
         await send_reply(
             inter,
             "현재 상점에 등록된 아이템이 없습니다.\n"
@@ -1507,17 +1629,8 @@ async def slash_manage_items(inter: discord.Interaction):
         )
         return
 
-    items = [dict(r) for r in rows]
-
-    view = ItemManageView(items, manager_id=inter.user.id)
-    embed = view.make_list_embed()
-
     try:
-        if inter.response.is_done():
-            message = await inter.followup.send(embed=embed, view=view, ephemeral=True)
-        else:
-            message = await inter.response.send_message(embed=embed, view=view, ephemeral=True)
-        view.message = message
+        await send_shop_page_view(inter, view)
     except discord.NotFound:
         print("[WARN] 아이템관리 응답 중 인터랙션 만료(404)")
 
@@ -1554,8 +1667,8 @@ async def slash_add_item_cmd(
     if not await ensure_channel_inter(inter, "shop"):
         return
 
-    settings = await get_or_create_guild_settings(inter.guild.id)
-    main_currency_id = settings["main_currency_id"]
+    config = await get_guild_config(inter.guild.id)
+    main_currency_id = config.main_currency_id
 
     if price < 0:
         await send_reply(inter, "가격은 0 이상이어야 합니다.", ephemeral=True)
@@ -1637,8 +1750,8 @@ async def slash_add_event_item(
     if not await ensure_channel_inter(inter, "shop"):
         return
 
-    settings = await get_or_create_guild_settings(inter.guild.id)
-    main_currency_id = settings["main_currency_id"]
+    config = await get_guild_config(inter.guild.id)
+    main_currency_id = config.main_currency_id
 
     if price < 0:
         await send_reply(inter, "가격은 0 이상이어야 합니다.", ephemeral=True)
@@ -1687,6 +1800,9 @@ async def slash_add_event_item(
         stock_value,      # 🔹 여기도 stock → stock_value 로 변경
         is_shop=True,     # 상점용
     )
+    if item_id is None:
+        await send_reply(inter, f"이미 같은 이름의 아이템이 있습니다: `{name}`", ephemeral=True)
+        return
     await send_reply(
         inter,
         f"✅ 이벤트 상점 아이템 추가 완료!\n"
@@ -1708,6 +1824,7 @@ async def slash_add_event_item(
 @app_commands.describe(
     item_name="삭제할 아이템 이름 (상점에 표시된 이름 그대로 입력)"
 )
+@app_commands.autocomplete(item_name=autocomplete_shop_item)
 async def slash_delete_item_cmd(inter: discord.Interaction, item_name: str):
     # 상점 채널에서만 사용 가능
     if not await ensure_channel_inter(inter, "shop"):
@@ -1722,7 +1839,7 @@ async def slash_delete_item_cmd(inter: discord.Interaction, item_name: str):
         )
         return
 
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         # 상점에 노출 중인 같은 이름 아이템들 모두 찾기
         cursor = await db.execute(
             """
@@ -1738,11 +1855,12 @@ async def slash_delete_item_cmd(inter: discord.Interaction, item_name: str):
         await cursor.close()
 
         if not rows:
-            await send_reply(
+            await reply_item_not_found(
                 inter,
                 f"`{name}` 이름의 상점 아이템을 찾을 수 없습니다.\n"
                 "`/상점` 또는 `/이벤트상점`으로 아이템 이름을 다시 확인해 주세요.",
-                ephemeral=True,
+                name,
+                predicate=lambda e: e["is_shop"],
             )
             return
 
@@ -1770,6 +1888,9 @@ async def slash_delete_item_cmd(inter: discord.Interaction, item_name: str):
         )
 
         await db.commit()
+    invalidate_shop_catalog(inter.guild.id)
+    for iid in item_ids:
+        index_item_name(inter.guild.id, iid, is_shop=False, sellable=False)
 
     deleted_count = len(rows)
     await send_reply(
@@ -1786,6 +1907,7 @@ async def slash_delete_item_cmd(inter: discord.Interaction, item_name: str):
 @app_commands.describe(
     item_name="완전히 삭제할 아이템 이름 (상점/인벤토리 기준 이름 그대로 입력)"
 )
+@app_commands.autocomplete(item_name=autocomplete_any_item)
 async def slash_purge_item_cmd(inter: discord.Interaction, item_name: str):
     """
     ⚠ 매우 위험한 명령어입니다.
@@ -1810,11 +1932,11 @@ async def slash_purge_item_cmd(inter: discord.Interaction, item_name: str):
     # 이름으로 아이템 찾기
     item = await get_item_by_name(inter.guild.id, name)
     if not item:
-        await send_reply(
+        await reply_item_not_found(
             inter,
             f"`{name}` 이름의 아이템을 찾을 수 없습니다.\n"
             "`/상점`, `/이벤트상점`, `/인벤토리` 등에서 정확한 이름을 다시 확인해 주세요.",
-            ephemeral=True,
+            name,
         )
         return
 
@@ -1838,11 +1960,46 @@ async def slash_purge_item_cmd(inter: discord.Interaction, item_name: str):
 # 6. 아이템 구매: /구매 (재고 차감)
 # =========================================================
 
+def format_purchase_message(result: PurchaseResult, item_name: str) -> str:
+    """purchase() 결과를 /구매, /선택구매 공용 안내 문구로 변환."""
+    if result.status == "not_found":
+        return (
+            f"`{item_name}` 아이템을 상점에서 찾을 수 없습니다.\n"
+            "철자와 띄어쓰기를 확인하고 `/상점` 에서 정확한 이름을 확인해 주세요."
+        )
+
+    item = result.item
+    cur_name = item["currency_name"] or "알 수 없음"
+
+    if result.status == "out_of_stock":
+        return (
+            f"❌ **{item['name']}** 의 재고가 부족합니다.\n"
+            f"- 현재 재고: {result.stock}개\n"
+            f"- 요청 수량: {result.quantity}개"
+        )
+
+    if result.status == "insufficient_funds":
+        return (
+            f"재화가 부족합니다!\n"
+            f"- 필요 금액: {result.total_price} {cur_name}\n"
+            f"- 현재 소지금: {result.balance} {cur_name}"
+        )
+
+    new_stock_text = "무제한" if result.stock is None else f"{result.stock}개"
+    return (
+        f"✅ **{item['name']}** {result.quantity}개 구매 완료!\n"
+        f"- 지불한 금액: {result.total_price} {cur_name}\n"
+        f"- 남은 소지금: {result.balance} {cur_name}\n"
+        f"- 남은 재고: {new_stock_text}"
+    )
+
+
 @bot.tree.command(name="구매", description="상점에서 아이템을 구매합니다.")
 @app_commands.describe(
     item_name="구매할 아이템 이름",
     quantity="구매할 개수 (반드시 입력해야 합니다)"
 )
+@app_commands.autocomplete(item_name=autocomplete_shop_item)
 async def slash_buy_item(inter: discord.Interaction, item_name: str, quantity: int):
     if not await ensure_channel_inter(inter, "shop"):
         return
@@ -1857,97 +2014,30 @@ async def slash_buy_item(inter: discord.Interaction, item_name: str, quantity: i
         )
         return
 
+    await buy_item_by_name(inter, name, quantity)
+
+
+async def buy_item_by_name(inter: discord.Interaction, name: str, quantity: int):
+    """/구매 본체. 이름을 못 찾으면 비슷한 이름으로 다시 사는 버튼을 보여준다."""
     item = await get_item_by_name(inter.guild.id, name)
 
     if not item or item.get("is_shop") == 0:
-        await send_reply(
+        await reply_item_not_found(
             inter,
             f"`{name}` 아이템을 상점에서 찾을 수 없습니다.\n"
             "철자와 띄어쓰기를 확인하고 `/상점` 에서 정확한 이름을 확인해 주세요.",
-            ephemeral=True,
-        )
-        return
-
-    stock = item.get("stock")
-
-    # 재고 체크
-    if stock is not None and stock < quantity:
-        await send_reply(
-            inter,
-            f"❌ **{item['name']}** 의 재고가 부족합니다.\n"
-            f"- 현재 재고: {stock}개\n"
-            f"- 요청 수량: {quantity}개",
-            ephemeral=True,
-        )
-        return
-
-    user = await get_or_create_user(inter.guild.id, inter.user.id)
-
-    price = item["price"]
-    currency_id = item["currency_id"]
-    cur_name = item["currency_name"] or "알 수 없음"
-    cur_code = item["currency_code"] or "?"
-
-    total_price = price * quantity
-
-    current_balance = await get_balance(user["id"], currency_id)
-    if current_balance < total_price:
-        await send_reply(
-            inter,
-            f"재화가 부족합니다!\n"
-            f"- 필요 금액: {total_price} {cur_name}\n"
-            f"- 현재 소지금: {current_balance} {cur_name}",
-            ephemeral=True,
+            name,
+            predicate=lambda e: e["is_shop"],
+            retry=lambda i, n: buy_item_by_name(i, n, quantity),
         )
         return
 
-    # 재화 차감
-    new_balance = await change_balance(user["id"], currency_id, -total_price)
-
-    # 인벤토리 업데이트
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            "SELECT id, quantity FROM inventories WHERE user_id = ? AND item_id = ?",
-            (user["id"], item["id"]),
-        )
-        row = await cursor.fetchone()
-        await cursor.close()
-
-        if row:
-            inv_id, qty = row
-            await db.execute(
-                "UPDATE inventories SET quantity = ? WHERE id = ?",
-                (qty + quantity, inv_id),
-            )
-        else:
-            await db.execute(
-                "INSERT INTO inventories (user_id, item_id, quantity) VALUES (?, ?, ?)",
-                (user["id"], item["id"], quantity),
-            )
-
-        # 재고 감소
-        if stock is not None:
-            await db.execute(
-                "UPDATE items SET stock = stock - ? WHERE id = ? AND stock IS NOT NULL",
-                (quantity, item["id"]),
-            )
-
-        await db.commit()
-
-    # 남은 재고 표시
-    if stock is None:
-        new_stock_text = "무제한"
-    else:
-        new_stock_text = f"{max(stock - quantity, 0)}개"
+    db_user_id = await get_user_id(inter.guild.id, inter.user.id)
 
-    await send_reply(
-        inter,
-        f"✅ **{item['name']}** {quantity}개 구매 완료!\n"
-        f"- 지불한 금액: {total_price} {cur_name}\n"
-        f"- 남은 소지금: {new_balance} {cur_name}\n"
-        f"- 남은 재고: {new_stock_text}",
-        ephemeral=False,
-    )
+    # 재고 차감 + 결제 + 지급을 한 트랜잭션으로
+    result = await purchase(inter.guild.id, db_user_id, item["id"], quantity)
+    msg = format_purchase_message(result, name)
+    await send_reply(inter, msg, ephemeral=not result.ok)
 
 @bot.tree.command(
     name="선택구매",
@@ -1960,33 +2050,11 @@ async def slash_buy_select(inter: discord.Interaction):
 
     guild_id = inter.guild.id
 
-    # 상점에서 구매 가능한 아이템 목록 불러오기
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute(
-            """
-            SELECT i.id,
-                   i.name,
-                   i.price,
-                   i.stock,
-                   i.description,
-                   c.id   AS currency_id,
-                   c.name AS currency_name,
-                   c.code AS currency_code
-              FROM items AS i
-              LEFT JOIN currencies AS c
-                ON i.currency_id = c.id
-             WHERE i.guild_id = ?
-               AND i.is_shop = 1
-               AND (i.stock IS NULL OR i.stock > 0)  -- 재고 0인 건 안 보이게
-             ORDER BY i.name
-            """,
-            (guild_id,),
-        )
-        rows = await cursor.fetchall()
-        await cursor.close()
+    # 구매 가능한 아이템(재고 0 인 건 제외)을 한 페이지씩
+    view = SelectBuyView(guild_id=guild_id, buyer_id=inter.user.id)
+    await view.open()
 
-    if not rows:
+    if view.total == 0:
         await send_reply(
             inter,
             "현재 상점에 구매 가능한 아이템이 없습니다.\n"
@@ -1995,17 +2063,8 @@ async def slash_buy_select(inter: discord.Interaction):
         )
         return
 
-    items = [dict(r) for r in rows]
-
-    view = SelectBuyView(items=items, buyer_id=inter.user.id, guild_id=guild_id)
-    embed = view.make_list_embed()
-
     # 셀렉트/버튼은 개인용으로만 보여줘도 되니까 ephemeral=True
-    if inter.response.is_done():
-        msg = await inter.followup.send(embed=embed, view=view, ephemeral=True)
-    else:
-        msg = await inter.response.send_message(embed=embed, view=view, ephemeral=True)
-    view.message = msg
+    await send_shop_page_view(inter, view)
 
 
 
@@ -2071,8 +2130,8 @@ async def slash_sell_shop(inter: discord.Interaction):
     if not await ensure_channel_inter(inter, "shop"):
         return
 
-    sell_items = await get_sell_items(inter.guild.id)
-    if not sell_items:
+    embed = await get_shop_embed(inter.guild.id, "sell")
+    if embed is None:
         await send_reply(
             inter,
             "현재 판매 상점에 등록된 아이템이 없습니다.",
@@ -2080,16 +2139,6 @@ async def slash_sell_shop(inter: discord.Interaction):
         )
         return
 
-    embed = discord.Embed(
-        title="💰 판매 상점",
-        description="`/판매 아이템이름 개수` 로 판매할 수 있어요.",
-    )
-
-    for s in sell_items:
-        name = f"{s['item_name']} - 1개당 {s['price']} {s['currency_name']} (`{s['currency_code']}`)"
-        value = s["item_description"] or "설명 없음"
-        embed.add_field(name=name, value=value, inline=False)
-
     await send_reply(inter, embed=embed, ephemeral=True)
 
 
@@ -2098,6 +2147,7 @@ async def slash_sell_shop(inter: discord.Interaction):
     item_name="판매할 아이템 이름",
     quantity="판매할 개수 (양수)",
 )
+@app_commands.autocomplete(item_name=autocomplete_sell_item)
 async def slash_sell(
     inter: discord.Interaction,
     item_name: str,
@@ -2110,36 +2160,35 @@ async def slash_sell(
         await send_reply(inter, "판매 개수는 1 이상이어야 합니다.", ephemeral=True)
         return
 
-    sell_item = await get_sell_item_by_name(inter.guild.id, item_name.strip())
+    await sell_item_by_name(inter, item_name.strip(), quantity)
+
+
+async def sell_item_by_name(inter: discord.Interaction, item_name: str, quantity: int):
+    """/판매 본체. 이름을 못 찾으면 비슷한 이름으로 다시 파는 버튼을 보여준다."""
+    sell_item = await get_sell_item_by_name(inter.guild.id, item_name)
     if not sell_item:
-        await send_reply(
+        await reply_item_not_found(
             inter,
             f"`{item_name}` 은(는) 판매 상점에 등록되어 있지 않습니다.\n"
             "`/판매상점` 으로 판매 가능한 아이템을 확인해 주세요.",
-            ephemeral=True,
+            item_name,
+            predicate=lambda e: e["sellable"],
+            retry=lambda i, n: sell_item_by_name(i, n, quantity),
         )
         return
 
-    user = await get_or_create_user(inter.guild.id, inter.user.id)
-
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            "SELECT id, quantity FROM inventories WHERE user_id = ? AND item_id = ?",
-            (user["id"], sell_item["item_id"]),
-        )
-        row = await cursor.fetchone()
-        await cursor.close()
+    db_user_id = await get_user_id(inter.guild.id, inter.user.id)
 
-        if not row:
+    new_qty = await apply_inventory_delta(db_user_id, sell_item["item_id"], -quantity)
+    if new_qty is None:
+        have_qty = await get_item_quantity(db_user_id, sell_item["item_id"])
+        if have_qty == 0:
             await send_reply(
                 inter,
                 f"인벤토리에 `{sell_item['item_name']}` 이(가) 없습니다.",
                 ephemeral=True,
             )
-            return
-
-        inv_id, have_qty = row
-        if have_qty < quantity:
+        else:
             await send_reply(
                 inter,
                 f"개수가 부족하여 판매할 수 없습니다.\n"
@@ -2147,24 +2196,10 @@ async def slash_sell(
                 f"- 시도: {quantity}개",
                 ephemeral=True,
             )
-            return
-
-        new_qty = have_qty - quantity
-        if new_qty > 0:
-            await db.execute(
-                "UPDATE inventories SET quantity = ? WHERE id = ?",
-                (new_qty, inv_id),
-            )
-        else:
-            await db.execute(
-                "DELETE FROM inventories WHERE id = ?",
-                (inv_id,),
-            )
-
-        await db.commit()
+        return
 
     total_price = sell_item["price"] * quantity
-    new_balance = await change_balance(user["id"], sell_item["currency_id"], total_price)
+    new_balance = await apply_balance_delta(db_user_id, sell_item["currency_id"], total_price)
 
     await send_reply(
         inter,
@@ -2213,12 +2248,14 @@ async def slash_remove_sell_item(
         return
 
     # 삭제 실행
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             "DELETE FROM sell_shop_items WHERE guild_id = ? AND item_id = ?",
             (inter.guild.id, item["id"]),
         )
         await db.commit()
+    invalidate_shop_catalog(inter.guild.id)
+    index_item_name(inter.guild.id, item["id"], sellable=False)
 
     await send_reply(
         inter,
@@ -2268,6 +2305,9 @@ async def slash_add_admin_item(
         stock=None,     # 무제한
         is_shop=False,  # 상점에는 보이지 않음
     )
+    if item_id is None:
+        await send_reply(inter, f"이미 같은 이름의 아이템이 있습니다: `{name}`", ephemeral=True)
+        return
 
     await send_reply(
         inter,
@@ -2293,7 +2333,7 @@ async def slash_list_admin_items(inter: discord.Interaction):
         await send_reply(inter, "서버 안에서만 사용할 수 있어요.", ephemeral=True)
         return
 
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         db.row_factory = aiosqlite.Row
         # 🔹 is_shop = 0 인 숨김 아이템 중에서,
         #     fishing_loot에 등록된 낚시 아이템은 전부 제외
@@ -2410,7 +2450,7 @@ async def slash_add_fishing_item(
     # ✅ 같은 이름의 아이템이 이미 있으면 "재사용"
     existing = await get_item_by_name(inter.guild.id, name.strip())
     if existing:
-        async with aiosqlite.connect(DB_PATH) as db:
+        async with acquire() as db:
             await db.execute(
                 """
                 UPDATE items
@@ -2424,6 +2464,10 @@ async def slash_add_fishing_item(
                 (desc, cur["id"], existing["id"]),
             )
             await db.commit()
+        invalidate_shop_catalog(inter.guild.id)
+        index_item_name(inter.guild.id, existing["id"], is_shop=False)
+        # 낚시 확률표에 들어 있는 아이템 정보가 바뀌었을 수 있음
+        invalidate_loot_table(inter.guild.id)
 
         await send_reply(
             inter,
@@ -2445,6 +2489,9 @@ async def slash_add_fishing_item(
         stock=None,   # 무제한
         is_shop=False # 상점에는 안 보임
     )
+    if item_id is None:
+        await send_reply(inter, f"이미 같은 이름의 아이템이 있습니다: `{name}`", ephemeral=True)
+        return
 
     await send_reply(
         inter,
@@ -2487,8 +2534,8 @@ async def slash_set_fishing_chance(
     created_new = False
 
     if not item:
-        settings = await get_or_create_guild_settings(inter.guild.id)
-        main_currency_id = settings["main_currency_id"]
+        config = await get_guild_config(inter.guild.id)
+        main_currency_id = config.main_currency_id
 
         if main_currency_id is None:
             await send_reply(
@@ -2509,13 +2556,16 @@ async def slash_set_fishing_chance(
             stock=None,
             is_shop=False,
         )
+        if item_id is None:
+            await send_reply(inter, f"이미 같은 이름의 아이템이 있습니다: `{name}`", ephemeral=True)
+            return
         item = await get_item_by_id(inter.guild.id, item_id)
         created_new = True
 
     # 2) 이 길드의 모든 낚시 룻을 불러와서
     #    - 현재 아이템(item.id)의 기존 확률 합
     #    - 다른 아이템들의 확률 합을 분리해서 계산
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             "SELECT id, item_id, chance FROM fishing_loot WHERE guild_id = ?",
@@ -2550,10 +2600,7 @@ async def slash_set_fishing_chance(
 
     # 4) 이 아이템에 대한 예전 레코드는 전부 삭제 → 중복 제거
     if ids_to_delete_for_this_item:
-        async with aiosqlite.connect(DB_PATH) as db:
-            for fid in ids_to_delete_for_this_item:
-                await db.execute("DELETE FROM fishing_loot WHERE id = ?", (fid,))
-            await db.commit()
+        await delete_fishing_loot(inter.guild.id, item["id"])
 
     # 5) 깔끔하게 1줄만 다시 넣기
     await upsert_fishing_loot(inter.guild.id, item["id"], chance)
@@ -2627,12 +2674,7 @@ async def slash_reset_fishing_chance(inter: discord.Interaction):
     if not await ensure_channel_inter(inter, "admin"):
         return
 
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            "DELETE FROM fishing_loot WHERE guild_id = ?",
-            (inter.guild.id,),
-        )
-        await db.commit()
+    await delete_fishing_loot(inter.guild.id)
 
     await send_reply(
         inter,
@@ -2643,17 +2685,49 @@ async def slash_reset_fishing_chance(inter: discord.Interaction):
 
 
 @bot.tree.command(
-    name="낚시",
-    description="낚시를 해서 아이템을 획득할 수 있습니다. (낚시 채널 전용)",
+    name="낚시횟수설정",
+    description="하루에 낚시할 수 있는 횟수를 설정합니다. (관리자)",
 )
-async def slash_fishing(inter: discord.Interaction):
-    if not await ensure_channel_inter(inter, "fish"):
+@app_commands.checks.has_permissions(manage_guild=True)
+@app_commands.describe(
+    limit="유저 1명당 하루 낚시 가능 횟수 (1~100)",
+)
+async def slash_set_fishing_limit(inter: discord.Interaction, limit: int):
+    if not await ensure_channel_inter(inter, "admin"):
         return
 
-    # 1) 낚시 가능한 아이템 목록 확인
-    loot = await get_fishing_loot(inter.guild.id)
-    if not loot:
-        await send_reply(
+    if not 1 <= limit <= 100:
+        await send_reply(inter, "낚시 횟수는 1~100 사이로 설정해 주세요.", ephemeral=True)
+        return
+
+    await set_fishing_daily_limit(inter.guild.id, limit)
+    await send_reply(
+        inter,
+        f"✅ 이제 하루에 **{limit}번** 낚시할 수 있습니다. (오늘 사용한 횟수는 그대로 유지)",
+        ephemeral=True,
+    )
+
+
+@bot.tree.command(
+    name="낚시",
+    description="낚시를 해서 아이템을 획득할 수 있습니다. (낚시 채널 전용)",
+)
+@app_commands.describe(
+    count="한 번에 던질 횟수 (비워두면 1번, 남은 횟수보다 크면 남은 횟수 전부)",
+)
+async def slash_fishing(inter: discord.Interaction, count: int | None = None):
+    if not await ensure_channel_inter(inter, "fish"):
+        return
+
+    casts = 1 if count is None else count
+    if casts < 1:
+        await send_reply(inter, "낚시 횟수는 1 이상이어야 해요.", ephemeral=True)
+        return
+
+    # 1) 낚시 가능한 아이템 목록 확인 (컴파일된 확률표, 메모리 캐시)
+    loot_table = await get_loot_table(inter.guild.id)
+    if not loot_table:
+        await send_reply(
             inter,
             "아직 낚시로 얻을 수 있는 아이템이 설정되지 않았어요.\n"
             "관리자가 `/낚시아이템추가`, `/낚시확률`로 먼저 설정해야 합니다.",
@@ -2662,104 +2736,77 @@ async def slash_fishing(inter: discord.Interaction):
         return
 
     # 2) 유저 정보 + 한국 시간(KST) 기준 오늘 날짜
-    user = await get_or_create_user(inter.guild.id, inter.user.id)
+    db_user_id = await get_user_id(inter.guild.id, inter.user.id)
 
-    MAX_FISH_PER_DAY = 3
+    config = await get_guild_config(inter.guild.id)
+    max_per_day = config.fishing_daily_limit
     today_str = get_today_kst_str()
 
-    # 3) 오늘 낚시 횟수 확인
-    current_count = await get_fishing_daily_count(inter.guild.id, user["id"], today_str)
+    # 3) 남은 횟수 안에서 한 번에 처리 (횟수 소모 + 아이템 지급을 한 트랜잭션으로)
+    #    성공/실패 상관없이 던진 만큼 카운트, 제한 체크는 DB 조건부 upsert 가 담당
+    result = await cast_fishing(
+        inter.guild.id, db_user_id, today_str, loot_table, casts, max_per_day
+    )
 
-    if current_count >= MAX_FISH_PER_DAY:
+    if result.casts == 0:
         await send_reply(
             inter,
-            f"🎣 오늘은 이미 **{MAX_FISH_PER_DAY}번** 낚시를 했어요!\n"
+            f"🎣 오늘은 이미 **{max_per_day}번** 낚시를 했어요!\n"
             f"내일 다시 낚시해 주세요 😊",
             ephemeral=True,
         )
         return
 
-    # 4) 여기서 1회 소모 처리 (성공/실패 상관없이 시도만 하면 카운트)
-    new_count = await increment_fishing_daily_count(inter.guild.id, user["id"], today_str)
-
-
-    # 5) 전체 아이템 확률 합 계산
-    total = 0.0
-    for row in loot:
-        total += float(row["chance"])
-    total = min(total, 100.0)  # 혹시 100 조금 넘는 오차 방어
-
-    # 6) 0 ~ 100 구간에서 랜덤
-    roll = random.random() * 100.0
-
-    # 7) 누적 확률로 어떤 아이템이 당첨되는지 결정
-    current = 0.0
-    chosen = None
-    for row in loot:
-        c = float(row["chance"])
-        if c <= 0:
-            continue
-        if current <= roll < current + c:
-            chosen = row
-            break
-        current += c
-
-    if chosen is None or roll >= total:
-        # 꽝
-        embed = discord.Embed(
-            title="낚시 결과 : 꽝... 🎣",
-            description=(
-                f"오늘 사용한 낚시 횟수: {new_count}/{MAX_FISH_PER_DAY}"
-            ),
-            color=discord.Color.dark_grey(),
-        )
+    if result.casts == 1:
+        chosen = result.catches[0]
+        if chosen is None:
+            # 꽝
+            embed = discord.Embed(
+                title="낚시 결과 : 꽝... 🎣",
+                description=(
+                    f"오늘 사용한 낚시 횟수: {result.count}/{max_per_day}"
+                ),
+                color=discord.Color.dark_grey(),
+            )
+        else:
+            embed = discord.Embed(
+                title="낚시 결과! 🎣",
+                description=(
+                    f"획득 아이템: **{chosen['item_name']}**\n"
+                    f"오늘 사용한 낚시 횟수: {result.count}/{max_per_day}\n"
+                    f"획득한 아이템은 인벤토리에 저장되었습니다. `/인벤토리` 로 확인해보세요."
+                ),
+                color=discord.Color.blue(),
+            )
 
-        await send_reply(
-            inter,
-            embed=embed,
-            ephemeral=False,
-        )
+        await send_reply(inter, embed=embed, ephemeral=False)
         return
 
+    # 4) 여러 번 던졌으면 결과를 임베드 하나로 요약
+    caught: dict[str, int] = {}
+    for c in result.caught:
+        caught[c["item_name"]] = caught.get(c["item_name"], 0) + 1
+    miss_count = result.casts - len(result.caught)
 
-
-    # 8) 당첨 아이템 인벤토리에 +1
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            "SELECT id, quantity FROM inventories WHERE user_id = ? AND item_id = ?",
-            (user["id"], chosen["item_id"]),
-        )
-        row = await cursor.fetchone()
-        await cursor.close()
-
-        if row:
-            inv_id, qty = row
-            await db.execute(
-                "UPDATE inventories SET quantity = ? WHERE id = ?",
-                (qty + 1, inv_id),
-            )
-        else:
-            await db.execute(
-                "INSERT INTO inventories (user_id, item_id, quantity) VALUES (?, ?, ?)",
-                (user["id"], chosen["item_id"], 1),
-            )
-        await db.commit()
+    lines = [f"- **{name}** x {qty}개" for name, qty in caught.items()]
+    if miss_count:
+        lines.append(f"- 꽝 x {miss_count}번")
 
     embed = discord.Embed(
-        title="낚시 결과! 🎣",
+        title=f"낚시 결과! 🎣 ({result.casts}번 던짐)",
         description=(
-            f"획득 아이템: **{chosen['item_name']}**\n"
-            f"오늘 사용한 낚시 횟수: {new_count}/{MAX_FISH_PER_DAY}\n"
-            f"획득한 아이템은 인벤토리에 저장되었습니다. `/인벤토리` 로 확인해보세요."
+            "\n".join(lines)
+            + f"\n\n오늘 사용한 낚시 횟수: {result.count}/{max_per_day}"
+            + (
+                "\n획득한 아이템은 인벤토리에 저장되었습니다. `/인벤토리` 로 확인해보세요."
+                if caught
+                else ""
+            )
         ),
-        color=discord.Color.blue(),
+        color=discord.Color.blue() if caught else discord.Color.dark_grey(),
     )
 
-    await send_reply(
-        inter,
-        embed=embed,
-        ephemeral=False,
-    )
+    await send_reply(inter, embed=embed, ephemeral=False)
 
 @bot.tree.command(
     name="인벤초기화",
@@ -2783,14 +2830,15 @@ async def slash_clear_inventory(
     #     return
 
     # 내부 users.id 가져오기
-    user = await get_or_create_user(inter.guild.id, member.id)
+    db_user_id = await get_user_id(inter.guild.id, member.id)
 
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             "DELETE FROM inventories WHERE user_id = ?",
-            (user["id"],),
+            (db_user_id,),
         )
         await db.commit()
+    held_items.put(db_user_id, ())
 
     await send_reply(
         inter,
@@ -2861,7 +2909,7 @@ async def slash_delete_pet(inter: discord.Interaction, name: str):
 
     guild_id = inter.guild.id
 
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         cursor = await db.execute(
             "SELECT id FROM pets WHERE guild_id = ? AND name = ?",
             (guild_id, name)
@@ -2894,9 +2942,9 @@ async def slash_manage_pets(inter: discord.Interaction):
     guild_id = inter.guild.id
 
     # 이 명령어는 '상점 채널' 또는 '관리자용 봇채널'에서만 사용 가능
-    settings = await get_or_create_guild_settings(guild_id)
-    shop_channel_id = settings["shop_channel_id"]
-    admin_channel_id = await get_admin_channel_id(guild_id)
+    config = await get_guild_config(guild_id)
+    shop_channel_id = config.shop_channel_id
+    admin_channel_id = config.admin_channel_id
 
     if shop_channel_id is None and admin_channel_id is None:
         await send_reply(
@@ -2919,7 +2967,7 @@ async def slash_manage_pets(inter: discord.Interaction):
         return
 
     # guild별 등록된 펫 목록 가져오기
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             """
@@ -2988,8 +3036,8 @@ async def slash_settle(
         )
         return
 
-    user = await get_or_create_user(inter.guild.id, member.id)
-    new_balance = await change_balance(user["id"], cur["id"], amount)
+    db_user_id = await get_user_id(inter.guild.id, member.id)
+    new_balance = await apply_balance_delta(db_user_id, cur["id"], amount)
 
     sign = "지급" if amount > 0 else "차감"
     await send_reply(
@@ -3001,6 +3049,232 @@ async def slash_settle(
         f"- 정산 후 소지금: {new_balance} {cur['name']}",
         ephemeral=False,
     )
+# ---------------------------------------------------------
+# 단체 정산 / 선물 (역할 또는 여러 명)
+# ---------------------------------------------------------
+
+# 멘션(<@123>, <@!123>) 또는 그냥 숫자 ID
+MEMBER_ID_RE = re.compile(r"\d{15,20}")
+
+# 결과 요약에 이름을 몇 명까지 적을지
+BULK_SUMMARY_LINES = 20
+
+
+def resolve_recipients(
+    inter: discord.Interaction,
+    role: discord.Role | None,
+    members: str | None,
+    *,
+    exclude: int | None = None,
+) -> list[discord.Member]:
+    """역할 멤버 + 멘션/ID 목록을 한 번에 모은다. 봇과 exclude 는 뺀다. (중복 제거)"""
+    found: dict[int, discord.Member] = {}
+    if role is not None:
+        for m in role.members:
+            found[m.id] = m
+    if members:
+        for match in MEMBER_ID_RE.finditer(members):
+            m = inter.guild.get_member(int(match.group()))
+            if m is not None:
+                found[m.id] = m
+    return [m for m in found.values() if not m.bot and m.id != exclude]
+
+
+def format_bulk_summary(recipients: list[discord.Member], result: BulkResult, unit: str) -> str:
+    lines = [
+        f"- {m.mention}: {result.balances.get(m.id, 0)}{unit}"
+        for m in recipients[:BULK_SUMMARY_LINES]
+    ]
+    if len(recipients) > BULK_SUMMARY_LINES:
+        lines.append(f"… 외 {len(recipients) - BULK_SUMMARY_LINES}명")
+    return "\n".join(lines)
+
+
+async def reply_no_recipients(inter: discord.Interaction):
+    await send_reply(
+        inter,
+        "대상이 없습니다. `role` 에 역할을 고르거나 `members` 에 멘션/ID 를 적어 주세요. (봇은 제외)",
+        ephemeral=True,
+    )
+
+
+@bot.tree.command(name="단체정산", description="역할 또는 여러 유저의 재화를 한 번에 증감합니다. (관리자)")
+@app_commands.checks.has_permissions(manage_guild=True)
+@app_commands.describe(
+    amount="한 명당 지급(+) 또는 차감(-)할 양 (0은 불가)",
+    currency_identifier="재화 코드 또는 이름 (예: coin, 여우코인)",
+    role="이 역할을 가진 모든 유저",
+    members="대상 유저 멘션 또는 ID 여러 개 (띄어쓰기로 구분)",
+)
+async def slash_settle_bulk(
+    inter: discord.Interaction,
+    amount: int,
+    currency_identifier: str,
+    role: discord.Role | None = None,
+    members: str | None = None,
+):
+    if not is_guild_inter(inter):
+        await send_reply(inter, "서버 안에서만 사용할 수 있어요.", ephemeral=True)
+        return
+
+    if amount == 0:
+        await send_reply(inter, "0은 정산할 수 없어요. 양수 또는 음수 금액을 입력해주세요.", ephemeral=True)
+        return
+
+    cur = await get_currency_by_identifier(inter.guild.id, currency_identifier)
+    if not cur:
+        await send_reply(
+            inter,
+            f"`{currency_identifier}` 에 해당하는 재화를 찾을 수 없습니다. `/재화`로 확인해보세요.",
+            ephemeral=True,
+        )
+        return
+
+    recipients = resolve_recipients(inter, role, members)
+    if not recipients:
+        await reply_no_recipients(inter)
+        return
+
+    await inter.response.defer(thinking=True)
+    result = await bulk_apply_balance_delta(
+        inter.guild.id, [m.id for m in recipients], cur["id"], amount
+    )
+
+    sign = "지급" if amount > 0 else "차감"
+    embed = discord.Embed(
+        title=f"✅ 단체 정산 완료 ({sign})",
+        description=(
+            f"- 대상: {len(recipients)}명\n"
+            f"- 재화: {cur['name']} (`{cur['code']}`)\n"
+            f"- 한 명당 변화량: {amount}\n\n"
+            f"**정산 후 소지금**\n"
+            + format_bulk_summary(recipients, result, f" {cur['name']}")
+        ),
+        color=discord.Color.green(),
+    )
+    await send_reply(inter, embed=embed, ephemeral=False)
+
+
+@bot.tree.command(name="단체아이템정산", description="역할 또는 여러 유저에게 아이템을 한 번에 지급합니다. (관리자)")
+@app_commands.checks.has_permissions(manage_guild=True)
+@app_commands.describe(
+    item_name="아이템 이름 (items 기준 이름)",
+    quantity="한 명당 지급할 개수 (양수)",
+    role="이 역할을 가진 모든 유저",
+    members="대상 유저 멘션 또는 ID 여러 개 (띄어쓰기로 구분)",
+)
+@app_commands.autocomplete(item_name=autocomplete_any_item)
+async def slash_settle_item_bulk(
+    inter: discord.Interaction,
+    item_name: str,
+    quantity: int,
+    role: discord.Role | None = None,
+    members: str | None = None,
+):
+    if not is_guild_inter(inter):
+        await send_reply(inter, "서버 안에서만 사용할 수 있어요.", ephemeral=True)
+        return
+
+    if quantity <= 0:
+        await send_reply(inter, "지급할 개수는 1 이상이어야 합니다. (회수는 `/정산아이템`)", ephemeral=True)
+        return
+
+    name = item_name.strip()
+    item = await get_item_by_name_any(inter.guild.id, name)
+    if not item:
+        await reply_item_not_found(
+            inter,
+            f"`{name}` 이름의 아이템을 찾을 수 없습니다.",
+            name,
+        )
+        return
+
+    recipients = resolve_recipients(inter, role, members)
+    if not recipients:
+        await reply_no_recipients(inter)
+        return
+
+    await inter.response.defer(thinking=True)
+    result = await bulk_grant_item(inter.guild.id, [m.id for m in recipients], item["id"], quantity)
+
+    embed = discord.Embed(
+        title="✅ 단체 아이템 지급 완료",
+        description=(
+            f"- 대상: {len(recipients)}명\n"
+            f"- 아이템: **{item['name']}**\n"
+            f"- 한 명당 지급: {quantity}개\n\n"
+            f"**지급 후 보유 개수**\n"
+            + format_bulk_summary(recipients, result, "개")
+        ),
+        color=discord.Color.green(),
+    )
+    await send_reply(inter, embed=embed, ephemeral=False)
+
+
+@bot.tree.command(name="단체선물", description="자신의 재화를 역할 또는 여러 유저에게 똑같이 나눠 선물합니다.")
+@app_commands.describe(
+    amount="한 명당 선물할 양 (양수)",
+    currency_identifier="재화 코드 또는 이름 (예: coin, 여우코인)",
+    role="이 역할을 가진 모든 유저",
+    members="받을 유저 멘션 또는 ID 여러 개 (띄어쓰기로 구분)",
+)
+async def slash_gift_currency_bulk(
+    inter: discord.Interaction,
+    amount: int,
+    currency_identifier: str,
+    role: discord.Role | None = None,
+    members: str | None = None,
+):
+    if not await ensure_channel_inter(inter, "trade"):
+        return
+
+    if amount <= 0:
+        await send_reply(inter, "선물할 양은 1 이상이어야 합니다.", ephemeral=True)
+        return
+
+    cur = await get_currency_by_identifier(inter.guild.id, currency_identifier)
+    if not cur:
+        await send_reply(
+            inter,
+            f"`{currency_identifier}` 에 해당하는 재화를 찾을 수 없습니다. `/재화`로 확인해보세요.",
+            ephemeral=True,
+        )
+        return
+
+    recipients = resolve_recipients(inter, role, members, exclude=inter.user.id)
+    if not recipients:
+        await reply_no_recipients(inter)
+        return
+
+    giver_id = await get_user_id(inter.guild.id, inter.user.id)
+    result = await bulk_transfer_currency(
+        inter.guild.id, giver_id, [m.id for m in recipients], cur["id"], amount
+    )
+    if not result.ok:
+        await send_reply(
+            inter,
+            f"재화가 부족해서 선물할 수 없어요.\n"
+            f"- 보유: {result.sender} {cur['name']} (`{cur['code']}`)\n"
+            f"- 필요: {amount} × {len(recipients)}명 = {amount * len(recipients)}",
+            ephemeral=True,
+        )
+        return
+
+    embed = discord.Embed(
+        title="🎁 단체 선물 완료!",
+        description=(
+            f"{inter.user.mention} 님이 {len(recipients)}명에게 재화를 선물했습니다.\n\n"
+            f"💰 재화: **{cur['name']}** (`{cur['code']}`)\n"
+            f"📤 한 명당: **{amount}** (총 {amount * len(recipients)})\n"
+            f"👛 남은 소지금: **{result.sender} {cur['name']}**\n\n"
+            f"**받은 사람 선물 후 소지금**\n"
+            + format_bulk_summary(recipients, result, f" {cur['name']}")
+        ),
+        color=discord.Color.gold(),
+    )
+    await send_reply(inter, embed=embed, ephemeral=False)
+
+
 @bot.tree.command(
     name="전체정산",
     description="이 서버의 모든 유저에게 재화를 일괄 지급/차감합니다. (관리자)",
@@ -3037,17 +3311,8 @@ async def slash_settle_all(
         )
         return
 
-    # 이 길드에 등록된 모든 유저 (users 테이블 기준)
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute(
-            "SELECT id, user_id FROM users WHERE guild_id = ?",
-            (inter.guild.id,),
-        )
-        rows = await cursor.fetchall()
-        await cursor.close()
-
-    if not rows:
+    # 안내는 관리자에게만 보여야 하므로 (공개) defer 하기 전에 확인
+    if not await has_guild_users(inter.guild.id):
         await send_reply(
             inter,
             "아직 이 서버에 등록된 유저가 없습니다. (출석/명령어 사용 이력이 없는 상태일 수 있어요.)",
@@ -3055,22 +3320,22 @@ async def slash_settle_all(
         )
         return
 
-    # 한 명씩 change_balance 호출해서 지급/차감
-    affected = 0
-    for row in rows:
-        db_user_id = row["id"]
-        await change_balance(db_user_id, cur["id"], amount)
-        affected += 1
+    # 전원 반영은 SQL 한 문장이지만 큰 서버면 3초를 넘길 수 있으니 먼저 defer
+    await inter.response.defer(thinking=True)
+    result = await settle_all(inter.guild.id, cur["id"], amount)
 
     sign = "지급" if amount > 0 else "차감"
-    total = amount * affected
+    clamped_text = (
+        f"\n- 잔액이 모자라 0 에서 멈춘 유저: {result['clamped']}명" if result["clamped"] else ""
+    )
 
     await send_reply(
         inter,
         f"✅ 전체 정산 완료 ({sign})\n"
-        f"- 대상 유저 수: {affected}명\n"
+        f"- 대상 유저 수: {result['affected']}명\n"
         f"- 1인당 변화량: {amount} {cur['name']} (`{cur['code']}`)\n"
-        f"- 총 변화량(합계): {total} {cur['name']}",
+        f"- 총 변화량(합계): {result['net']} {cur['name']}"
+        f"{clamped_text}",
         ephemeral=False,
     )
 
@@ -3084,6 +3349,7 @@ async def slash_settle_all(
     item_name="아이템 이름 (items 기준 이름)",
     quantity="지급(+), 회수(-)할 개수 (0 제외)",
 )
+@app_commands.autocomplete(item_name=autocomplete_any_item)
 async def slash_settle_item(
     inter: discord.Interaction,
     member: discord.Member,
@@ -3102,74 +3368,35 @@ async def slash_settle_item(
     name = item_name.strip()
     item = await get_item_by_name_any(inter.guild.id, name)
     if not item:
-        await send_reply(
+        await reply_item_not_found(
             inter,
             f"`{name}` 이름의 아이템을 찾을 수 없습니다.\n"
             "`/아이템추가`, `/이벤트아이템추가`, `/낚시아이템추가` 등으로 먼저 아이템을 만들어 주세요.",
-            ephemeral=True,
+            name,
         )
         return
 
-    user = await get_or_create_user(inter.guild.id, member.id)
-
-    async with aiosqlite.connect(DB_PATH) as db:
-        # 현재 인벤토리 보유량 확인
-        cursor = await db.execute(
-            "SELECT id, quantity FROM inventories WHERE user_id = ? AND item_id = ?",
-            (user["id"], item["id"]),
-        )
-        row = await cursor.fetchone()
-        await cursor.close()
+    db_user_id = await get_user_id(inter.guild.id, member.id)
 
-        if quantity > 0:
-            # 지급
-            if row:
-                inv_id, have_qty = row
-                await db.execute(
-                    "UPDATE inventories SET quantity = ? WHERE id = ?",
-                    (have_qty + quantity, inv_id),
-                )
-            else:
-                await db.execute(
-                    "INSERT INTO inventories (user_id, item_id, quantity) VALUES (?, ?, ?)",
-                    (user["id"], item["id"], quantity),
-                )
+    new_qty = await apply_inventory_delta(db_user_id, item["id"], quantity)
+    if new_qty is None:
+        # 회수 (quantity < 0) 인데 보유량이 모자람
+        have_qty = await get_item_quantity(db_user_id, item["id"])
+        if have_qty == 0:
+            await send_reply(
+                inter,
+                f"{member.display_name} 님 인벤토리에 `{item['name']}` 이(가) 없습니다. 회수할 수 없어요.",
+                ephemeral=True,
+            )
         else:
-            # 회수 (quantity < 0)
-            if not row:
-                await send_reply(
-                    inter,
-                    f"{member.display_name} 님 인벤토리에 `{item['name']}` 이(가) 없습니다. 회수할 수 없어요.",
-                    ephemeral=True,
-                )
-                return
-
-            inv_id, have_qty = row
-            need = -quantity  # 회수하려는 개수
-
-            if have_qty < need:
-                await send_reply(
-                    inter,
-                    f"회수하려는 개수가 보유량보다 많아요.\n"
-                    f"- 보유: {have_qty}개\n"
-                    f"- 회수 시도: {need}개",
-                    ephemeral=True,
-                )
-                return
-
-            new_qty = have_qty - need
-            if new_qty > 0:
-                await db.execute(
-                    "UPDATE inventories SET quantity = ? WHERE id = ?",
-                    (new_qty, inv_id),
-                )
-            else:
-                await db.execute(
-                    "DELETE FROM inventories WHERE id = ?",
-                    (inv_id,),
-                )
-
-        await db.commit()
+            await send_reply(
+                inter,
+                f"회수하려는 개수가 보유량보다 많아요.\n"
+                f"- 보유: {have_qty}개\n"
+                f"- 회수 시도: {-quantity}개",
+                ephemeral=True,
+            )
+        return
 
     action = "지급" if quantity > 0 else "회수"
     abs_q = abs(quantity)
@@ -3190,16 +3417,15 @@ async def slash_check_user(inter: discord.Interaction, member: discord.Member):
     if not await ensure_channel_inter(inter, "admin"):
         return
 
-    user = await get_or_create_user(inter.guild.id, member.id)
+    db_user_id = await get_user_id(inter.guild.id, member.id)
 
-    currencies = await list_currencies(inter.guild.id)
+    profile = await get_profile(db_user_id, inter.guild.id)
     balance_lines = []
-    for cur in currencies:
-        amount = await get_balance(user["id"], cur["id"])
-        balance_lines.append(f"- {cur['name']} (`{cur['code']}`): {amount}")
+    for cur in profile["wallet"]:
+        balance_lines.append(f"- {cur['name']} (`{cur['code']}`): {cur['amount']}")
     balance_text = "\n".join(balance_lines) if balance_lines else "재화 정보 없음"
 
-    inv = await get_inventory(user["id"])
+    inv = profile["inventory"]
     if inv:
         inv_lines = []
         for item in inv:
@@ -3218,23 +3444,446 @@ async def slash_check_user(inter: discord.Interaction, member: discord.Member):
         f"🎒 인벤토리:\n{inv_text}",
         ephemeral=True,
     )
+
 # =========================================================
-# 아이템 관리용 View / Select / Modal
+# 9-1. 경제 데이터 가져오기 / 내보내기 (관리자용 봇채널)
+# =========================================================
+
+# 진행 상황 메시지 수정 간격 (초). 청크마다 고치면 디스코드 rate limit 에 걸린다
+ECONOMY_PROGRESS_INTERVAL = 2.0
+
+
+class ProgressReporter:
+    """
+    import/export 의 progress 콜백.
+    가져오기는 쓰기 트랜잭션 안에서 불리므로 기다리지 않고 메시지 수정만 태스크로 넘긴다.
+    태스크는 끝날 때까지 들고 있다가, 결과를 보내기 전에 finish() 로 정리한다.
+    """
+
+    def __init__(self, inter: discord.Interaction, label: str):
+        self.inter = inter
+        self.label = label
+        self.last = 0.0
+        self.tasks: set[asyncio.Task] = set()
+
+    def __call__(self, counts: dict[str, int]):
+        now = time.monotonic()
+        if now - self.last < ECONOMY_PROGRESS_INTERVAL:
+            return
+        self.last = now
+        task = asyncio.create_task(self._edit(f"⏳ {self.label} 중… {format_counts(counts)}"))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _edit(self, text: str):
+        try:
+            await self.inter.edit_original_response(content=text)
+        except discord.HTTPException:
+            pass
+
+    async def finish(self):
+        """진행 중인 수정이 결과 메시지보다 늦게 도착하지 않도록 기다린다."""
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+@bot.tree.command(
+    name="경제내보내기",
+    description="재화/아이템/낚시 확률/펫(+잔액)을 파일로 내보냅니다. (관리자)",
+)
+@app_commands.checks.has_permissions(manage_guild=True)
+@app_commands.describe(
+    include_balances="유저 잔액도 같이 내보낼지 (기본: 설정만)",
+    as_csv="CSV 로 받기 (기본: JSON lines)",
+)
+async def slash_export_economy(
+    inter: discord.Interaction,
+    include_balances: bool = False,
+    as_csv: bool = False,
+):
+    if not await ensure_channel_inter(inter, "admin"):
+        return
+
+    if not is_guild_inter(inter):
+        await send_reply(inter, "서버 안에서만 사용할 수 있어요.", ephemeral=True)
+        return
+
+    await inter.response.defer(thinking=True, ephemeral=True)
+
+    fmt = "csv" if as_csv else "jsonl"
+    kinds = None if include_balances else ["currency", "item", "loot", "pet"]
+    # 큰 길드도 메모리에 다 올리지 않도록 임시 파일에 흘려 쓴 뒤 첨부
+    progress = ProgressReporter(inter, "내보내기")
+    with tempfile.TemporaryFile() as fp:
+        counts = await export_to(fp, inter.guild.id, fmt, kinds, progress)
+        await progress.finish()
+        fp.seek(0)
+        await send_reply(
+            inter,
+            f"✅ 내보내기 완료: {format_counts(counts) or '내보낼 데이터가 없습니다.'}\n"
+            "`/경제가져오기` 로 다른 서버나 새 시즌에 그대로 가져올 수 있어요.",
+            file=discord.File(fp, filename=f"economy_{inter.guild.id}.{fmt}"),
+            ephemeral=True,
+        )
+
+
+@bot.tree.command(
+    name="경제가져오기",
+    description="내보낸 파일(JSON lines / CSV)로 재화/아이템/낚시 확률/펫/잔액을 한 번에 등록합니다. (관리자)",
+)
+@app_commands.checks.has_permissions(manage_guild=True)
+@app_commands.describe(
+    file="/경제내보내기 형식의 .jsonl 또는 .csv 파일",
+    check_only="검증만 하고 실제로 쓰지는 않기",
+)
+async def slash_import_economy(
+    inter: discord.Interaction,
+    file: discord.Attachment,
+    check_only: bool = False,
+):
+    if not await ensure_channel_inter(inter, "admin"):
+        return
+
+    if not is_guild_inter(inter):
+        await send_reply(inter, "서버 안에서만 사용할 수 있어요.", ephemeral=True)
+        return
+
+    await inter.response.defer(thinking=True, ephemeral=True)
+
+    try:
+        text = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        await send_reply(inter, "파일을 UTF-8 로 읽을 수 없어요. UTF-8 로 저장해서 다시 올려 주세요.", ephemeral=True)
+        return
+
+    fmt = detect_format(file.filename)
+    progress = ProgressReporter(inter, "가져오기")
+    result = await import_guild_economy(
+        inter.guild.id,
+        lambda: text_records(text, fmt),
+        check_only=check_only,
+        progress=progress,
+    )
+    await progress.finish()
+
+    if result.status == "invalid":
+        await send_reply(
+            inter,
+            "❌ 검증에 실패해서 아무것도 바꾸지 않았습니다.\n"
+            + "\n".join(f"- {err}" for err in result.errors)[:1800],
+            ephemeral=True,
+        )
+        return
+
+    title = "✅ 검증 통과 (아직 반영 안 됨)" if result.status == "checked" else "✅ 가져오기 완료"
+    await send_reply(
+        inter,
+        f"{title}: {format_counts(result.counts) or '가져올 레코드가 없습니다.'}",
+        ephemeral=True,
+    )
+
+
 # =========================================================
+# 9-2. DB 상태 (관리자용 봇채널)
+# =========================================================
+
+@bot.tree.command(
+    name="db상태",
+    description="쓰기 큐 / 커넥션 풀 / 유저 id 캐시 상태를 봅니다. (관리자)",
+)
+@app_commands.checks.has_permissions(manage_guild=True)
+async def slash_db_stats(inter: discord.Interaction):
+    if not await ensure_channel_inter(inter, "admin"):
+        return
+
+    q = write_queue.stats()
+    p = pool.stats()
+    c = identity_cache.stats()
 
-class ItemManageView(discord.ui.View):
-    def __init__(self, items, manager_id: int, *, timeout: float = 180):
+    embed = discord.Embed(title="🗄️ DB 상태", color=discord.Color.blurple())
+    embed.add_field(
+        name="쓰기 큐",
+        value=(
+            f"- 대기 중: {q['depth']}개\n"
+            f"- 배치: {q['batches']:,}번 / 작업 {q['jobs']:,}개\n"
+            f"- 배치 크기: 최근 {q['last_batch_size']} · 평균 {q['avg_batch_size']:.1f} · 최대 {q['max_batch_size']}\n"
+            f"- 커밋 지연: 최근 {q['last_commit_ms']:.1f}ms · 평균 {q['avg_commit_ms']:.1f}ms · 최대 {q['max_commit_ms']:.1f}ms"
+        ),
+        inline=False,
+    )
+    embed.add_field(
+        name="커넥션 풀",
+        value=(
+            f"- 열린 커넥션: {p['size']}개 (놀고 있음 {p['idle']}개)\n"
+            f"- 바로 빌림 {p['hits']:,} · 새로 염 {p['misses']:,} · 대기 {p['waits']:,} "
+            f"(적중률 {p['hit_rate']:.1%})"
+        ),
+        inline=False,
+    )
+    embed.add_field(
+        name="유저 id 캐시",
+        value=(
+            f"- {c['size']:,} / {c['max_size']:,}개\n"
+            f"- 적중 {c['hits']:,} · 실패 {c['misses']:,} (적중률 {c['hit_rate']:.1%})"
+        ),
+        inline=False,
+    )
+    await send_reply(inter, embed=embed, ephemeral=True)
+
+
+# =========================================================
+# 상점 페이지 View (키셋 페이지: /상점, /이벤트상점, /선택구매, /아이템관리)
+# =========================================================
+
+SHOP_CATEGORY_LABELS = {
+    "all": "전체",
+    "normal": "일반 (메인 재화)",
+    "event": "이벤트 (이벤트 재화)",
+}
+
+
+class ShopPageView(discord.ui.View):
+    """
+    상점 목록을 한 페이지(SHOP_PAGE_SIZE 개)씩만 들고 있는 뷰.
+    - 첫 페이지는 캐시된 상점 카탈로그에서 바로 꺼낸다.
+    - 다음/이전 페이지는 지금 페이지의 마지막/첫 id 를 기준으로 키셋 조회(get_shop_page).
+    - '이동' 버튼은 페이지 번호를 받아 그 페이지로 바로 간다.
+    이전/다음은 끝에서 반대쪽 끝으로 돌아간다.
+    """
+
+    in_stock = False  # True 면 재고 0 인 아이템은 빼고 보여준다
+
+    def __init__(self, guild_id: int, owner_id: int, *, category: str = "all", timeout: float = 300):
         super().__init__(timeout=timeout)
-        self.items = items          # [{id, name, price, stock, description, currency_name, currency_code}, ...]
-        self.manager_id = manager_id
+        self.guild_id = guild_id
+        self.owner_id = owner_id
+        self.category = category
+        self.items: list[dict] = []   # 지금 페이지 아이템만
         self.page = 0
-        self.page_size = 10
-        self.total_pages = max(1, (len(items) + self.page_size - 1) // self.page_size)
-        self.message: discord.Message | None = None  # 리스트 메시지 저장
+        self.total = 0
+        self.message: discord.Message | None = None
+        self.first_embed: discord.Embed | None = None
+
+        self.category_select = ShopCategorySelect(category)
+        self.prev_button = ShopPrevButton()
+        self.jump_button = ShopJumpButton()
+        self.next_button = ShopNextButton()
+        self.add_item(self.category_select)
+        self.add_item(self.prev_button)
+        self.add_item(self.jump_button)
+        self.add_item(self.next_button)
+
+    @property
+    def total_pages(self) -> int:
+        return max(1, (self.total + SHOP_PAGE_SIZE - 1) // SHOP_PAGE_SIZE)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message(
+                "이 메뉴를 연 사용자만 사용할 수 있어요!", ephemeral=True
+            )
+            return False
+        return True
+
+    # ───────── 페이지 읽기 ─────────
+
+    async def open(self):
+        """첫 페이지 (카탈로그 캐시에서)."""
+        catalog = await get_shop_catalog(self.guild_id)
+        rows = SHOP_EMBEDS[self.category][2](catalog)
+        if self.in_stock:
+            rows = [r for r in rows if r["stock"] is None or r["stock"] > 0]
+
+        self.total = len(rows)
+        self.page = 0
+        # 뷰가 재고 표시를 직접 고치므로 캐시와 분리된 복사본을 들고 있는다
+        self.items = [dict(r) for r in rows[:SHOP_PAGE_SIZE]]
+        self.first_embed = None
+        if not self.in_stock and self.total:
+            self.first_embed = await get_shop_embed(self.guild_id, self.category)
+        self.on_page_loaded()
+
+    async def go_next(self):
+        if not self.items or self.page + 1 >= self.total_pages:
+            await self.open()
+            return
+        rows = await get_shop_page(
+            self.guild_id,
+            category=self.category,
+            after_id=self.items[-1]["id"],
+            in_stock=self.in_stock,
+        )
+        if not rows:
+            # 그 사이 아이템이 지워져서 뒤 페이지가 없어짐 → 처음으로
+            await self.open()
+            return
+        self.page += 1
+        self.items = rows
+        self.on_page_loaded()
+
+    async def go_prev(self):
+        if not self.items or self.page == 0:
+            await self.go_to(self.total_pages - 1)
+            return
+        rows = await get_shop_page(
+            self.guild_id,
+            category=self.category,
+            before_id=self.items[0]["id"],
+            in_stock=self.in_stock,
+        )
+        if not rows:
+            await self.open()
+            return
+        self.page -= 1
+        self.items = rows
+        self.on_page_loaded()
+
+    async def go_to(self, page: int):
+        """페이지 번호(0부터)로 바로 이동. 개수도 다시 센다."""
+        self.total = await count_shop_items(
+            self.guild_id, category=self.category, in_stock=self.in_stock
+        )
+        page = min(max(0, page), self.total_pages - 1)
+        if page == 0:
+            await self.open()
+            return
+        self.page = page
+        self.items = await get_shop_page(
+            self.guild_id,
+            category=self.category,
+            page=page,
+            in_stock=self.in_stock,
+        )
+        self.on_page_loaded()
+
+    def on_page_loaded(self):
+        """페이지가 바뀐 뒤 버튼/셀렉트 상태 갱신. 하위 뷰에서 확장."""
+        single = self.total_pages <= 1
+        self.prev_button.disabled = single
+        self.next_button.disabled = single
+        self.jump_button.disabled = single
+
+    # ───────── 그리기 ─────────
+
+    def page_footer(self) -> str:
+        return (
+            f"{self.page + 1}/{self.total_pages} 페이지 · 총 {self.total}개 · "
+            f"분류: {SHOP_CATEGORY_LABELS[self.category]}"
+        )
+
+    def make_list_embed(self) -> discord.Embed:
+        if self.page == 0 and self.first_embed is not None:
+            embed = self.first_embed.copy()
+        else:
+            title, description, _, _ = SHOP_EMBEDS[self.category]
+            embed = discord.Embed(title=title, description=description)
+            for item in self.items:
+                name, value = format_shop_item_field(item)
+                embed.add_field(name=name, value=value, inline=False)
+            if not self.items:
+                embed.description += "\n\n이 페이지에는 아이템이 없습니다."
+        embed.set_footer(text=self.page_footer())
+        return embed
+
+    async def refresh_message(self, inter: discord.Interaction):
+        await inter.response.edit_message(embed=self.make_list_embed(), view=self)
+
+
+class ShopCategorySelect(discord.ui.Select):
+    def __init__(self, category: str):
+        super().__init__(
+            placeholder="분류를 선택하세요.",
+            min_values=1,
+            max_values=1,
+            options=[
+                discord.SelectOption(label=label, value=key, default=(key == category))
+                for key, label in SHOP_CATEGORY_LABELS.items()
+            ],
+            row=0,
+        )
+
+    async def callback(self, inter: discord.Interaction):
+        view: ShopPageView = self.view  # type: ignore
+        view.category = self.values[0]
+        for option in self.options:
+            option.default = option.value == view.category
+        await view.open()
+        await view.refresh_message(inter)
+
+
+class ShopPrevButton(discord.ui.Button):
+    def __init__(self):
+        super().__init__(style=discord.ButtonStyle.secondary, label="이전", row=2)
+
+    async def callback(self, inter: discord.Interaction):
+        view: ShopPageView = self.view  # type: ignore
+        await view.go_prev()
+        await view.refresh_message(inter)
+
+
+class ShopNextButton(discord.ui.Button):
+    def __init__(self):
+        super().__init__(style=discord.ButtonStyle.secondary, label="다음", row=2)
+
+    async def callback(self, inter: discord.Interaction):
+        view: ShopPageView = self.view  # type: ignore
+        await view.go_next()
+        await view.refresh_message(inter)
+
+
+class ShopJumpButton(discord.ui.Button):
+    def __init__(self):
+        super().__init__(style=discord.ButtonStyle.secondary, label="페이지 이동", row=2)
+
+    async def callback(self, inter: discord.Interaction):
+        view: ShopPageView = self.view  # type: ignore
+        await inter.response.send_modal(ShopJumpModal(view))
+
+
+class ShopJumpModal(discord.ui.Modal, title="페이지 이동"):
+    def __init__(self, parent_view: ShopPageView):
+        super().__init__()
+        self.parent_view = parent_view
+        self.page_input = discord.ui.TextInput(
+            label=f"이동할 페이지 (1 ~ {parent_view.total_pages})",
+            default=str(parent_view.page + 1),
+            max_length=6,
+        )
+        self.add_item(self.page_input)
+
+    async def on_submit(self, inter: discord.Interaction):
+        try:
+            page = int(str(self.page_input.value).strip())
+        except ValueError:
+            await inter.response.send_message("페이지 번호는 정수로 입력해 주세요.", ephemeral=True)
+            return
+
+        await self.parent_view.go_to(page - 1)
+        await self.parent_view.refresh_message(inter)
+
 
-        # 드롭다운용 옵션 (디스코드 제한: 최대 25개)
+# =========================================================
+# 아이템 관리용 View / Select / Modal
+# =========================================================
+
+class ItemManageView(ShopPageView):
+    def __init__(self, guild_id: int, manager_id: int, *, timeout: float = 180):
+        super().__init__(guild_id, manager_id, category="all", timeout=timeout)
+        self.manager_id = manager_id
+        # items: 지금 페이지의 [{id, name, price, stock, description, currency_name, currency_code}, ...]
+
+        # 드롭다운은 지금 페이지 아이템만 (디스코드 제한 25개 < SHOP_PAGE_SIZE)
+        self.item_select = ItemSelect(self)
+        self.add_item(self.item_select)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # 권한 확인은 ItemSelect 에서
+        return True
+
+    def on_page_loaded(self):
+        super().on_page_loaded()
         options = []
-        for idx, item in enumerate(self.items[:25]):
+        for idx, item in enumerate(self.items):
             label = item["name"]
             cur_name = item.get("currency_name") or "알 수 없음"
             price = item.get("price", 0)
@@ -3243,35 +3892,15 @@ class ItemManageView(discord.ui.View):
                 discord.SelectOption(
                     label=str(label)[:100],
                     description=str(desc)[:100],
-                    value=str(idx),  # 전체 리스트 기준 인덱스
+                    value=str(idx),  # 지금 페이지 기준 인덱스
                 )
             )
-
-        if options:
-            self.add_item(ItemSelect(self, options))
-
-        # 페이지 버튼
-        if self.total_pages > 1:
-            self.add_item(ItemPrevButton())
-            self.add_item(ItemNextButton())
-
-    def current_page_items(self):
-        start = self.page * self.page_size
-        end = start + self.page_size
-        return self.items[start:end]
+        self.item_select.set_options(options)
 
     def make_list_embed(self):
-        chunk = self.current_page_items()
         lines = []
-        for item in chunk:
-            stock = item.get("stock")
-            if stock is None:
-                stock_text = "제한없음"
-            elif stock <= 0:
-                stock_text = "품절"
-            else:
-                stock_text = f"{stock}개"
-
+        for item in self.items:
+            stock_text = format_stock_text(item.get("stock"))
             cur_name = item.get("currency_name") or "알 수 없음"
             cur_code = item.get("currency_code") or "?"
             desc = (item.get("description") or "설명 없음").replace("\n", " ")
@@ -3293,7 +3922,10 @@ class ItemManageView(discord.ui.View):
             ),
             color=discord.Color.blue(),
         )
+        embed.set_footer(text=self.page_footer())
         return embed
+
+
 # ============================================
 # 펫 관리용 View
 # ============================================
@@ -3433,7 +4065,7 @@ class PetManageView(discord.ui.View):
                     return
 
                 # DB 업데이트
-                async with aiosqlite.connect(DB_PATH) as db:
+                async with acquire() as db:
                     await db.execute(
                         """
                         UPDATE pets
@@ -3481,7 +4113,7 @@ class PetManageView(discord.ui.View):
         pet_id = pet["id"]
 
         # DB에서 삭제
-        async with aiosqlite.connect(DB_PATH) as db:
+        async with acquire() as db:
             # user_pets 같은 테이블이 있다면 여기서 같이 삭제해 주세요.
             await db.execute(
                 "DELETE FROM pets WHERE id = ? AND guild_id = ?",
@@ -3525,15 +4157,21 @@ class PetManageView(discord.ui.View):
 
 
 class ItemSelect(discord.ui.Select):
-    def __init__(self, view: ItemManageView, options):
+    def __init__(self, view: ItemManageView):
         super().__init__(
             placeholder="수정/삭제할 아이템을 선택하세요.",
             min_values=1,
             max_values=1,
-            options=options,
+            options=[discord.SelectOption(label="-", value="-1")],
+            row=1,
         )
         self.manage_view = view
 
+    def set_options(self, options):
+        # 빈 페이지여도 옵션이 최소 1개는 있어야 해서 자리표시 옵션 + 비활성화
+        self.options = options or [discord.SelectOption(label="아이템 없음", value="-1")]
+        self.disabled = not options
+
     async def callback(self, inter: discord.Interaction):
         # 이 View를 연 관리자 또는 manage_guild 권한이 있는 사람만 허용
         if inter.user.id != self.manage_view.manager_id and not inter.user.guild_permissions.manage_guild:
@@ -3613,7 +4251,7 @@ class ItemEditModal(discord.ui.Modal, title="아이템 수정 / 삭제"):
 
         if delete_flag == "삭제":
             # soft delete: 상점에서만 제거 (is_shop = 0) + 판매 상점에서도 제거
-            async with aiosqlite.connect(DB_PATH) as db:
+            async with acquire() as db:
                 await db.execute(
                     "DELETE FROM sell_shop_items WHERE guild_id = ? AND item_id = ?",
                     (inter.guild.id, self.item["id"]),
@@ -3623,18 +4261,11 @@ class ItemEditModal(discord.ui.Modal, title="아이템 수정 / 삭제"):
                     (self.item["id"],),
                 )
                 await db.commit()
+            invalidate_shop_catalog(inter.guild.id)
+            index_item_name(inter.guild.id, self.item["id"], is_shop=False, sellable=False)
 
-            # 뷰 목록에서도 제거
-            self.parent_view.items = [
-                it for it in self.parent_view.items if it["id"] != self.item["id"]
-            ]
-            self.parent_view.total_pages = max(
-                1,
-                (len(self.parent_view.items) + self.parent_view.page_size - 1)
-                // self.parent_view.page_size,
-            )
-            if self.parent_view.page >= self.parent_view.total_pages:
-                self.parent_view.page = self.parent_view.total_pages - 1
+            # 지금 페이지를 다시 읽어서 목록 갱신 (마지막 페이지가 비면 앞 페이지로)
+            await self.parent_view.go_to(self.parent_view.page)
 
             # 리스트 메시지 갱신
             if self.parent_view.message:
@@ -3692,19 +4323,30 @@ class ItemEditModal(discord.ui.Modal, title="아이템 수정 / 삭제"):
         new_desc = str(self.desc_input.value).strip()
 
         # DB 업데이트 (이름까지)
-        async with aiosqlite.connect(DB_PATH) as db:
-            await db.execute(
-                """
-                UPDATE items
-                   SET name = ?,
-                       price = ?,
-                       stock = ?,
-                       description = ?
-                 WHERE id = ?
-                """,
-                (new_name, new_price, new_stock, new_desc, self.item["id"]),
-            )
+        async with acquire() as db:
+            try:
+                await db.execute(
+                    """
+                    UPDATE items
+                       SET name = ?,
+                           price = ?,
+                           stock = ?,
+                           description = ?
+                     WHERE id = ?
+                    """,
+                    (new_name, new_price, new_stock, new_desc, self.item["id"]),
+                )
+            except sqlite3.IntegrityError:
+                # (guild_id, name) UNIQUE → 같은 이름 아이템이 이미 있음
+                await inter.response.send_message(
+                    f"`{new_name}` 이름의 아이템이 이미 있어요. 다른 이름을 입력해 주세요.",
+                    ephemeral=True,
+                )
+                return
             await db.commit()
+        invalidate_loot_table(inter.guild.id)
+        invalidate_shop_catalog(inter.guild.id)
+        index_item_name(inter.guild.id, self.item["id"], new_name)
 
         # 메모리 값도 갱신
         self.item["name"] = new_name
@@ -3738,72 +4380,38 @@ class ItemEditModal(discord.ui.Modal, title="아이템 수정 / 삭제"):
                 pass
 
 
-class ItemPrevButton(discord.ui.Button):
-    def __init__(self):
-        super().__init__(style=discord.ButtonStyle.secondary, label="이전")
-
-    async def callback(self, inter: discord.Interaction):
-        view: ItemManageView = self.view  # type: ignore
-        if view.total_pages <= 1:
-            await inter.response.defer()
-            return
-
-        view.page = (view.page - 1) % view.total_pages
-        embed = view.make_list_embed()
-        await inter.response.edit_message(embed=embed, view=view)
-
-
-class ItemNextButton(discord.ui.Button):
-    def __init__(self):
-        super().__init__(style=discord.ButtonStyle.secondary, label="다음")
-
-    async def callback(self, inter: discord.Interaction):
-        view: ItemManageView = self.view  # type: ignore
-        if view.total_pages <= 1:
-            await inter.response.defer()
-            return
-
-        view.page = (view.page + 1) % view.total_pages
-        embed = view.make_list_embed()
-        await inter.response.edit_message(embed=embed, view=view)
-
 #선택 구매용 view
-class SelectBuyView(discord.ui.View):
-    def __init__(self, items: list[dict], buyer_id: int, guild_id: int):
-        super().__init__(timeout=300)
-        self.items = items
-        self.buyer_id = buyer_id
-        self.guild_id = guild_id
-        self.message: discord.Message | None = None
+class SelectBuyView(ShopPageView):
+    in_stock = True
 
-        # 셀렉트 옵션 (최대 25개까지만 표시 가능)
-        options = [
-            discord.SelectOption(
-                label=item["name"],  # [숫자] 같은 거 없이 이름만
-                description=f"가격: {item['price']} {item['currency_name']} / 재고: "
-                            f"{'무제한' if item['stock'] is None else item['stock']}개",
-                value=str(item["id"]),  # 내부 값은 ID
-            )
-            for item in self.items[:25]
-        ]
+    def __init__(self, guild_id: int, buyer_id: int):
+        super().__init__(guild_id, buyer_id, category="all", timeout=300)
+        self.buyer_id = buyer_id
 
+        # 셀렉트 옵션은 지금 페이지 아이템만 (페이지 크기 < 디스코드 제한 25개)
         self.select = discord.ui.Select(
             placeholder="구매할 아이템을 선택하세요.",
             min_values=1,
             max_values=1,
-            options=options,
+            options=[discord.SelectOption(label="-", value="-1")],
+            row=1,
         )
         self.select.callback = self.on_select
         self.add_item(self.select)
 
-    # 이 뷰를 연 사람만 조작 가능하게
-    async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if interaction.user.id != self.buyer_id:
-            await interaction.response.send_message(
-                "이 메뉴를 연 사용자만 사용할 수 있어요!", ephemeral=True
+    def on_page_loaded(self):
+        super().on_page_loaded()
+        options = [
+            discord.SelectOption(
+                label=item["name"][:100],  # [숫자] 같은 거 없이 이름만
+                description=f"가격: {item['price']} {item['currency_name'] or '알 수 없음'} / 재고: "
+                            f"{'무제한' if item['stock'] is None else item['stock']}개"[:100],
+                value=str(item["id"]),  # 내부 값은 ID
             )
-            return False
-        return True
+            for item in self.items
+        ]
+        self.select.options = options or [discord.SelectOption(label="아이템 없음", value="-1")]
+        self.select.disabled = not options
 
     def make_list_embed(self) -> discord.Embed:
         embed = discord.Embed(
@@ -3818,9 +4426,10 @@ class SelectBuyView(discord.ui.View):
                 value="`/상점` 또는 `/아이템추가` 로 먼저 아이템을 등록해 주세요.",
                 inline=False,
             )
+            embed.set_footer(text=self.page_footer())
             return embed
 
-        # 아이템들을 두 번째 스샷처럼 블럭 형태로 표시
+        # 지금 페이지 아이템들을 블럭 형태로 표시
         for item in self.items:
             stock_text = "무제한" if item["stock"] is None else f"{item['stock']}개"
             desc_lines = [
@@ -3835,7 +4444,7 @@ class SelectBuyView(discord.ui.View):
                 inline=False,
             )
 
-        embed.set_footer(text="셀렉트로 아이템을 고른 뒤 수량 입력 모달이 뜹니다.")
+        embed.set_footer(text=f"셀렉트로 아이템을 고른 뒤 수량 입력 모달이 뜹니다. · {self.page_footer()}")
         return embed
 
     def get_selected_item(self) -> dict | None:
@@ -3887,87 +4496,19 @@ class SelectBuyView(discord.ui.View):
                     return
 
                 item = self.item_data
-                stock = item.get("stock")
-
-                # 재고 체크
-                if stock is not None and stock < qty:
-                    await modal_inter.response.send_message(
-                        f"❌ **{item['name']}** 의 재고가 부족합니다.\n"
-                        f"- 현재 재고: {stock}개\n"
-                        f"- 요청 수량: {qty}개",
-                        ephemeral=True,
-                    )
-                    return
 
-                # 유저/통화 정보
-                user = await get_or_create_user(self.parent_view.guild_id, modal_inter.user.id)
-                price = item["price"]
-                currency_id = item["currency_id"]
-                cur_name = item["currency_name"] or "알 수 없음"
-                cur_code = item["currency_code"] or "?"
-                total_price = price * qty
-
-                # 잔액 확인
-                current_balance = await get_balance(user["id"], currency_id)
-                if current_balance < total_price:
-                    await modal_inter.response.send_message(
-                        f"재화가 부족합니다!\n"
-                        f"- 필요 금액: {total_price} {cur_name}\n"
-                        f"- 현재 소지금: {current_balance} {cur_name}",
-                        ephemeral=True,
-                    )
-                    return
-
-                # 재화 차감
-                new_balance = await change_balance(user["id"], currency_id, -total_price)
-
-                # 인벤토리 + 재고 처리
-                async with aiosqlite.connect(DB_PATH) as db:
-                    cursor = await db.execute(
-                        "SELECT id, quantity FROM inventories "
-                        "WHERE user_id = ? AND item_id = ?",
-                        (user["id"], item["id"]),
-                    )
-                    row = await cursor.fetchone()
-                    await cursor.close()
-
-                    if row:
-                        inv_id, old_qty = row
-                        await db.execute(
-                            "UPDATE inventories SET quantity = ? WHERE id = ?",
-                            (old_qty + qty, inv_id),
-                        )
-                    else:
-                        await db.execute(
-                            "INSERT INTO inventories (user_id, item_id, quantity) "
-                            "VALUES (?, ?, ?)",
-                            (user["id"], item["id"], qty),
-                        )
-
-                    # 재고 감소
-                    if stock is not None:
-                        await db.execute(
-                            "UPDATE items "
-                            "SET stock = stock - ? "
-                            "WHERE id = ? AND stock IS NOT NULL",
-                            (qty, item["id"]),
-                        )
-
-                    await db.commit()
+                # /구매 와 같은 구매 엔진 사용 (재고/잔액은 트랜잭션 안에서 다시 확인)
+                db_user_id = await get_user_id(self.parent_view.guild_id, modal_inter.user.id)
+                result = await purchase(self.parent_view.guild_id, db_user_id, item["id"], qty)
 
-                # 남은 재고 텍스트
-                if stock is None:
-                    new_stock_text = "무제한"
-                else:
-                    new_stock_text = f"{max(stock - qty, 0)}개"
+                if result.ok:
+                    # 뷰에 들고 있는 재고 표시도 갱신
+                    item["stock"] = result.stock
 
-                # 상점 채널에 결과는 공개 메시지로
+                # 성공은 상점 채널에 공개 메시지로, 실패는 본인에게만
                 await modal_inter.response.send_message(
-                    f"✅ **{item['name']}** {qty}개 구매 완료!\n"
-                    f"- 지불한 금액: {total_price} {cur_name}\n"
-                    f"- 남은 소지금: {new_balance} {cur_name}\n"
-                    f"- 남은 재고: {new_stock_text}",
-                    ephemeral=False,
+                    format_purchase_message(result, item["name"]),
+                    ephemeral=not result.ok,
                 )
 
         await interaction.response.send_modal(QuantityModal(self, item))
@@ -4100,13 +4641,13 @@ async def slash_help(inter: discord.Interaction):
     guild_id = inter.guild.id
     channel_id = inter.channel.id
 
-    settings = await get_or_create_guild_settings(guild_id)
-    attend_channel = settings["attend_channel_id"]
-    shop_channel = settings["shop_channel_id"]
-    user_channel = await get_user_channel_id(guild_id)
-    admin_channel = await get_admin_channel_id(guild_id)
-    fishing_channel = await get_fishing_channel_id(guild_id)
-    trade_channel = await get_trade_channel_id(guild_id)
+    config = await get_guild_config(guild_id)
+    attend_channel = config.attend_channel_id
+    shop_channel = config.shop_channel_id
+    user_channel = config.user_channel_id
+    admin_channel = config.admin_channel_id
+    fishing_channel = config.fishing_channel_id
+    trade_channel = config.trade_channel_id
 
     is_admin = inter.user.guild_permissions.manage_guild
 
@@ -4133,12 +4674,14 @@ async def slash_help(inter: discord.Interaction):
     cmds_trade = [
         ("`/재화선물`", "다른 사용자에게 재화를 선물"),
         ("`/아이템선물`", "다른 사용자에게 아이템을 선물"),
+        ("`/단체선물`", "역할/여러 사용자에게 재화를 똑같이 선물"),
     ]
 
 
     # 출석 채널
     cmds_attend = [
         ("`/출석`", "출석하고 보상을 받습니다."),
+        ("`/출석기록`", "이번 달 출석 달력과 연속 출석 확인"),
     ]
 
     # 상점 채널
@@ -4176,9 +4719,15 @@ async def slash_help(inter: discord.Interaction):
         ("`/낚시아이템추가`", "낚시 전용 아이템 추가"),
         ("`/낚시확률`", "낚시 아이템 확률 설정"),
         ("`/낚시확률목록`", "낚시 확률 목록 보기"),
+        ("`/낚시횟수설정`", "하루 낚시 가능 횟수 설정"),
         ("`/펫등록`", "펫 도감에 펫 등록/설명 수정"),
         ("`/정산`", "특정 사용자 재화 증감"),
+        ("`/단체정산`", "역할/여러 사용자 재화 한 번에 증감"),
+        ("`/단체아이템정산`", "역할/여러 사용자에게 아이템 한 번에 지급"),
         ("`/전체정산`", "서버 전체 유저 재화 일괄 지급/차감"),
+        ("`/경제내보내기`", "재화/아이템/낚시 확률/펫(+잔액)을 파일로 내보내기"),
+        ("`/경제가져오기`", "내보낸 파일로 재화/아이템/낚시 확률/펫/잔액 한 번에 등록"),
+        ("`/db상태`", "쓰기 큐 대기/배치 크기/커밋 지연 등 DB 상태 보기"),
         ("`/확인`", "특정 사용자 소지금 + 인벤토리 확인"),
         ("`/관리자아이템추가`", "상점에 보이지 않는 관리자 전용 아이템 추가"),
         ("`/관리자아이템목록`", "관리자 아이템 목록 확인"),
@@ -4298,4 +4847,5 @@ async def clear_all_slash_commands(ctx: commands.Context):
 # 봇 실행
 # =========================================================
 
-bot.run(TOKEN)
+if __name__ == "__main__":
+    bot.run(TOKEN)
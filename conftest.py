@@ -0,0 +1,2 @@
+# test_bot.py 는 import 하면 바로 봇을 띄우는 수동 테스트용 스크립트라 pytest 수집에서 뺀다
+collect_ignore = ["test_bot.py"]
@@ -1,17 +1,351 @@
 # db.py  ─ ARPG 봇용 SQLite 래퍼
 
-import aiosqlite
+import asyncio
+import calendar
+import json
+import random
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from pathlib import Path
 
+import aiosqlite
+
 # DB 경로
 DATA_DIR = Path("data")
 DATA_DIR.mkdir(exist_ok=True)
 DB_PATH = DATA_DIR / "arpg.db"
 
 
+# ---------------------------------------------------------
+# 커넥션 풀
+# ---------------------------------------------------------
+
+class ConnectionPool:
+    """
+    봇이 켜질 때 열고 꺼질 때 닫는 aiosqlite 커넥션 풀.
+    - 명령어마다 connect() 하면 커넥션 + 워커 스레드를 매번 새로 만들기 때문에
+      미리 열어둔 커넥션을 빌려 쓰고 돌려준다.
+    - hits   : 놀고 있는 커넥션을 바로 빌려준 횟수
+    - misses : 놀고 있는 커넥션이 없어서 새로 연 횟수
+    - waits  : 최대 개수까지 다 빌려가서 반납을 기다린 횟수
+    """
+
+    def __init__(self, path, min_size: int = 2, max_size: int = 8):
+        self.path = path
+        self.min_size = min_size
+        self.max_size = max_size
+        self._idle: list[aiosqlite.Connection] = []
+        self._all: set[aiosqlite.Connection] = set()
+        self._cond: asyncio.Condition | None = None
+        self._closed = False
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+
+    def _condition(self) -> asyncio.Condition:
+        # 이벤트 루프가 돌기 시작한 뒤에 만들어야 해서 지연 생성
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def _connect(self) -> aiosqlite.Connection:
+        db = await aiosqlite.connect(self.path)
+        db.row_factory = aiosqlite.Row
+        # 여러 커넥션이 동시에 읽고 쓰므로 WAL + 잠금 대기
+        await db.execute("PRAGMA journal_mode = WAL")
+        await db.execute("PRAGMA busy_timeout = 5000")
+        self._all.add(db)
+        return db
+
+    async def open(self):
+        """min_size 만큼 커넥션을 미리 열어둔다."""
+        self._closed = False
+        while len(self._all) < self.min_size:
+            self._idle.append(await self._connect())
+
+    async def close(self):
+        """모든 커넥션 닫기 (빌려간 커넥션도 포함)."""
+        self._closed = True
+        conns = list(self._all)
+        self._all.clear()
+        self._idle.clear()
+        for db in conns:
+            try:
+                await db.close()
+            except Exception:
+                pass
+
+    async def _get(self) -> aiosqlite.Connection:
+        cond = self._condition()
+        async with cond:
+            if self._idle:
+                self.hits += 1
+                return self._idle.pop()
+            if len(self._all) < self.max_size:
+                self.misses += 1
+                return await self._connect()
+            self.waits += 1
+            await cond.wait_for(lambda: bool(self._idle))
+            self.hits += 1
+            return self._idle.pop()
+
+    async def _put(self, db: aiosqlite.Connection):
+        if db not in self._all:
+            # close() 로 이미 닫힌 커넥션
+            return
+
+        # 커밋 안 하고 나간 경우(중간 return 등) 다음 사용자에게 넘기지 않도록 정리
+        try:
+            if db.in_transaction:
+                await db.rollback()
+            db.row_factory = aiosqlite.Row
+        except Exception:
+            self._all.discard(db)
+            try:
+                await db.close()
+            except Exception:
+                pass
+            return
+
+        if self._closed:
+            self._all.discard(db)
+            await db.close()
+            return
+
+        cond = self._condition()
+        async with cond:
+            self._idle.append(db)
+            cond.notify()
+
+    @asynccontextmanager
+    async def acquire(self):
+        db = await self._get()
+        try:
+            yield db
+        finally:
+            await self._put(db)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._all),
+            "idle": len(self._idle),
+            "hits": self.hits,
+            "misses": self.misses,
+            "waits": self.waits,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+
+pool = ConnectionPool(DB_PATH)
+
+
+async def open_pool():
+    await pool.open()
+
+
+async def close_pool():
+    await pool.close()
+
+
+def acquire():
+    """
+    풀에서 커넥션 하나 빌리기.
+    사용법: async with acquire() as db: ...
+    """
+    return pool.acquire()
+
+
+@asynccontextmanager
+async def transaction():
+    """
+    풀에서 커넥션을 빌려 BEGIN IMMEDIATE 로 쓰기 잠금을 먼저 잡는 트랜잭션.
+    - 블록이 정상 종료되면 COMMIT, 예외가 나면 ROLLBACK
+    - 블록 안에서 직접 rollback() 해도 된다 (그 경우 COMMIT 안 함)
+    사용법: async with transaction() as db: ...
+    """
+    async with acquire() as db:
+        await db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            await db.rollback()
+            raise
+        if db.in_transaction:
+            await db.commit()
+
+
+# ---------------------------------------------------------
+# 그룹 커밋 쓰기 큐 (재화/인벤토리 변경)
+# ---------------------------------------------------------
+
+class JobAbort(Exception):
+    """
+    쓰기 작업 안에서 '내 변경만 되돌리고 이 값을 결과로 돌려줘' 할 때 사용.
+    (예: 재고는 줄였는데 잔액이 부족 → 재고 차감만 취소하고 실패 결과 반환)
+    """
+
+    def __init__(self, result=None):
+        super().__init__(result)
+        self.result = result
+
+
+class WriteQueue:
+    """
+    모든 명령어의 재화/인벤토리 쓰기를 받아서 한 트랜잭션에 묶어 커밋하는 단일 writer.
+    - 첫 작업이 들어오면 window 초 동안 더 모으거나 max_batch 개가 차면 실행
+    - 작업마다 SAVEPOINT 를 걸어서 한 작업이 실패해도 나머지는 커밋된다
+    - 커밋은 배치당 1번 → 자정 출석/낚시 폭주 때 fsync 횟수가 명령어 수가 아니라 배치 수
+    job 은 `async def job(db) -> 결과` 형태의 함수.
+    """
+
+    def __init__(self, window: float = 0.005, max_batch: int = 64):
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self.batches = 0
+        self.jobs = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.last_commit_ms = 0.0
+        self.max_commit_ms = 0.0
+        self._total_commit_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """남은 작업을 전부 처리한 뒤 writer 종료."""
+        if not self.running:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, job):
+        """작업을 큐에 넣고 결과를 기다린다. writer 가 안 돌고 있으면 바로 실행."""
+        if not self.running:
+            return await _run_job_now(job)
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((job, fut))
+        return await fut
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+
+            batch = [first]
+            # 큐가 비어 있으면 잠깐 기다려서 같이 커밋할 작업을 모은다
+            if self._queue.empty():
+                await asyncio.sleep(self.window)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                nxt = self._queue.get_nowait()
+                if nxt is None:
+                    stopping = True
+                    break
+                batch.append(nxt)
+
+            await self._flush(batch)
+
+    async def _flush(self, batch):
+        outcomes = []
+        try:
+            async with acquire() as db:
+                await db.execute("BEGIN IMMEDIATE")
+                for job, fut in batch:
+                    await db.execute("SAVEPOINT job")
+                    try:
+                        result = await job(db)
+                    except JobAbort as e:
+                        await db.execute("ROLLBACK TO job")
+                        await db.execute("RELEASE job")
+                        outcomes.append((fut, e.result, None))
+                    except Exception as e:
+                        await db.execute("ROLLBACK TO job")
+                        await db.execute("RELEASE job")
+                        outcomes.append((fut, None, e))
+                    else:
+                        await db.execute("RELEASE job")
+                        outcomes.append((fut, result, None))
+
+                started = time.perf_counter()
+                await db.commit()
+                commit_ms = (time.perf_counter() - started) * 1000
+        except Exception as e:
+            # BEGIN/COMMIT 자체가 실패하면 이 배치 전체 실패
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+
+        self.batches += 1
+        self.jobs += len(batch)
+        self.last_batch_size = len(batch)
+        self.max_batch_size = max(self.max_batch_size, len(batch))
+        self.last_commit_ms = commit_ms
+        self.max_commit_ms = max(self.max_commit_ms, commit_ms)
+        self._total_commit_ms += commit_ms
+
+        for fut, result, error in outcomes:
+            if fut.done():  # 호출한 쪽이 이미 취소함
+                continue
+            if error is not None:
+                fut.set_exception(error)
+            else:
+                fut.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "depth": self._queue.qsize() if self._queue else 0,
+            "batches": self.batches,
+            "jobs": self.jobs,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size": self.max_batch_size,
+            "avg_batch_size": (self.jobs / self.batches) if self.batches else 0.0,
+            "last_commit_ms": self.last_commit_ms,
+            "max_commit_ms": self.max_commit_ms,
+            "avg_commit_ms": (self._total_commit_ms / self.batches) if self.batches else 0.0,
+        }
+
+
+async def _run_job_now(job):
+    """writer 없이 작업 하나를 자기 트랜잭션에서 실행 (오프라인 스크립트 등)."""
+    async with transaction() as db:
+        try:
+            return await job(db)
+        except JobAbort as e:
+            await db.rollback()
+            return e.result
+
+
+write_queue = WriteQueue()
+
+
+async def start_write_queue():
+    await write_queue.start()
+
+
+async def stop_write_queue():
+    await write_queue.stop()
+
+
 async def init_db():
     """모든 테이블 생성 + 컬럼/테이블 없으면 추가."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         # -------------------------------------------------
         # 길드별 설정
         # -------------------------------------------------
@@ -23,7 +357,8 @@ async def init_db():
                 shop_channel_id     INTEGER,
                 fishing_channel_id  INTEGER,
                 attend_currency_id  INTEGER,
-                main_currency_id    INTEGER
+                main_currency_id    INTEGER,
+                fishing_daily_limit INTEGER
             )
             """
         )
@@ -37,6 +372,11 @@ async def init_db():
                 await db.execute(
                     "ALTER TABLE guild_settings ADD COLUMN fishing_channel_id INTEGER"
                 )
+            # 하루 낚시 횟수 (NULL 이면 DEFAULT_FISH_PER_DAY)
+            if "fishing_daily_limit" not in col_names:
+                await db.execute(
+                    "ALTER TABLE guild_settings ADD COLUMN fishing_daily_limit INTEGER"
+                )
         except Exception:
             pass
 
@@ -181,6 +521,13 @@ async def init_db():
             ON fishing_limits (guild_id, user_id, date)
             """
         )
+        # 지난 날짜 행 정리(prune_fishing_limits)용
+        await db.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_fishing_limits_date
+            ON fishing_limits (date)
+            """
+        )
 
         # -------------------------------------------------
         # 낚시 확률 테이블
@@ -203,6 +550,11 @@ async def init_db():
             """
         )
 
+        # 상점 페이지(키셋) 조회용: guild_id 안에서 id 순으로 바로 이어 읽는다
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_items_guild ON items (guild_id)"
+        )
+
         # -------------------------------------------------
         # 펫 도감 테이블
         # -------------------------------------------------
@@ -217,15 +569,228 @@ async def init_db():
             )
             """
         )
+
+        # -------------------------------------------------
+        # 관리자/사용자/낚시/거래 채널 테이블
+        # (길드 설정 캐시가 한 번에 읽을 수 있도록 여기서도 생성)
+        # -------------------------------------------------
+        for table in CHANNEL_TABLES.values():
+            await db.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    guild_id    INTEGER PRIMARY KEY,
+                    channel_id  INTEGER NOT NULL
+                )
+                """
+            )
+
+        # -------------------------------------------------
+        # 출석 기록 (유저 x 월 당 1행, days 의 i번째 비트 = (i+1)일 출석)
+        # -------------------------------------------------
+        await db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS attendance_history (
+                user_id     INTEGER NOT NULL,   -- users.id
+                month       TEXT NOT NULL,      -- 'YYYY-MM' (KST 기준)
+                days        INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, month)
+            )
+            """
+        )
+
+        # -------------------------------------------------
+        # 자주 찾는 키에 UNIQUE 인덱스 (기존 중복 행은 먼저 합침)
+        # -------------------------------------------------
+        await migrate_unique_indexes(db)
+
+        # 기록 테이블이 생기기 전 마지막 출석일도 비트로 남겨둔다 (여러 번 돌아도 결과 같음)
+        await db.execute(
+            """
+            INSERT INTO attendance_history (user_id, month, days)
+            SELECT id,
+                   substr(last_attend_date, 1, 7),
+                   1 << (CAST(substr(last_attend_date, 9, 2) AS INTEGER) - 1)
+              FROM users
+             WHERE last_attend_date IS NOT NULL
+            ON CONFLICT(user_id, month) DO UPDATE
+                SET days = attendance_history.days | excluded.days
+            """
+        )
         await db.commit()
 
+    # 예전 DB 에 쌓인 지난 날짜 낚시 횟수 정리 (최신 날짜만 남김, 이미 정리됐으면 바로 끝남)
+    await prune_fishing_limits()
+
+
+# ---------------------------------------------------------
+# 중복 정리 + UNIQUE 인덱스 마이그레이션
+# ---------------------------------------------------------
+
+# (인덱스 이름, 테이블, 인덱스 컬럼)
+UNIQUE_INDEXES = [
+    ("idx_users_guild_user", "users", "guild_id, user_id"),
+    ("idx_currencies_guild_code", "currencies", "guild_id, code COLLATE NOCASE"),
+    ("idx_items_guild_name", "items", "guild_id, name"),
+    ("idx_balances_user_currency", "balances", "user_id, currency_id"),
+    ("idx_inventories_user_item", "inventories", "user_id, item_id"),
+]
+
+
+async def _build_dedup_map(db, table: str, partition: str, order: str) -> int:
+    """
+    temp._dedup_map(old_id, keep_id) 에 '지울 행 → 남길 행' 매핑을 만든다.
+    같은 partition 안에서 order 기준 첫 번째 행을 남긴다. 매핑 개수 반환.
+    """
+    await db.execute("DROP TABLE IF EXISTS temp._dedup_map")
+    await db.execute(
+        f"""
+        CREATE TEMP TABLE _dedup_map AS
+        SELECT id AS old_id, keep_id
+          FROM (
+                SELECT id,
+                       FIRST_VALUE(id) OVER (PARTITION BY {partition} ORDER BY {order}) AS keep_id
+                  FROM {table}
+               )
+         WHERE id <> keep_id
+        """
+    )
+    cursor = await db.execute("SELECT COUNT(*) FROM temp._dedup_map")
+    row = await cursor.fetchone()
+    await cursor.close()
+    return row[0]
+
+
+async def _remap_column(db, table: str, column: str, or_ignore: bool = False):
+    """table.column 이 지워질 행을 가리키면 남길 행으로 바꿔준다."""
+    verb = "UPDATE OR IGNORE" if or_ignore else "UPDATE"
+    await db.execute(
+        f"""
+        {verb} {table}
+           SET {column} = (SELECT keep_id FROM temp._dedup_map WHERE old_id = {table}.{column})
+         WHERE {column} IN (SELECT old_id FROM temp._dedup_map)
+        """
+    )
+    if or_ignore:
+        # UNIQUE 충돌로 옮기지 못한 행은 이미 남길 쪽에 같은 행이 있으므로 버린다
+        await db.execute(
+            f"DELETE FROM {table} WHERE {column} IN (SELECT old_id FROM temp._dedup_map)"
+        )
+
+
+async def _merge_sum(db, table: str, key_cols: str, value_col: str):
+    """같은 key 행들을 가장 작은 id 한 줄로 합치고 value_col 은 더한다."""
+    keys = [k.strip() for k in key_cols.split(",")]
+    match = " AND ".join(f"t2.{k} = {table}.{k}" for k in keys)
+    await db.execute(
+        f"""
+        UPDATE {table}
+           SET {value_col} = (SELECT SUM(t2.{value_col}) FROM {table} t2 WHERE {match})
+         WHERE id IN (
+               SELECT MIN(id) FROM {table}
+                GROUP BY {key_cols}
+               HAVING COUNT(*) > 1
+         )
+        """
+    )
+    await db.execute(
+        f"""
+        DELETE FROM {table}
+         WHERE id NOT IN (SELECT MIN(id) FROM {table} GROUP BY {key_cols})
+        """
+    )
+
+
+async def migrate_unique_indexes(db):
+    """
+    예전 SELECT → INSERT 코드가 경쟁 상태에서 만든 중복 행을 합친 뒤
+    UNIQUE 인덱스를 만든다. 인덱스가 이미 다 있으면 아무것도 안 함.
+    """
+    cursor = await db.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index'"
+    )
+    existing = {r[0] for r in await cursor.fetchall()}
+    await cursor.close()
+    if all(name in existing for name, _, _ in UNIQUE_INDEXES):
+        return
+
+    # 1) 재화: 같은 길드 + 같은 코드(대소문자 무시) → 가장 먼저 만든 재화로
+    if await _build_dedup_map(db, "currencies", "guild_id, LOWER(code)", "is_main DESC, id"):
+        await _remap_column(db, "balances", "currency_id")
+        await _remap_column(db, "items", "currency_id")
+        await _remap_column(db, "sell_shop_items", "currency_id")
+        await _remap_column(db, "guild_settings", "attend_currency_id")
+        await _remap_column(db, "guild_settings", "main_currency_id")
+        await db.execute(
+            "DELETE FROM currencies WHERE id IN (SELECT old_id FROM temp._dedup_map)"
+        )
+
+    # 2) 유저: 같은 길드 + 같은 디스코드 ID → 가장 먼저 만든 행으로
+    if await _build_dedup_map(db, "users", "guild_id, user_id", "id"):
+        # 출석 날짜는 더 최근 값을 남겨서 중복 출석을 막는다
+        await db.execute(
+            """
+            UPDATE users
+               SET last_attend_date = (
+                       SELECT MAX(u2.last_attend_date) FROM users u2
+                        WHERE u2.guild_id = users.guild_id AND u2.user_id = users.user_id
+                   ),
+                   last_bonus_attend_date = (
+                       SELECT MAX(u2.last_bonus_attend_date) FROM users u2
+                        WHERE u2.guild_id = users.guild_id AND u2.user_id = users.user_id
+                   )
+             WHERE id IN (SELECT keep_id FROM temp._dedup_map)
+            """
+        )
+        await _remap_column(db, "balances", "user_id")
+        await _remap_column(db, "inventories", "user_id")
+        # 같은 날짜 낚시 횟수는 버리지 않고 남길 유저 쪽에 더한다 (안 그러면 그날 다시 던질 수 있음)
+        await db.execute(
+            """
+            INSERT INTO fishing_limits (guild_id, user_id, date, count)
+            SELECT f.guild_id, m.keep_id, f.date, SUM(f.count)
+              FROM fishing_limits AS f
+              JOIN temp._dedup_map AS m ON m.old_id = f.user_id
+             WHERE true
+             GROUP BY f.guild_id, m.keep_id, f.date
+            ON CONFLICT(guild_id, user_id, date) DO UPDATE
+                SET count = fishing_limits.count + excluded.count
+            """
+        )
+        await db.execute(
+            "DELETE FROM fishing_limits WHERE user_id IN (SELECT old_id FROM temp._dedup_map)"
+        )
+        await db.execute(
+            "DELETE FROM users WHERE id IN (SELECT old_id FROM temp._dedup_map)"
+        )
+
+    # 3) 아이템: 같은 길드 + 같은 이름 → 상점 노출 중인 최신 행으로
+    #    (get_shop_item_by_name / upsert_shop_item_by_name 이 최신 ID를 쓰던 것과 맞춤)
+    if await _build_dedup_map(
+        db, "items", "guild_id, name", "COALESCE(is_shop, 1) DESC, id DESC"
+    ):
+        await _remap_column(db, "inventories", "item_id")
+        await _remap_column(db, "sell_shop_items", "item_id", or_ignore=True)
+        await _remap_column(db, "fishing_loot", "item_id", or_ignore=True)
+        await db.execute(
+            "DELETE FROM items WHERE id IN (SELECT old_id FROM temp._dedup_map)"
+        )
+
+    await db.execute("DROP TABLE IF EXISTS temp._dedup_map")
+
+    # 4) 잔액 / 인벤토리: 같은 키 행들의 수량 합산
+    await _merge_sum(db, "balances", "user_id, currency_id", "amount")
+    await _merge_sum(db, "inventories", "user_id, item_id", "quantity")
+
+    for name, table, cols in UNIQUE_INDEXES:
+        await db.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON {table} ({cols})")
+
 
 # ---------------------------------------------------------
 # guild_settings helpers
 # ---------------------------------------------------------
 
 async def get_or_create_guild_settings(guild_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         db.row_factory = aiosqlite.Row
 
         cursor = await db.execute(
@@ -275,6 +840,7 @@ async def get_or_create_guild_settings(guild_id: int):
             (main_currency_id, main_currency_id, guild_id),
         )
         await db.commit()
+        invalidate_currency_registry(guild_id)
 
         cursor = await db.execute(
             "SELECT * FROM guild_settings WHERE guild_id = ?",
@@ -286,7 +852,7 @@ async def get_or_create_guild_settings(guild_id: int):
 
 
 async def set_attend_channel(guild_id: int, channel_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             """
             INSERT INTO guild_settings (guild_id, attend_channel_id)
@@ -296,10 +862,11 @@ async def set_attend_channel(guild_id: int, channel_id: int):
             (guild_id, channel_id),
         )
         await db.commit()
+    invalidate_guild_config(guild_id)
 
 
 async def set_shop_channel(guild_id: int, channel_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             """
             INSERT INTO guild_settings (guild_id, shop_channel_id)
@@ -309,10 +876,11 @@ async def set_shop_channel(guild_id: int, channel_id: int):
             (guild_id, channel_id),
         )
         await db.commit()
+    invalidate_guild_config(guild_id)
 
 
 async def set_fishing_channel(guild_id: int, channel_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             """
             INSERT INTO guild_settings (guild_id, fishing_channel_id)
@@ -322,10 +890,11 @@ async def set_fishing_channel(guild_id: int, channel_id: int):
             (guild_id, channel_id),
         )
         await db.commit()
+    invalidate_guild_config(guild_id)
 
 
 async def set_attend_currency(guild_id: int, currency_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             """
             UPDATE guild_settings
@@ -335,10 +904,24 @@ async def set_attend_currency(guild_id: int, currency_id: int):
             (currency_id, guild_id),
         )
         await db.commit()
+    invalidate_guild_config(guild_id)
+
+
+async def set_fishing_daily_limit(guild_id: int, limit: int):
+    await get_or_create_guild_settings(guild_id)
+    async with acquire() as db:
+        await db.execute(
+            "UPDATE guild_settings SET fishing_daily_limit = ? WHERE guild_id = ?",
+            (limit, guild_id),
+        )
+        await db.commit()
+    invalidate_guild_config(guild_id)
+    # 제한이 바뀌면 '이미 다 쓴 유저' 기록도 다시 판단해야 함
+    reset_fishing_capped(guild_id)
 
 
 async def set_main_currency(guild_id: int, currency_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         # 모든 재화의 is_main = 0
         await db.execute(
             "UPDATE currencies SET is_main = 0 WHERE guild_id = ?",
@@ -355,12 +938,195 @@ async def set_main_currency(guild_id: int, currency_id: int):
             (currency_id, guild_id),
         )
         await db.commit()
+    invalidate_guild_config(guild_id)
+    invalidate_currency_registry(guild_id)
+
+
+# ---------------------------------------------------------
+# 길드 설정 캐시 (guild_settings + 채널 테이블)
+# ---------------------------------------------------------
+
+# 길드별 설정이 없을 때 하루 낚시 횟수
+DEFAULT_FISH_PER_DAY = 3
+
+# GuildConfig 필드 이름 → 채널 테이블
+CHANNEL_TABLES = {
+    "admin_channel_id": "command_channels",
+    "user_channel_id": "user_command_channels",
+    "fishing_channel_id": "fishing_channels",
+    "trade_channel_id": "trade_channels",
+}
+
+
+@dataclass
+class GuildConfig:
+    """길드 하나의 채널/재화 설정 스냅샷. 명령마다 DB를 읽지 않도록 메모리에 둔다."""
+
+    guild_id: int
+    attend_channel_id: int | None = None
+    shop_channel_id: int | None = None
+    attend_currency_id: int | None = None
+    main_currency_id: int | None = None
+    admin_channel_id: int | None = None
+    user_channel_id: int | None = None
+    fishing_channel_id: int | None = None
+    trade_channel_id: int | None = None
+    fishing_daily_limit: int = DEFAULT_FISH_PER_DAY
+
+
+_guild_configs: dict[int, GuildConfig] = {}
+
+_GUILD_CONFIG_SELECT = """
+    SELECT
+        g.guild_id,
+        g.attend_channel_id,
+        g.shop_channel_id,
+        g.attend_currency_id,
+        g.main_currency_id,
+        COALESCE(g.fishing_daily_limit, {default_fish_limit}) AS fishing_daily_limit,
+        {channel_columns}
+    FROM guild_settings g
+    {channel_joins}
+""".format(
+    default_fish_limit=DEFAULT_FISH_PER_DAY,
+    channel_columns=",\n        ".join(
+        f"{table}.channel_id AS {field}" for field, table in CHANNEL_TABLES.items()
+    ),
+    channel_joins="\n    ".join(
+        f"LEFT JOIN {table} ON {table}.guild_id = g.guild_id"
+        for table in CHANNEL_TABLES.values()
+    ),
+)
+
+
+def _row_to_guild_config(row) -> GuildConfig:
+    return GuildConfig(**{k: row[k] for k in row.keys()})
+
+
+async def load_guild_configs() -> int:
+    """봇 시작 시 모든 길드 설정을 한 번에 읽어 캐시를 채운다. 읽은 길드 수 반환."""
+    async with acquire() as db:
+        cursor = await db.execute(_GUILD_CONFIG_SELECT)
+        rows = await cursor.fetchall()
+        await cursor.close()
+
+    _guild_configs.clear()
+    for row in rows:
+        cfg = _row_to_guild_config(row)
+        _guild_configs[cfg.guild_id] = cfg
+    return len(rows)
+
+
+async def get_guild_config(guild_id: int) -> GuildConfig:
+    """캐시된 길드 설정. 없으면 (기본 설정을 만든 뒤) DB에서 한 번 읽어 채운다."""
+    cfg = _guild_configs.get(guild_id)
+    if cfg is not None:
+        return cfg
+
+    await get_or_create_guild_settings(guild_id)
+    async with acquire() as db:
+        cursor = await db.execute(
+            _GUILD_CONFIG_SELECT + " WHERE g.guild_id = ?",
+            (guild_id,),
+        )
+        row = await cursor.fetchone()
+        await cursor.close()
+
+    cfg = _row_to_guild_config(row) if row else GuildConfig(guild_id=guild_id)
+    _guild_configs[guild_id] = cfg
+    return cfg
+
+
+def invalidate_guild_config(guild_id: int):
+    """설정/채널 변경 후 호출. 다음 조회 때 DB에서 다시 읽는다."""
+    _guild_configs.pop(guild_id, None)
+
+
+async def set_guild_channel(guild_id: int, field: str, channel_id: int):
+    """관리자/사용자/낚시/거래 채널 설정 (field는 CHANNEL_TABLES의 키)."""
+    table = CHANNEL_TABLES[field]
+    async with acquire() as db:
+        await db.execute(
+            f"""
+            INSERT INTO {table} (guild_id, channel_id)
+            VALUES (?, ?)
+            ON CONFLICT(guild_id) DO UPDATE SET channel_id = excluded.channel_id
+            """,
+            (guild_id, channel_id),
+        )
+        await db.commit()
+    invalidate_guild_config(guild_id)
 
 
 # ---------------------------------------------------------
 # currencies
 # ---------------------------------------------------------
 
+@dataclass
+class CurrencyRegistry:
+    """
+    길드 하나의 재화 목록을 메모리에 올려둔 것.
+    - by_code : code.casefold() → 재화
+    - by_name : name.casefold() → 재화  (LOWER(name) 스캔 대신 사용)
+    - by_id   : id → 재화
+    재화 추가/활성/비활성/삭제/메인 변경 때만 다시 만든다.
+    """
+
+    guild_id: int
+    currencies: list[dict]
+    by_id: dict[int, dict]
+    by_code: dict[str, dict]
+    by_name: dict[str, dict]
+
+    @classmethod
+    def build(cls, guild_id: int, rows) -> "CurrencyRegistry":
+        currencies = [dict(r) for r in rows]
+        by_name: dict[str, dict] = {}
+        for cur in currencies:
+            # 같은 이름이 여러 개면 먼저 만든 재화 (기존 SELECT 와 같은 결과)
+            by_name.setdefault(cur["name"].casefold(), cur)
+        return cls(
+            guild_id=guild_id,
+            currencies=currencies,
+            by_id={c["id"]: c for c in currencies},
+            by_code={c["code"].casefold(): c for c in currencies},
+            by_name=by_name,
+        )
+
+    def resolve(self, identifier: str) -> dict | None:
+        """코드 → 이름 순서로 찾기 (둘 다 대소문자 무시)."""
+        key = identifier.strip().casefold()
+        return self.by_code.get(key) or self.by_name.get(key)
+
+
+_currency_registries: dict[int, CurrencyRegistry] = {}
+
+
+async def get_currency_registry(guild_id: int) -> CurrencyRegistry:
+    reg = _currency_registries.get(guild_id)
+    if reg is not None:
+        return reg
+
+    async with acquire() as db:
+        cursor = await db.execute(
+            "SELECT * FROM currencies WHERE guild_id = ? ORDER BY id",
+            (guild_id,),
+        )
+        rows = await cursor.fetchall()
+        await cursor.close()
+
+    reg = CurrencyRegistry.build(guild_id, rows)
+    _currency_registries[guild_id] = reg
+    return reg
+
+
+def invalidate_currency_registry(guild_id: int):
+    """재화 테이블을 바꾼 뒤 호출. 다음 조회 때 다시 만든다."""
+    _currency_registries.pop(guild_id, None)
+    # 상점 목록에 재화 이름/메인 여부가 들어가 있으므로 같이 버린다
+    invalidate_shop_catalog(guild_id)
+
+
 async def add_currency(
     guild_id: int,
     name: str,
@@ -368,141 +1134,250 @@ async def add_currency(
     is_main: bool = False,
     is_active: bool = True,
 ):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         cursor = await db.execute(
             """
             INSERT INTO currencies (guild_id, name, code, is_main, is_active)
             VALUES (?, ?, ?, ?, ?)
+            RETURNING *
             """,
             (guild_id, name, code, int(is_main), int(is_active)),
         )
-        await db.commit()
-
-        cur_id = cursor.lastrowid
-        cursor = await db.execute(
-            "SELECT * FROM currencies WHERE id = ?",
-            (cur_id,),
-        )
         row = await cursor.fetchone()
         await cursor.close()
-        return dict(row)
+        await db.commit()
+    invalidate_currency_registry(guild_id)
+    return dict(row)
 
 
 async def list_currencies(guild_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute(
-            "SELECT * FROM currencies WHERE guild_id = ?",
-            (guild_id,),
-        )
-        rows = await cursor.fetchall()
-        await cursor.close()
-        return [dict(r) for r in rows]
+    reg = await get_currency_registry(guild_id)
+    return [dict(c) for c in reg.currencies]
 
 
 async def get_currency_by_code(guild_id: int, code: str):
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute(
-            """
-            SELECT * FROM currencies
-            WHERE guild_id = ? AND LOWER(code) = LOWER(?)
-            """,
-            (guild_id, code),
-        )
-        row = await cursor.fetchone()
-        await cursor.close()
-        return dict(row) if row else None
+    reg = await get_currency_registry(guild_id)
+    cur = reg.by_code.get(code.strip().casefold())
+    return dict(cur) if cur else None
 
 
-# ---------------------------------------------------------
-# users / balances
-# ---------------------------------------------------------
+async def get_currency_by_id(guild_id: int, currency_id: int):
+    reg = await get_currency_registry(guild_id)
+    cur = reg.by_id.get(currency_id)
+    return dict(cur) if cur else None
 
-async def get_or_create_user(guild_id: int, user_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
 
-        cursor = await db.execute(
-            "SELECT * FROM users WHERE guild_id = ? AND user_id = ?",
-            (guild_id, user_id),
+async def resolve_currency(guild_id: int, identifier: str):
+    """재화 코드 또는 이름으로 찾기. SQLite 를 건드리지 않는다 (캐시가 있을 때)."""
+    reg = await get_currency_registry(guild_id)
+    cur = reg.resolve(identifier)
+    return dict(cur) if cur else None
+
+
+async def set_currency_active(guild_id: int, currency_id: int, active: bool):
+    async with acquire() as db:
+        await db.execute(
+            "UPDATE currencies SET is_active = ? WHERE id = ? AND guild_id = ?",
+            (int(active), currency_id, guild_id),
         )
-        row = await cursor.fetchone()
-        await cursor.close()
+        await db.commit()
+    invalidate_currency_registry(guild_id)
 
-        if row:
-            return dict(row)
 
+async def rename_currency(guild_id: int, currency_id: int, new_name: str):
+    async with acquire() as db:
         await db.execute(
-            "INSERT INTO users (guild_id, user_id, last_attend_date) VALUES (?, ?, NULL)",
-            (guild_id, user_id),
+            "UPDATE currencies SET name = ? WHERE id = ? AND guild_id = ?",
+            (new_name, currency_id, guild_id),
         )
         await db.commit()
+    invalidate_currency_registry(guild_id)
 
+
+async def delete_currency(guild_id: int, currency_id: int) -> int:
+    """
+    재화 삭제. 이 재화를 쓰는 아이템이 있으면 지우지 않고 그 개수를 반환한다.
+    (0 이면 삭제 완료)
+    """
+    async with acquire() as db:
         cursor = await db.execute(
-            "SELECT * FROM users WHERE guild_id = ? AND user_id = ?",
-            (guild_id, user_id),
+            "SELECT COUNT(*) FROM items WHERE guild_id = ? AND currency_id = ?",
+            (guild_id, currency_id),
         )
         row = await cursor.fetchone()
         await cursor.close()
-        return dict(row)
-
+        item_count = row[0] if row else 0
+        if item_count > 0:
+            return item_count
 
-async def update_user_last_attend(db_user_id: int, date_str: str):
-    async with aiosqlite.connect(DB_PATH) as db:
         await db.execute(
-            "UPDATE users SET last_attend_date = ? WHERE id = ?",
-            (date_str, db_user_id),
+            "DELETE FROM currencies WHERE id = ? AND guild_id = ?",
+            (currency_id, guild_id),
         )
         await db.commit()
+    invalidate_currency_registry(guild_id)
+    return 0
 
 
-async def get_balance(db_user_id: int, currency_id: int) -> int:
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            """
-            SELECT amount FROM balances
-            WHERE user_id = ? AND currency_id = ?
-            """,
-            (db_user_id, currency_id),
-        )
-        row = await cursor.fetchone()
-        await cursor.close()
-        if not row:
-            return 0
-        return row[0]
+# ---------------------------------------------------------
+# users / balances
+# ---------------------------------------------------------
 
+class IdentityCache:
+    """
+    (guild_id, 디스코드 유저 id) → users.id 를 기억하는 LRU 캐시.
+    users.id 는 한 번 만들어지면 바뀌지 않으므로 무효화가 필요 없다.
+    """
 
-async def change_balance(db_user_id: int, currency_id: int, diff: int) -> int:
-    """diff 만큼 증감 후 최종 amount 반환."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    def __init__(self, max_size: int = 50_000):
+        self.max_size = max_size
+        self._data: OrderedDict[tuple[int, int], int] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, guild_id: int, user_id: int) -> int | None:
+        key = (guild_id, user_id)
+        db_user_id = self._data.get(key)
+        if db_user_id is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return db_user_id
+
+    def put(self, guild_id: int, user_id: int, db_user_id: int):
+        key = (guild_id, user_id)
+        self._data[key] = db_user_id
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+
+identity_cache = IdentityCache()
+
+
+async def _upsert_user_row(guild_id: int, user_id: int) -> dict:
+    """INSERT … ON CONFLICT DO NOTHING RETURNING, 이미 있으면 SELECT 한 번."""
+    async with acquire() as db:
         cursor = await db.execute(
             """
-            SELECT id, amount FROM balances
-            WHERE user_id = ? AND currency_id = ?
+            INSERT INTO users (guild_id, user_id, last_attend_date) VALUES (?, ?, NULL)
+            ON CONFLICT(guild_id, user_id) DO NOTHING
+            RETURNING *
             """,
-            (db_user_id, currency_id),
+            (guild_id, user_id),
         )
         row = await cursor.fetchone()
-
-        if row:
-            bal_id, amount = row
-            new_amount = amount + diff
-            if new_amount < 0:
-                new_amount = 0
-            await db.execute(
-                "UPDATE balances SET amount = ? WHERE id = ?",
-                (new_amount, bal_id),
-            )
+        await cursor.close()
+        if row is not None:
+            await db.commit()
         else:
-            new_amount = max(diff, 0)
-            await db.execute(
-                "INSERT INTO balances (user_id, currency_id, amount) VALUES (?, ?, ?)",
-                (db_user_id, currency_id, new_amount),
+            cursor = await db.execute(
+                "SELECT * FROM users WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id),
             )
-        await db.commit()
-        await cursor.close()
-        return new_amount
+            row = await cursor.fetchone()
+            await cursor.close()
+
+    identity_cache.put(guild_id, user_id, row["id"])
+    return dict(row)
+
+
+async def get_user_id(guild_id: int, user_id: int) -> int:
+    """디스코드 유저의 내부 users.id (없으면 생성). 캐시에 있으면 쿼리 0번."""
+    db_user_id = identity_cache.get(guild_id, user_id)
+    if db_user_id is not None:
+        return db_user_id
+    row = await _upsert_user_row(guild_id, user_id)
+    return row["id"]
+
+
+async def _get_balance(db, db_user_id: int, currency_id: int) -> int:
+    cursor = await db.execute(
+        """
+        SELECT amount FROM balances
+        WHERE user_id = ? AND currency_id = ?
+        """,
+        (db_user_id, currency_id),
+    )
+    row = await cursor.fetchone()
+    await cursor.close()
+    if not row:
+        return 0
+    return row[0]
+
+
+async def get_balance(db_user_id: int, currency_id: int) -> int:
+    async with acquire() as db:
+        return await _get_balance(db, db_user_id, currency_id)
+
+
+async def _get_wallet(db, db_user_id: int, guild_id: int):
+    cursor = await db.execute(
+        """
+        SELECT c.id AS currency_id,
+               c.name,
+               c.code,
+               c.is_main,
+               c.is_active,
+               COALESCE(b.amount, 0) AS amount
+        FROM currencies c
+        LEFT JOIN balances b
+               ON b.currency_id = c.id AND b.user_id = ?
+        WHERE c.guild_id = ?
+        ORDER BY c.id ASC
+        """,
+        (db_user_id, guild_id),
+    )
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return [dict(r) for r in rows]
+
+
+async def get_wallet(db_user_id: int, guild_id: int):
+    """길드의 모든 재화별 소지금 (0인 재화 포함) 을 쿼리 한 번으로."""
+    async with acquire() as db:
+        return await _get_wallet(db, db_user_id, guild_id)
+
+
+async def _apply_balance_delta(db, db_user_id: int, currency_id: int, diff: int) -> int:
+    """커넥션을 받아서 잔액 증감 (커밋은 호출한 쪽에서). 최종 amount 반환."""
+    cursor = await db.execute(
+        """
+        INSERT INTO balances (user_id, currency_id, amount)
+        VALUES (?, ?, MAX(?, 0))
+        ON CONFLICT(user_id, currency_id)
+        DO UPDATE SET amount = MAX(balances.amount + ?, 0)
+        RETURNING amount
+        """,
+        (db_user_id, currency_id, diff, diff),
+    )
+    row = await cursor.fetchone()
+    await cursor.close()
+    return row[0]
+
+
+async def apply_balance_delta(db_user_id: int, currency_id: int, diff: int) -> int:
+    """
+    diff 만큼 증감 후 최종 amount 반환. (0 아래로는 내려가지 않음)
+    SELECT → UPDATE/INSERT 대신 UPSERT 한 번으로 처리한다.
+    """
+    return await write_queue.submit(
+        lambda db: _apply_balance_delta(db, db_user_id, currency_id, diff)
+    )
 
 
 # ---------------------------------------------------------
@@ -521,28 +1396,55 @@ async def add_item(
     """
     is_shop = 1 : 상점에 표시되는 아이템
     is_shop = 0 : 상점에 표시되지 않는 아이템(낚시 전용 등)
+    같은 이름 아이템이 이미 있으면 아무것도 바꾸지 않고 None 반환. (guild_id, name UNIQUE)
     """
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         cursor = await db.execute(
             """
             INSERT INTO items (guild_id, name, price, description, currency_id, stock, is_shop)
             VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(guild_id, name) DO NOTHING
+            RETURNING id
             """,
-            (guild_id, name, price, description, currency_id, stock, is_shop),
+            (guild_id, name, price, description, currency_id, stock, int(is_shop)),
         )
-        await db.commit()
-        item_id = cursor.lastrowid
+        row = await cursor.fetchone()
         await cursor.close()
-        return item_id
+        await db.commit()
+    if row is None:
+        return None
+    invalidate_shop_catalog(guild_id)
+    index_item_name(guild_id, row[0], name, is_shop=is_shop)
+    return row[0]
 
 
 async def delete_item(guild_id: int, item_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             "DELETE FROM items WHERE guild_id = ? AND id = ?",
             (guild_id, item_id),
         )
         await db.commit()
+    invalidate_shop_catalog(guild_id)
+    invalidate_loot_table(guild_id)
+    unindex_item_name(guild_id, item_id)
+
+
+async def _get_items(db, guild_id: int):
+    cursor = await db.execute(
+        """
+        SELECT i.*, c.name AS currency_name, c.code AS currency_code
+        FROM items i
+        JOIN currencies c ON i.currency_id = c.id
+        WHERE i.guild_id = ?
+          AND (i.is_shop = 1 OR i.is_shop IS NULL)
+        ORDER BY i.id ASC
+        """,
+        (guild_id,),
+    )
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return [dict(r) for r in rows]
 
 
 async def get_items(guild_id: int):
@@ -550,26 +1452,12 @@ async def get_items(guild_id: int):
     상점에서 쓸 아이템 목록.
     is_shop = 1 인 아이템만 반환 (이전에 만든 DB는 NULL일 수도 있어서 NULL도 포함)
     """
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute(
-            """
-            SELECT i.*, c.name AS currency_name, c.code AS currency_code
-            FROM items i
-            JOIN currencies c ON i.currency_id = c.id
-            WHERE i.guild_id = ?
-              AND (i.is_shop = 1 OR i.is_shop IS NULL)
-            ORDER BY i.id ASC
-            """,
-            (guild_id,),
-        )
-        rows = await cursor.fetchall()
-        await cursor.close()
-        return [dict(r) for r in rows]
+    async with acquire() as db:
+        return await _get_items(db, guild_id)
 
 
 async def get_item_by_id(guild_id: int, item_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             """
@@ -586,7 +1474,7 @@ async def get_item_by_id(guild_id: int, item_id: int):
 
 
 async def get_item_by_name(guild_id: int, name: str):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             """
@@ -602,29 +1490,156 @@ async def get_item_by_name(guild_id: int, name: str):
         return dict(row) if row else None
 
 
+class HeldItems:
+    """
+    users.id → 인벤토리에 가진 아이템 id 집합 (LRU, 자동완성 힌트용).
+    인벤토리를 읽거나 _apply_inventory_delta 로 바뀔 때 같이 고친다.
+    롤백된 작업까지 되돌리지는 않으므로 정확한 개수는 항상 DB 에서 다시 확인할 것.
+    """
+
+    def __init__(self, max_size: int = 10_000):
+        self.max_size = max_size
+        self._data: OrderedDict[int, set[int]] = OrderedDict()
+
+    def get(self, db_user_id: int) -> set[int] | None:
+        held = self._data.get(db_user_id)
+        if held is not None:
+            self._data.move_to_end(db_user_id)
+        return held
+
+    def put(self, db_user_id: int, item_ids):
+        self._data[db_user_id] = set(item_ids)
+        self._data.move_to_end(db_user_id)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def add(self, db_user_id: int, item_id: int):
+        held = self._data.get(db_user_id)
+        if held is not None:
+            held.add(item_id)
+
+    def discard(self, db_user_id: int, item_id: int):
+        held = self._data.get(db_user_id)
+        if held is not None:
+            held.discard(item_id)
+
+    def clear(self):
+        self._data.clear()
+
+
+held_items = HeldItems()
+
+
+async def _get_inventory(db, db_user_id: int):
+    cursor = await db.execute(
+        """
+        SELECT inv.quantity,
+               it.name,
+               it.description,
+               it.id AS item_id
+        FROM inventories inv
+        JOIN items it ON inv.item_id = it.id
+        WHERE inv.user_id = ?
+        ORDER BY it.id ASC
+        """,
+        (db_user_id,),
+    )
+    rows = await cursor.fetchall()
+    await cursor.close()
+    held_items.put(db_user_id, (r["item_id"] for r in rows))
+    return [dict(r) for r in rows]
+
+
 async def get_inventory(db_user_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with acquire() as db:
+        return await _get_inventory(db, db_user_id)
+
+
+async def get_profile(db_user_id: int, guild_id: int) -> dict:
+    """/확인 용: 지갑 + 인벤토리를 커넥션 하나로 조회."""
+    async with acquire() as db:
+        wallet = await _get_wallet(db, db_user_id, guild_id)
+        inventory = await _get_inventory(db, db_user_id)
+    return {"wallet": wallet, "inventory": inventory}
+
+
+async def _get_item_quantity(db, db_user_id: int, item_id: int) -> int:
+    cursor = await db.execute(
+        "SELECT quantity FROM inventories WHERE user_id = ? AND item_id = ?",
+        (db_user_id, item_id),
+    )
+    row = await cursor.fetchone()
+    await cursor.close()
+    return row[0] if row else 0
+
+
+async def get_item_quantity(db_user_id: int, item_id: int) -> int:
+    """인벤토리에 있는 해당 아이템 개수 (없으면 0)."""
+    async with acquire() as db:
+        return await _get_item_quantity(db, db_user_id, item_id)
+
+
+async def _apply_inventory_delta(db, db_user_id: int, item_id: int, diff: int) -> int | None:
+    """
+    커넥션을 받아서 인벤토리 증감 (커밋은 호출한 쪽에서).
+    - diff > 0 : UPSERT 로 더하고 최종 개수 반환
+    - diff < 0 : 보유 개수가 충분할 때만 빼고 최종 개수 반환, 부족하면 None
+                 0개가 되면 행 삭제
+    - diff = 0 : 쓰지 않고 현재 개수만 반환 (0개짜리 행을 만들지 않는다)
+    """
+    if diff == 0:
+        return await _get_item_quantity(db, db_user_id, item_id)
+    if diff > 0:
         cursor = await db.execute(
             """
-            SELECT inv.quantity,
-                   it.name,
-                   it.description,
-                   it.id AS item_id
-            FROM inventories inv
-            JOIN items it ON inv.item_id = it.id
-            WHERE inv.user_id = ?
-            ORDER BY it.id ASC
+            INSERT INTO inventories (user_id, item_id, quantity)
+            VALUES (?, ?, ?)
+            ON CONFLICT(user_id, item_id)
+            DO UPDATE SET quantity = inventories.quantity + excluded.quantity
+            RETURNING quantity
             """,
-            (db_user_id,),
+            (db_user_id, item_id, diff),
         )
-        rows = await cursor.fetchall()
+        row = await cursor.fetchone()
         await cursor.close()
-        return [dict(r) for r in rows]
-    
+        held_items.add(db_user_id, item_id)
+        return row[0]
+
+    need = -diff
+    cursor = await db.execute(
+        """
+        UPDATE inventories
+           SET quantity = quantity - ?
+         WHERE user_id = ? AND item_id = ? AND quantity >= ?
+        RETURNING id, quantity
+        """,
+        (need, db_user_id, item_id, need),
+    )
+    row = await cursor.fetchone()
+    await cursor.close()
+    if not row:
+        return None
+
+    inv_id, new_qty = row
+    if new_qty <= 0:
+        await db.execute("DELETE FROM inventories WHERE id = ?", (inv_id,))
+        held_items.discard(db_user_id, item_id)
+    return new_qty
+
+
+async def apply_inventory_delta(db_user_id: int, item_id: int, diff: int) -> int | None:
+    """
+    인벤토리 아이템 개수 증감 후 최종 개수 반환.
+    빼려는 개수가 보유량보다 많으면 아무것도 바꾸지 않고 None 반환.
+    """
+    return await write_queue.submit(
+        lambda db: _apply_inventory_delta(db, db_user_id, item_id, diff)
+    )
+
+
 async def get_shop_item_by_name(guild_id: int, name: str):
     """상점에서 구매 가능한 아이템만 이름으로 조회 (중복이면 최신 ID 우선)"""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             """
@@ -645,7 +1660,7 @@ async def get_shop_item_by_name(guild_id: int, name: str):
 
 async def get_item_by_name_any(guild_id: int, name: str):
     """상점/이벤트/관리자/낚시 등 타입 상관없이 아이템 이름으로 조회"""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         db.row_factory = aiosqlite.Row
         cur = await db.execute(
             """
@@ -660,6 +1675,1078 @@ async def get_item_by_name_any(guild_id: int, name: str):
         await cur.close()
         return dict(row) if row else None
 
+# ---------------------------------------------------------
+# 상점 카탈로그 캐시 (/상점, /이벤트상점, /판매상점, /선택구매)
+# ---------------------------------------------------------
+
+class ShopCatalog:
+    """
+    길드 하나의 상점 목록 스냅샷.
+    - normal : 메인 재화로 사는 아이템
+    - event  : 그 외 재화로 사는 아이템
+    - sell   : 판매 상점 목록
+    - embeds : 봇 쪽에서 미리 만들어 둔 임베드를 넣어두는 자리 (종류 → 아무 값)
+    재고만 바뀌면 목록을 다시 만들지 않고 patch_stock() 으로 해당 아이템만 고친다.
+    embeds 쪽은 changed(아이템 id → 변경 번호)를 보고 필요한 칸만 다시 그리면 된다.
+    """
+
+    def __init__(self, guild_id: int, main_currency_id: int | None, items: list[dict], sell: list[dict]):
+        self.guild_id = guild_id
+        self.main_currency_id = main_currency_id
+        self.items = items
+        self.items_by_id = {it["id"]: it for it in items}
+        self.normal = [
+            it for it in items
+            if main_currency_id is not None and it["currency_id"] == main_currency_id
+        ]
+        self.event = [
+            it for it in items
+            if main_currency_id is not None and it["currency_id"] != main_currency_id
+        ]
+        self.sell = sell
+        self.embeds: dict = {}
+        self.version = 0
+        self.changed: dict[int, int] = {}
+
+    def patch_stock(self, item_id: int, stock: int | None):
+        item = self.items_by_id.get(item_id)
+        if item is None or item["stock"] == stock:
+            return
+        item["stock"] = stock
+        self.version += 1
+        self.changed[item_id] = self.version
+
+
+_shop_catalogs: dict[int, ShopCatalog] = {}
+
+
+async def get_shop_catalog(guild_id: int) -> ShopCatalog:
+    catalog = _shop_catalogs.get(guild_id)
+    if catalog is not None:
+        return catalog
+
+    config = await get_guild_config(guild_id)
+    async with acquire() as db:
+        items = await _get_items(db, guild_id)
+        sell = await _get_sell_items(db, guild_id)
+
+    catalog = ShopCatalog(guild_id, config.main_currency_id, items, sell)
+    _shop_catalogs[guild_id] = catalog
+    return catalog
+
+
+def invalidate_shop_catalog(guild_id: int):
+    """아이템/가격/판매 목록/재화가 바뀐 뒤 호출."""
+    _shop_catalogs.pop(guild_id, None)
+
+
+def patch_shop_catalog_stock(guild_id: int, item_id: int, stock: int | None):
+    """재고만 바뀐 경우: 캐시가 있으면 그 아이템 재고만 고친다."""
+    catalog = _shop_catalogs.get(guild_id)
+    if catalog is not None:
+        catalog.patch_stock(item_id, stock)
+
+
+# ---------------------------------------------------------
+# 아이템 이름 색인 (자동완성: /구매, /판매, /아이템선물, /정산아이템 …)
+# ---------------------------------------------------------
+
+def name_key(name: str) -> str:
+    """비교용 이름: 공백 제거 + 대소문자 무시."""
+    return "".join(name.split()).casefold()
+
+
+_CHO = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONG = (
+    "", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ",
+    "ㄿ", "ㅀ", "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ",
+)
+
+
+def decompose_hangul(text: str) -> str:
+    """완성형 한글을 자모로 풀어 쓴다. (낡은 → ㄴㅏㄺㅇㅡㄴ) 한글이 아니면 그대로."""
+    out = []
+    for ch in text:
+        code = ord(ch) - 0xAC00
+        if 0 <= code < 11172:
+            out.append(_CHO[code // 588])
+            out.append(_JUNG[code % 588 // 28])
+            out.append(_JONG[code % 28])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def name_grams(name: str) -> frozenset[str]:
+    """오타 비교용: 자모로 푼 이름(공백 무시)의 2-gram. 앞뒤 경계도 한 글자로 친다."""
+    jamo = f"^{decompose_hangul(name_key(name))}$"
+    return frozenset(jamo[i:i + 2] for i in range(len(jamo) - 1))
+
+
+# 이 점수(Dice 계수, 0~1) 이상만 "혹시 ○○?" 로 추천
+FUZZY_MIN_SCORE = 0.5
+
+
+class ItemNameIndex:
+    """
+    길드 하나의 아이템 이름 색인.
+    - keys     : (비교용 이름, id) 정렬 목록 → 자동완성 접두어 검색 (bisect)
+    - postings : 자모 2-gram → 아이템 id 집합 → 오타 추천 후보 찾기
+    아이템 추가/이름 변경/삭제 때 upsert()/remove() 로 그 아이템만 고친다.
+    DB 는 전혀 건드리지 않는다.
+    """
+
+    def __init__(self, items: list[dict], sell_ids: set[int]):
+        self.by_id: dict[int, dict] = {}
+        self.keys: list[tuple[str, int]] = []
+        self.grams: dict[int, frozenset[str]] = {}
+        self.postings: dict[str, set[int]] = {}
+        for it in items:
+            self.upsert(
+                it["id"],
+                it["name"],
+                is_shop=it["is_shop"] is None or bool(it["is_shop"]),
+                sellable=it["id"] in sell_ids,
+            )
+
+    def upsert(self, item_id: int, name: str | None = None, *, is_shop=None, sellable=None):
+        """아이템 하나 추가/수정. None 인 값은 그대로 둔다. (없는 아이템은 name 이 있어야 추가)"""
+        entry = self.by_id.get(item_id)
+        if entry is None:
+            if name is None:
+                return
+            entry = {"id": item_id, "name": name, "is_shop": True, "sellable": False}
+            self.by_id[item_id] = entry
+            self._add_name(item_id, name)
+        elif name is not None and name != entry["name"]:
+            self._drop_name(item_id, entry["name"])
+            entry["name"] = name
+            self._add_name(item_id, name)
+
+        if is_shop is not None:
+            entry["is_shop"] = bool(is_shop)
+        if sellable is not None:
+            entry["sellable"] = bool(sellable)
+
+    def remove(self, item_id: int):
+        entry = self.by_id.pop(item_id, None)
+        if entry is not None:
+            self._drop_name(item_id, entry["name"])
+
+    def _add_name(self, item_id: int, name: str):
+        insort(self.keys, (name_key(name), item_id))
+        grams = name_grams(name)
+        self.grams[item_id] = grams
+        for g in grams:
+            self.postings.setdefault(g, set()).add(item_id)
+
+    def _drop_name(self, item_id: int, name: str):
+        key = (name_key(name), item_id)
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+        for g in self.grams.pop(item_id, ()):
+            ids = self.postings.get(g)
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del self.postings[g]
+
+    def search(self, prefix: str, *, predicate=None, limit: int = 25) -> list[dict]:
+        """자동완성: 비교용 이름이 prefix 로 시작하는 아이템."""
+        key = name_key(prefix)
+        found = []
+        for i in range(bisect_left(self.keys, (key,)), len(self.keys)):
+            k, item_id = self.keys[i]
+            if not k.startswith(key):
+                break
+            entry = self.by_id[item_id]
+            if predicate is None or predicate(entry):
+                found.append(entry)
+                if len(found) >= limit:
+                    break
+        return found
+
+    def suggest(
+        self,
+        name: str,
+        *,
+        predicate=None,
+        limit: int = 3,
+        min_score: float = FUZZY_MIN_SCORE,
+    ) -> list[dict]:
+        """오타 추천: 자모 2-gram 이 많이 겹치는 순 (Dice 계수)."""
+        grams = name_grams(name)
+        shared: dict[int, int] = {}
+        for g in grams:
+            for item_id in self.postings.get(g, ()):
+                shared[item_id] = shared.get(item_id, 0) + 1
+
+        scored = []
+        for item_id, n in shared.items():
+            score = 2 * n / (len(grams) + len(self.grams[item_id]))
+            entry = self.by_id[item_id]
+            if score >= min_score and (predicate is None or predicate(entry)):
+                scored.append((score, entry))
+        scored.sort(key=lambda se: (-se[0], se[1]["name"]))
+        return [entry for _, entry in scored[:limit]]
+
+
+_item_name_indexes: dict[int, ItemNameIndex] = {}
+_item_name_versions: dict[int, int] = {}
+_item_name_rebuilds: dict[int, asyncio.Task] = {}
+
+
+def _group_item_name_rows(items, sells) -> dict[int, ItemNameIndex]:
+    by_guild: dict[int, list[dict]] = {}
+    for r in items:
+        by_guild.setdefault(r["guild_id"], []).append(dict(r))
+    sell_ids: dict[int, set[int]] = {}
+    for r in sells:
+        sell_ids.setdefault(r["guild_id"], set()).add(r["item_id"])
+    return {g: ItemNameIndex(rows, sell_ids.get(g, set())) for g, rows in by_guild.items()}
+
+
+async def load_item_name_indexes() -> int:
+    """봇 시작 시 모든 길드 색인을 쿼리 두 번으로 만든다. 만든 길드 수 반환."""
+    async with acquire() as db:
+        cursor = await db.execute("SELECT guild_id, id, name, is_shop FROM items")
+        items = await cursor.fetchall()
+        await cursor.close()
+        cursor = await db.execute("SELECT guild_id, item_id FROM sell_shop_items")
+        sells = await cursor.fetchall()
+        await cursor.close()
+
+    _item_name_indexes.update(_group_item_name_rows(items, sells))
+    return len(_item_name_indexes)
+
+
+async def _build_item_name_index(guild_id: int) -> ItemNameIndex:
+    async with acquire() as db:
+        cursor = await db.execute(
+            "SELECT guild_id, id, name, is_shop FROM items WHERE guild_id = ?",
+            (guild_id,),
+        )
+        items = await cursor.fetchall()
+        await cursor.close()
+        cursor = await db.execute(
+            "SELECT guild_id, item_id FROM sell_shop_items WHERE guild_id = ?",
+            (guild_id,),
+        )
+        sells = await cursor.fetchall()
+        await cursor.close()
+    return _group_item_name_rows(items, sells).get(guild_id) or ItemNameIndex([], set())
+
+
+async def _rebuild_item_name_index(guild_id: int):
+    try:
+        while True:
+            version = _item_name_versions.get(guild_id, 0)
+            index = await _build_item_name_index(guild_id)
+            _item_name_indexes[guild_id] = index
+            # 다시 만드는 사이에 또 바뀌었으면 한 번 더
+            if _item_name_versions.get(guild_id, 0) == version:
+                break
+    finally:
+        _item_name_rebuilds.pop(guild_id, None)
+
+
+async def get_item_name_index(guild_id: int) -> ItemNameIndex:
+    """
+    자동완성용 색인. 시작할 때 다 만들어 두므로 보통 쿼리 0번.
+    바뀐 뒤 다시 만드는 중이면 끝날 때까지 이전 색인을 그대로 쓴다.
+    """
+    index = _item_name_indexes.get(guild_id)
+    if index is None:
+        index = await _build_item_name_index(guild_id)
+        _item_name_indexes[guild_id] = index
+    return index
+
+
+def invalidate_item_name_index(guild_id: int):
+    """
+    아이템이 한꺼번에 많이 바뀐 뒤 호출: 백그라운드에서 통째로 다시 만든다.
+    아이템 하나만 바뀌었으면 index_item_name()/unindex_item_name() 으로 충분하다.
+    """
+    _item_name_versions[guild_id] = _item_name_versions.get(guild_id, 0) + 1
+    if guild_id not in _item_name_indexes or guild_id in _item_name_rebuilds:
+        return
+    try:
+        _item_name_rebuilds[guild_id] = asyncio.get_running_loop().create_task(
+            _rebuild_item_name_index(guild_id)
+        )
+    except RuntimeError:
+        # 이벤트 루프 밖(오프라인 스크립트 등): 다음 조회 때 새로 만든다
+        _item_name_indexes.pop(guild_id, None)
+
+
+def index_item_name(guild_id: int, item_id: int, name: str | None = None, *, is_shop=None, sellable=None):
+    """아이템 하나 추가/이름 변경/상점 노출/판매 등록 여부를 색인에 반영 (None 은 그대로)."""
+    _item_name_versions[guild_id] = _item_name_versions.get(guild_id, 0) + 1
+    index = _item_name_indexes.get(guild_id)
+    if index is not None:
+        index.upsert(item_id, name, is_shop=is_shop, sellable=sellable)
+
+
+def unindex_item_name(guild_id: int, item_id: int):
+    """아이템이 DB 에서 지워졌을 때."""
+    _item_name_versions[guild_id] = _item_name_versions.get(guild_id, 0) + 1
+    index = _item_name_indexes.get(guild_id)
+    if index is not None:
+        index.remove(item_id)
+
+
+_held_warming: set[tuple[int, int]] = set()
+# 이벤트 루프는 태스크를 약하게만 참조하므로 끝날 때까지 여기서 붙잡아 둔다
+_held_warm_tasks: set[asyncio.Task] = set()
+
+
+async def _warm_held_items(guild_id: int, user_id: int):
+    try:
+        await get_inventory(await get_user_id(guild_id, user_id))
+    finally:
+        _held_warming.discard((guild_id, user_id))
+
+
+def peek_held_items(guild_id: int, user_id: int) -> set[int] | None:
+    """
+    디스코드 유저가 가진 아이템 id 집합 (쿼리 없이, 메모리에 있을 때만).
+    없으면 None 을 주고 백그라운드에서 인벤토리를 읽어 둔다. 다음 자동완성부터 걸러진다.
+    """
+    db_user_id = identity_cache.get(guild_id, user_id)
+    held = held_items.get(db_user_id) if db_user_id is not None else None
+    if held is None and (guild_id, user_id) not in _held_warming:
+        _held_warming.add((guild_id, user_id))
+        key = (guild_id, user_id)
+        task = asyncio.get_running_loop().create_task(_warm_held_items(guild_id, user_id))
+        _held_warm_tasks.add(task)
+        # 시작 전에 취소되면 finally 가 안 돌므로 여기서도 표시를 지운다
+        task.add_done_callback(lambda t: (_held_warm_tasks.discard(t), _held_warming.discard(key)))
+    return held
+
+
+# ---------------------------------------------------------
+# 상점 페이지 (키셋 페이지네이션: /상점, /선택구매, /아이템관리)
+# ---------------------------------------------------------
+
+SHOP_PAGE_SIZE = 10
+
+# 분류 → 추가 조건 (메인 재화 id 를 인자로 받는다)
+# 페이지/개수 쿼리는 ShopCatalog(_get_items) 와 똑같이 currencies 와 INNER JOIN 해서
+# 재화가 없는(NULL/삭제된) 아이템은 어느 분류에도 넣지 않는다
+SHOP_CATEGORIES = {
+    "all": "",
+    "normal": "AND i.currency_id = ?",
+    "event": "AND i.currency_id != ?",
+}
+
+
+async def _shop_page_filter(guild_id: int, category: str, in_stock: bool) -> tuple[str, list] | None:
+    """WHERE 뒤에 붙일 조건과 인자. 메인 재화가 없어서 분류를 못 나누면 None."""
+    where = SHOP_CATEGORIES[category]
+    params: list = [guild_id]
+    if where:
+        config = await get_guild_config(guild_id)
+        if config.main_currency_id is None:
+            return None
+        params.append(config.main_currency_id)
+    if in_stock:
+        where += " AND (i.stock IS NULL OR i.stock > 0)"
+    return where, params
+
+
+async def get_shop_page(
+    guild_id: int,
+    *,
+    category: str = "all",
+    after_id: int | None = None,
+    before_id: int | None = None,
+    page: int | None = None,
+    limit: int = SHOP_PAGE_SIZE,
+    in_stock: bool = False,
+) -> list[dict]:
+    """
+    상점 아이템 한 페이지 (id 오름차순).
+    - after_id  : 이 id 다음부터 (다음 페이지)
+    - before_id : 이 id 이전까지 (이전 페이지)
+    - page      : 0부터 센 페이지 번호로 바로 이동 (시작 id 하나만 OFFSET 으로 찾는다)
+    셋 다 없으면 첫 페이지.
+    """
+    flt = await _shop_page_filter(guild_id, category, in_stock)
+    if flt is None:
+        return []
+    where, params = flt
+
+    base = f"""
+        FROM items AS i
+        JOIN currencies AS c ON i.currency_id = c.id
+       WHERE i.guild_id = ?
+         AND (i.is_shop = 1 OR i.is_shop IS NULL)
+         {where}
+    """
+    columns = "SELECT i.*, c.name AS currency_name, c.code AS currency_code"
+
+    async with acquire() as db:
+        if page is not None:
+            cursor = await db.execute(
+                f"SELECT i.id {base} ORDER BY i.id LIMIT 1 OFFSET ?",
+                (*params, max(0, page) * limit),
+            )
+            row = await cursor.fetchone()
+            await cursor.close()
+            if row is None:
+                return []
+            after_id = row[0] - 1
+
+        if before_id is not None:
+            cursor = await db.execute(
+                f"{columns} {base} AND i.id < ? ORDER BY i.id DESC LIMIT ?",
+                (*params, before_id, limit),
+            )
+            rows = await cursor.fetchall()
+            await cursor.close()
+            return [dict(r) for r in reversed(rows)]
+
+        cursor = await db.execute(
+            f"{columns} {base} AND i.id > ? ORDER BY i.id LIMIT ?",
+            (*params, after_id if after_id is not None else 0, limit),
+        )
+        rows = await cursor.fetchall()
+        await cursor.close()
+    return [dict(r) for r in rows]
+
+
+async def count_shop_items(guild_id: int, *, category: str = "all", in_stock: bool = False) -> int:
+    """페이지 수 표시용 개수."""
+    flt = await _shop_page_filter(guild_id, category, in_stock)
+    if flt is None:
+        return 0
+    where, params = flt
+
+    async with acquire() as db:
+        cursor = await db.execute(
+            f"""
+            SELECT COUNT(*)
+              FROM items AS i
+              JOIN currencies AS c ON i.currency_id = c.id
+             WHERE i.guild_id = ?
+               AND (i.is_shop = 1 OR i.is_shop IS NULL)
+               {where}
+            """,
+            params,
+        )
+        row = await cursor.fetchone()
+        await cursor.close()
+    return row[0]
+
+
+# ---------------------------------------------------------
+# 구매 엔진 (/구매, /선택구매 공용)
+# ---------------------------------------------------------
+
+@dataclass
+class PurchaseResult:
+    """
+    purchase() 결과.
+    status : "ok" | "not_found" | "out_of_stock" | "insufficient_funds"
+    balance: 성공이면 결제 후 소지금, 실패면 현재 소지금
+    stock  : 성공이면 구매 후 재고, 실패면 현재 재고 (None = 무제한)
+    """
+    status: str
+    item: dict | None = None
+    quantity: int = 0
+    total_price: int = 0
+    balance: int = 0
+    stock: int | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+async def purchase(guild_id: int, db_user_id: int, item_id: int, qty: int) -> PurchaseResult:
+    """
+    상점 아이템 구매를 한 트랜잭션(BEGIN IMMEDIATE)으로 처리.
+    1) 재고는 stock >= qty 일 때만 차감
+    2) 재화는 amount >= 총액 일 때만 차감
+    3) 인벤토리에 qty 추가
+    중간에 하나라도 실패하면 전부 롤백하고 실패 사유를 돌려준다.
+    (쓰기 큐에서 다른 작업들과 한 트랜잭션으로 묶여 커밋된다)
+    """
+    result = await write_queue.submit(
+        lambda db: _purchase(db, guild_id, db_user_id, item_id, qty)
+    )
+    if result.item is not None:
+        # 상점 목록은 다시 만들지 않고 재고 칸만 고친다
+        patch_shop_catalog_stock(guild_id, item_id, result.stock)
+    return result
+
+
+async def _purchase(db, guild_id: int, db_user_id: int, item_id: int, qty: int) -> PurchaseResult:
+    cursor = await db.execute(
+        """
+        SELECT i.*, c.name AS currency_name, c.code AS currency_code
+          FROM items i
+          JOIN currencies c ON i.currency_id = c.id
+         WHERE i.guild_id = ? AND i.id = ?
+           AND (i.is_shop = 1 OR i.is_shop IS NULL)
+        """,
+        (guild_id, item_id),
+    )
+    row = await cursor.fetchone()
+    await cursor.close()
+    if not row:
+        raise JobAbort(PurchaseResult("not_found", quantity=qty))
+
+    item = dict(row)
+    total_price = item["price"] * qty
+    result = PurchaseResult(
+        "ok", item=item, quantity=qty, total_price=total_price, stock=item["stock"]
+    )
+
+    # 1) 재고 차감 (무제한이면 건너뜀)
+    if item["stock"] is not None:
+        cursor = await db.execute(
+            """
+            UPDATE items
+               SET stock = stock - ?
+             WHERE id = ? AND stock IS NOT NULL AND stock >= ?
+            RETURNING stock
+            """,
+            (qty, item_id, qty),
+        )
+        row = await cursor.fetchone()
+        await cursor.close()
+        if not row:
+            result.status = "out_of_stock"
+            result.balance = await _get_balance(db, db_user_id, item["currency_id"])
+            raise JobAbort(result)
+        result.stock = row[0]
+
+    # 2) 재화 차감 (잔액이 충분할 때만)
+    cursor = await db.execute(
+        """
+        UPDATE balances
+           SET amount = amount - ?
+         WHERE user_id = ? AND currency_id = ? AND amount >= ?
+        RETURNING amount
+        """,
+        (total_price, db_user_id, item["currency_id"], total_price),
+    )
+    row = await cursor.fetchone()
+    await cursor.close()
+    if row:
+        result.balance = row[0]
+    elif total_price <= 0:
+        # 0원 아이템: 잔액 행이 없어도 구매 가능
+        result.balance = 0
+    else:
+        result.status = "insufficient_funds"
+        result.stock = item["stock"]
+        result.balance = await _get_balance(db, db_user_id, item["currency_id"])
+        raise JobAbort(result)
+
+    # 3) 인벤토리 지급
+    await _apply_inventory_delta(db, db_user_id, item_id, qty)
+
+    return result
+
+
+# ---------------------------------------------------------
+# 선물 (/재화선물, /아이템선물)
+# ---------------------------------------------------------
+
+@dataclass
+class TransferResult:
+    """
+    transfer_currency() / transfer_item() 결과.
+    status  : "ok" | "insufficient"
+    sender  : 성공이면 보낸 뒤 보낸 사람 잔액(개수), 실패면 현재 잔액(개수)
+    receiver: 성공이면 받은 뒤 받는 사람 잔액(개수), 실패면 None
+    """
+    status: str
+    sender: int = 0
+    receiver: int | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+async def transfer_currency(
+    sender_id: int, receiver_id: int, currency_id: int, amount: int
+) -> TransferResult:
+    """보낸 사람 잔액이 충분할 때만 빼고, 같은 트랜잭션에서 받는 사람에게 더한다."""
+    return await write_queue.submit(
+        lambda db: _transfer_currency(db, sender_id, receiver_id, currency_id, amount)
+    )
+
+
+async def _transfer_currency(db, sender_id: int, receiver_id: int, currency_id: int, amount: int):
+    cursor = await db.execute(
+        """
+        UPDATE balances
+           SET amount = amount - ?
+         WHERE user_id = ? AND currency_id = ? AND amount >= ?
+        RETURNING amount
+        """,
+        (amount, sender_id, currency_id, amount),
+    )
+    row = await cursor.fetchone()
+    await cursor.close()
+    if row is None:
+        return TransferResult("insufficient", sender=await _get_balance(db, sender_id, currency_id))
+
+    receiver = await _apply_balance_delta(db, receiver_id, currency_id, amount)
+    return TransferResult("ok", sender=row[0], receiver=receiver)
+
+
+async def transfer_item(sender_id: int, receiver_id: int, item_id: int, qty: int) -> TransferResult:
+    """보낸 사람이 qty 개 이상 가졌을 때만 옮긴다. (0개가 되면 행 삭제)"""
+    return await write_queue.submit(
+        lambda db: _transfer_item(db, sender_id, receiver_id, item_id, qty)
+    )
+
+
+async def _transfer_item(db, sender_id: int, receiver_id: int, item_id: int, qty: int):
+    sender = await _apply_inventory_delta(db, sender_id, item_id, -qty)
+    if sender is None:
+        cursor = await db.execute(
+            "SELECT quantity FROM inventories WHERE user_id = ? AND item_id = ?",
+            (sender_id, item_id),
+        )
+        row = await cursor.fetchone()
+        await cursor.close()
+        return TransferResult("insufficient", sender=row[0] if row else 0)
+
+    receiver = await _apply_inventory_delta(db, receiver_id, item_id, qty)
+    return TransferResult("ok", sender=sender, receiver=receiver)
+
+
+# ---------------------------------------------------------
+# 단체 정산 / 선물 (역할, 여러 명: /단체정산, /단체아이템정산, /단체선물)
+# ---------------------------------------------------------
+
+@dataclass
+class BulkResult:
+    """
+    단체 정산/선물 결과.
+    status  : "ok" | "insufficient" (단체선물에서 보낸 사람 잔액 부족)
+    balances: 디스코드 유저 id → 처리 후 잔액(아이템이면 개수)
+    sender  : 단체선물일 때 보낸 사람 잔액 (성공이면 보낸 뒤, 실패면 현재)
+    """
+    status: str
+    balances: dict[int, int]
+    sender: int | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+async def _ensure_users(db, guild_id: int, uids_json: str):
+    """받는 사람 중 users 행이 없는 사람을 INSERT 한 번으로 만든다."""
+    await db.execute(
+        """
+        INSERT INTO users (guild_id, user_id, last_attend_date)
+        SELECT ?, j.value, NULL
+          FROM json_each(?) AS j
+         WHERE true
+        ON CONFLICT(guild_id, user_id) DO NOTHING
+        """,
+        (guild_id, uids_json),
+    )
+
+
+async def _collect_bulk(db, guild_id: int, uids_json: str, sql: str, params: tuple) -> dict[int, int]:
+    """받는 사람들의 (users.id, 디스코드 id, 처리 후 값)을 한 번에 읽고 캐시도 채운다."""
+    cursor = await db.execute(sql, params)
+    rows = await cursor.fetchall()
+    await cursor.close()
+    result = {}
+    for db_user_id, user_id, value in rows:
+        identity_cache.put(guild_id, user_id, db_user_id)
+        result[user_id] = value
+    return result
+
+
+async def _bulk_credit_balance(db, guild_id: int, uids_json: str, currency_id: int, diff: int):
+    await _ensure_users(db, guild_id, uids_json)
+    await db.execute(
+        """
+        INSERT INTO balances (user_id, currency_id, amount)
+        SELECT u.id, ?, MAX(?, 0)
+          FROM users AS u
+         WHERE u.guild_id = ?
+           AND u.user_id IN (SELECT value FROM json_each(?))
+        ON CONFLICT(user_id, currency_id)
+        DO UPDATE SET amount = MAX(balances.amount + ?, 0)
+        """,
+        (currency_id, diff, guild_id, uids_json, diff),
+    )
+    return await _collect_bulk(
+        db,
+        guild_id,
+        uids_json,
+        """
+        SELECT u.id, u.user_id, b.amount
+          FROM users AS u
+          JOIN balances AS b ON b.user_id = u.id AND b.currency_id = ?
+         WHERE u.guild_id = ?
+           AND u.user_id IN (SELECT value FROM json_each(?))
+        """,
+        (currency_id, guild_id, uids_json),
+    )
+
+
+async def bulk_apply_balance_delta(
+    guild_id: int, user_ids: list[int], currency_id: int, diff: int
+) -> BulkResult:
+    """
+    여러 디스코드 유저의 잔액을 한꺼번에 diff 만큼 증감 (0 아래로는 안 내려감).
+    users 행 만들기 + 잔액 반영 + 결과 읽기를 한 트랜잭션, 문장 세 개로 끝낸다.
+    """
+    uids_json = json.dumps(sorted(set(user_ids)))
+    balances = await write_queue.submit(
+        lambda db: _bulk_credit_balance(db, guild_id, uids_json, currency_id, diff)
+    )
+    return BulkResult("ok", balances)
+
+
+async def bulk_grant_item(guild_id: int, user_ids: list[int], item_id: int, qty: int) -> BulkResult:
+    """여러 디스코드 유저에게 아이템을 qty 개씩 지급 (qty > 0)."""
+    uids_json = json.dumps(sorted(set(user_ids)))
+
+    async def job(db):
+        await _ensure_users(db, guild_id, uids_json)
+        await db.execute(
+            """
+            INSERT INTO inventories (user_id, item_id, quantity)
+            SELECT u.id, ?, ?
+              FROM users AS u
+             WHERE u.guild_id = ?
+               AND u.user_id IN (SELECT value FROM json_each(?))
+            ON CONFLICT(user_id, item_id)
+            DO UPDATE SET quantity = inventories.quantity + excluded.quantity
+            """,
+            (item_id, qty, guild_id, uids_json),
+        )
+        quantities = await _collect_bulk(
+            db,
+            guild_id,
+            uids_json,
+            """
+            SELECT u.id, u.user_id, inv.quantity
+              FROM users AS u
+              JOIN inventories AS inv ON inv.user_id = u.id AND inv.item_id = ?
+             WHERE u.guild_id = ?
+               AND u.user_id IN (SELECT value FROM json_each(?))
+            """,
+            (item_id, guild_id, uids_json),
+        )
+        for user_id in quantities:
+            held_items.add(identity_cache.get(guild_id, user_id), item_id)
+        return quantities
+
+    return BulkResult("ok", await write_queue.submit(job))
+
+
+async def bulk_transfer_currency(
+    guild_id: int, sender_id: int, user_ids: list[int], currency_id: int, amount: int
+) -> BulkResult:
+    """
+    보낸 사람(users.id)이 amount × 인원수 를 가졌을 때만 빼고, 모두에게 amount 씩 준다.
+    user_ids 는 디스코드 id, 보낸 사람은 미리 빼 두고 넘길 것.
+    """
+    uids = sorted(set(user_ids))
+    uids_json = json.dumps(uids)
+    total = amount * len(uids)
+
+    async def job(db):
+        cursor = await db.execute(
+            """
+            UPDATE balances
+               SET amount = amount - ?
+             WHERE user_id = ? AND currency_id = ? AND amount >= ?
+            RETURNING amount
+            """,
+            (total, sender_id, currency_id, total),
+        )
+        row = await cursor.fetchone()
+        await cursor.close()
+        if row is None:
+            return BulkResult("insufficient", {}, sender=await _get_balance(db, sender_id, currency_id))
+
+        balances = await _bulk_credit_balance(db, guild_id, uids_json, currency_id, amount)
+        return BulkResult("ok", balances, sender=row[0])
+
+    return await write_queue.submit(job)
+
+
+async def has_guild_users(guild_id: int) -> bool:
+    """이 길드에 users 행이 하나라도 있는지 (/전체정산 에서 defer 전에 확인)."""
+    async with acquire() as db:
+        cursor = await db.execute(
+            "SELECT EXISTS (SELECT 1 FROM users WHERE guild_id = ?)",
+            (guild_id,),
+        )
+        row = await cursor.fetchone()
+        await cursor.close()
+    return bool(row[0])
+
+
+async def settle_all(guild_id: int, currency_id: int, diff: int) -> dict:
+    """
+    /전체정산: 이 길드 users 전원의 잔액을 diff 만큼 증감 (0 아래로는 안 내려감).
+    파이썬 반복 없이 한 트랜잭션 안에서
+      1) 실제 변화량 합계(0 바닥 반영)를 SELECT 한 번으로 미리 계산하고
+      2) INSERT … SELECT … ON CONFLICT DO UPDATE 한 번으로 전원 반영한다.
+    반환: {"affected": 대상 유저 수, "net": 실제 총 변화량, "clamped": 0 에서 멈춘 유저 수}
+    """
+
+    async def job(db):
+        cursor = await db.execute(
+            """
+            SELECT COUNT(*),
+                   COALESCE(SUM(MAX(COALESCE(b.amount, 0) + ?, 0) - COALESCE(b.amount, 0)), 0),
+                   COALESCE(SUM(COALESCE(b.amount, 0) + ? < 0), 0)
+              FROM users AS u
+              LEFT JOIN balances AS b
+                ON b.user_id = u.id AND b.currency_id = ?
+             WHERE u.guild_id = ?
+            """,
+            (diff, diff, currency_id, guild_id),
+        )
+        affected, net, clamped = await cursor.fetchone()
+        await cursor.close()
+        if affected == 0:
+            return {"affected": 0, "net": 0, "clamped": 0}
+
+        await db.execute(
+            """
+            INSERT INTO balances (user_id, currency_id, amount)
+            SELECT u.id, ?, MAX(?, 0)
+              FROM users AS u
+             WHERE u.guild_id = ?
+            ON CONFLICT(user_id, currency_id)
+            DO UPDATE SET amount = MAX(balances.amount + ?, 0)
+            """,
+            (currency_id, diff, guild_id, diff),
+        )
+        return {"affected": affected, "net": net, "clamped": clamped}
+
+    return await write_queue.submit(job)
+
+
+# ---------------------------------------------------------
+# 출석 엔진 (/출석, /재출석)
+# ---------------------------------------------------------
+
+# 출석 보상 주사위 (1d50)
+ATTEND_ROLL_MIN = 1
+ATTEND_ROLL_MAX = 50
+
+# /재출석 에 쓸 수 있는 행운 아이템 (앞에 있을수록 먼저 소모)
+LUCKY_ITEMS = ("출석 주사위", "행운의 꼬리")
+
+
+@dataclass
+class AttendanceResult:
+    """
+    claim_attendance() / claim_bonus_attendance() 결과.
+    status : "ok" | "already_claimed" | "not_attended" | "no_item"
+    balance: 성공이면 지급 후 소지금
+    used_item: /재출석 에서 소모한 아이템 이름
+    """
+    status: str
+    roll: int = 0
+    balance: int = 0
+    used_item: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+async def claim_attendance(
+    db_user_id: int, currency_id: int, date_str: str
+) -> AttendanceResult:
+    """
+    오늘 출석 처리: 날짜 조건부 UPDATE + 보상 지급을 한 트랜잭션으로.
+    같은 날 두 번 눌러도 한 번만 지급된다.
+    """
+    return await write_queue.submit(
+        lambda db: _claim_attendance(db, db_user_id, currency_id, date_str)
+    )
+
+
+async def _claim_attendance(db, db_user_id: int, currency_id: int, date_str: str):
+    cursor = await db.execute(
+        """
+        UPDATE users
+           SET last_attend_date = ?
+         WHERE id = ?
+           AND (last_attend_date IS NULL OR last_attend_date <> ?)
+        """,
+        (date_str, db_user_id, date_str),
+    )
+    if cursor.rowcount == 0:
+        return AttendanceResult("already_claimed")
+
+    await _mark_attendance_day(db, db_user_id, date_str)
+
+    roll = random.randint(ATTEND_ROLL_MIN, ATTEND_ROLL_MAX)
+    balance = await _apply_balance_delta(db, db_user_id, currency_id, roll)
+    return AttendanceResult("ok", roll=roll, balance=balance)
+
+
+async def claim_bonus_attendance(
+    guild_id: int, db_user_id: int, currency_id: int, date_str: str
+) -> AttendanceResult:
+    """
+    /재출석: 오늘 기본 출석 확인 + 보너스 날짜 기록 + 행운 아이템 1개 소모 + 보상 지급을
+    한 트랜잭션으로. 중간에 하나라도 실패하면 전부 되돌린다.
+    """
+    return await write_queue.submit(
+        lambda db: _claim_bonus_attendance(db, guild_id, db_user_id, currency_id, date_str)
+    )
+
+
+async def _claim_bonus_attendance(
+    db, guild_id: int, db_user_id: int, currency_id: int, date_str: str
+):
+    # 1) 오늘 기본 출석을 했고, 아직 재출석을 안 했을 때만 기록
+    cursor = await db.execute(
+        """
+        UPDATE users
+           SET last_bonus_attend_date = ?
+         WHERE id = ?
+           AND last_attend_date = ?
+           AND (last_bonus_attend_date IS NULL OR last_bonus_attend_date <> ?)
+        """,
+        (date_str, db_user_id, date_str, date_str),
+    )
+    if cursor.rowcount == 0:
+        cursor = await db.execute(
+            "SELECT last_attend_date FROM users WHERE id = ?",
+            (db_user_id,),
+        )
+        row = await cursor.fetchone()
+        await cursor.close()
+        if row is None or row["last_attend_date"] != date_str:
+            return AttendanceResult("not_attended")
+        return AttendanceResult("already_claimed")
+
+    # 2) 행운 아이템 1개 소모 (LUCKY_ITEMS 순서대로)
+    placeholders = ", ".join("?" for _ in LUCKY_ITEMS)
+    order = " ".join(f"WHEN ? THEN {i}" for i in range(len(LUCKY_ITEMS)))
+    cursor = await db.execute(
+        f"""
+        SELECT inv.item_id, i.name
+          FROM inventories AS inv
+          JOIN items AS i ON inv.item_id = i.id
+         WHERE inv.user_id = ?
+           AND i.guild_id = ?
+           AND i.name IN ({placeholders})
+           AND inv.quantity > 0
+         ORDER BY CASE i.name {order} END
+         LIMIT 1
+        """,
+        (db_user_id, guild_id, *LUCKY_ITEMS, *LUCKY_ITEMS),
+    )
+    row = await cursor.fetchone()
+    await cursor.close()
+    if row is None or await _apply_inventory_delta(db, db_user_id, row["item_id"], -1) is None:
+        # 보너스 날짜 기록도 같이 취소
+        raise JobAbort(AttendanceResult("no_item"))
+
+    # 3) 보상 지급
+    roll = random.randint(ATTEND_ROLL_MIN, ATTEND_ROLL_MAX)
+    balance = await _apply_balance_delta(db, db_user_id, currency_id, roll)
+    return AttendanceResult("ok", roll=roll, balance=balance, used_item=row["name"])
+
+
+# ---------------------------------------------------------
+# 출석 기록 (월별 비트맵)
+# ---------------------------------------------------------
+
+async def _mark_attendance_day(db, db_user_id: int, date_str: str):
+    """date_str('YYYY-MM-DD') 에 해당하는 비트를 켠다."""
+    await db.execute(
+        """
+        INSERT INTO attendance_history (user_id, month, days)
+        VALUES (?, ?, ?)
+        ON CONFLICT(user_id, month) DO UPDATE
+            SET days = attendance_history.days | excluded.days
+        """,
+        (db_user_id, date_str[:7], 1 << (int(date_str[8:10]) - 1)),
+    )
+
+
+def _previous_month(month: str) -> str:
+    year, mon = int(month[:4]), int(month[5:7])
+    if mon == 1:
+        return f"{year - 1:04d}-12"
+    return f"{year:04d}-{mon - 1:02d}"
+
+
+def _days_in_month(month: str) -> int:
+    return calendar.monthrange(int(month[:4]), int(month[5:7]))[1]
+
+
+def attendance_streak(months: dict[str, int], date_str: str) -> int:
+    """
+    date_str 까지 이어진 연속 출석 일수.
+    오늘 아직 출석 안 했으면 어제까지의 연속 기록을 센다.
+    months: {'YYYY-MM': 비트맵}
+    """
+    month = date_str[:7]
+    day = int(date_str[8:10])
+
+    if not months.get(month, 0) >> (day - 1) & 1:
+        # 오늘 미출석 → 어제부터
+        day -= 1
+        if day == 0:
+            month = _previous_month(month)
+            day = _days_in_month(month)
+
+    streak = 0
+    while True:
+        bits = months.get(month, 0) & ((1 << day) - 1)   # 1일 ~ day일 만
+        missing = ~bits & ((1 << day) - 1)
+        if missing:
+            # 가장 높은 '빈 날' 위쪽의 1 개수만 더하고 끝
+            return streak + day - missing.bit_length()
+        # 1일까지 다 출석 → 이전 달 말일부터 이어서
+        streak += day
+        month = _previous_month(month)
+        day = _days_in_month(month)
+        if month not in months:
+            return streak
+
+
+async def get_attendance_history(db_user_id: int, date_str: str) -> dict:
+    """
+    /출석기록 용: 이번 달 비트맵 + 연속 출석 일수 + 누적 출석 일수.
+    """
+    async with acquire() as db:
+        cursor = await db.execute(
+            "SELECT month, days FROM attendance_history WHERE user_id = ? AND month <= ?",
+            (db_user_id, date_str[:7]),
+        )
+        rows = await cursor.fetchall()
+        await cursor.close()
+
+    months = {r["month"]: r["days"] for r in rows}
+    return {
+        "month": date_str[:7],
+        "days": months.get(date_str[:7], 0),
+        "streak": attendance_streak(months, date_str),
+        "total": sum(d.bit_count() for d in months.values()),
+    }
+
+
 # ---------------------------------------------------------
 # 판매 상점(sell_shop_items) 헬퍼
 # ---------------------------------------------------------
@@ -671,7 +2758,7 @@ async def upsert_sell_item(
     currency_id: int,
 ):
     """판매 상점에 아이템 등록/수정."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             """
             INSERT INTO sell_shop_items (guild_id, item_id, price, currency_id)
@@ -683,37 +2770,42 @@ async def upsert_sell_item(
             (guild_id, item_id, price, currency_id),
         )
         await db.commit()
+    invalidate_shop_catalog(guild_id)
+    index_item_name(guild_id, item_id, sellable=True)
+
+
+async def _get_sell_items(db, guild_id: int):
+    cursor = await db.execute(
+        """
+        SELECT s.item_id,
+               s.price,
+               s.currency_id,
+               i.name AS item_name,
+               i.description AS item_description,
+               c.name AS currency_name,
+               c.code AS currency_code
+        FROM sell_shop_items s
+        JOIN items i ON s.item_id = i.id
+        JOIN currencies c ON s.currency_id = c.id
+        WHERE s.guild_id = ?
+        ORDER BY i.id ASC
+        """,
+        (guild_id,),
+    )
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return [dict(r) for r in rows]
 
 
 async def get_sell_items(guild_id: int):
     """판매 상점 전체 목록."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute(
-            """
-            SELECT s.item_id,
-                   s.price,
-                   s.currency_id,
-                   i.name AS item_name,
-                   i.description AS item_description,
-                   c.name AS currency_name,
-                   c.code AS currency_code
-            FROM sell_shop_items s
-            JOIN items i ON s.item_id = i.id
-            JOIN currencies c ON s.currency_id = c.id
-            WHERE s.guild_id = ?
-            ORDER BY i.id ASC
-            """,
-            (guild_id,),
-        )
-        rows = await cursor.fetchall()
-        await cursor.close()
-        return [dict(r) for r in rows]
+    async with acquire() as db:
+        return await _get_sell_items(db, guild_id)
 
 
 async def get_sell_item_by_name(guild_id: int, item_name: str):
     """판매 상점에서 아이템 이름으로 1개 찾기."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             """
@@ -734,15 +2826,6 @@ async def get_sell_item_by_name(guild_id: int, item_name: str):
         await cursor.close()
         return dict(row) if row else None
 
-async def update_user_last_bonus_attend(user_pk: int, date_str: str):
-    """보너스 출석을 한 날짜를 기록하는 함수"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            "UPDATE users SET last_bonus_attend_date = ? WHERE id = ?",
-            (date_str, user_pk),
-        )
-        await db.commit()
-
 async def upsert_shop_item_by_name(
     guild_id: int,
     name: str,
@@ -755,49 +2838,27 @@ async def upsert_shop_item_by_name(
     같은 이름 아이템이 이미 있으면(숨김 포함) INSERT 대신 UPDATE로 '복구/갱신'
     - 숨김(is_shop=0)으로 삭제했던 아이템을 다시 상점에 올릴 때 중복 방지
     """
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-
-        cur = await db.execute(
-            """
-            SELECT id
-              FROM items
-             WHERE guild_id = ? AND name = ?
-             ORDER BY id DESC
-             LIMIT 1
-            """,
-            (guild_id, name),
-        )
-        row = await cur.fetchone()
-        await cur.close()
-
-        if row:
-            item_id = row["id"]
-            await db.execute(
-                """
-                UPDATE items
-                   SET price = ?,
-                       description = ?,
-                       currency_id = ?,
-                       stock = ?,
-                       is_shop = 1
-                 WHERE id = ? AND guild_id = ?
-                """,
-                (price, description, currency_id, stock, item_id, guild_id),
-            )
-            await db.commit()
-            return item_id
-
-        # 없으면 새로 생성
+    async with acquire() as db:
         cur = await db.execute(
             """
             INSERT INTO items (guild_id, name, price, description, currency_id, stock, is_shop)
             VALUES (?, ?, ?, ?, ?, ?, 1)
+            ON CONFLICT(guild_id, name)
+            DO UPDATE SET price = excluded.price,
+                          description = excluded.description,
+                          currency_id = excluded.currency_id,
+                          stock = excluded.stock,
+                          is_shop = 1
+            RETURNING id
             """,
             (guild_id, name, price, description, currency_id, stock),
         )
+        row = await cur.fetchone()
+        await cur.close()
         await db.commit()
-        return cur.lastrowid
+    invalidate_shop_catalog(guild_id)
+    index_item_name(guild_id, row[0], name, is_shop=True)
+    return row[0]
 
 # ---------------------------------------------------------
 # 낚시(fishing_loot) 헬퍼
@@ -809,7 +2870,7 @@ async def upsert_fishing_loot(
     chance: float,
 ):
     """낚시 확률 테이블에 아이템 등록/수정."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             """
             INSERT INTO fishing_loot (guild_id, item_id, chance)
@@ -820,11 +2881,80 @@ async def upsert_fishing_loot(
             (guild_id, item_id, chance),
         )
         await db.commit()
-async def get_fishing_daily_count(guild_id: int, db_user_id: int, date_str: str) -> int:
+    invalidate_loot_table(guild_id)
+
+
+async def delete_fishing_loot(guild_id: int, item_id: int | None = None):
+    """낚시 확률 삭제. item_id 가 없으면 길드 전체 초기화."""
+    async with acquire() as db:
+        if item_id is None:
+            await db.execute(
+                "DELETE FROM fishing_loot WHERE guild_id = ?",
+                (guild_id,),
+            )
+        else:
+            await db.execute(
+                "DELETE FROM fishing_loot WHERE guild_id = ? AND item_id = ?",
+                (guild_id, item_id),
+            )
+        await db.commit()
+    invalidate_loot_table(guild_id)
+
+
+@dataclass
+class FishingResult:
     """
-    해당 길드/유저/날짜(KST 기준)에 오늘 몇 번 낚시했는지 반환.
+    cast_fishing 결과.
+    - casts   : 실제로 던진 횟수 (남은 횟수보다 많이 요청하면 잘림, 0 이면 오늘 횟수 소진)
+    - count   : 처리 후 오늘 사용한 횟수
+    - catches : 던진 순서대로 획득한 낚시 항목 (꽝은 None)
     """
-    async with aiosqlite.connect(DB_PATH) as db:
+
+    casts: int
+    count: int
+    catches: list
+
+    @property
+    def caught(self) -> list[dict]:
+        return [c for c in self.catches if c is not None]
+
+
+# 오늘 횟수를 다 쓴 유저 (날짜 → {(guild_id, users.id)})
+# 여기 있으면 DB 를 안 거치고 바로 거절한다. 날짜가 바뀌면 통째로 비워진다.
+_fishing_capped: dict[str, set[tuple[int, int]]] = {}
+
+
+def _mark_fishing_capped(guild_id: int, db_user_id: int, date_str: str):
+    if date_str not in _fishing_capped:
+        _fishing_capped.clear()
+        _fishing_capped[date_str] = set()
+    _fishing_capped[date_str].add((guild_id, db_user_id))
+
+
+def is_fishing_capped(guild_id: int, db_user_id: int, date_str: str) -> bool:
+    return (guild_id, db_user_id) in _fishing_capped.get(date_str, ())
+
+
+def reset_fishing_capped(guild_id: int | None = None):
+    """guild_id 가 없으면 전체, 있으면 그 길드 기록만 지운다."""
+    if guild_id is None:
+        _fishing_capped.clear()
+        return
+    for capped in _fishing_capped.values():
+        capped.difference_update({k for k in capped if k[0] == guild_id})
+
+
+async def _claim_fishing_casts(
+    db, guild_id: int, db_user_id: int, date_str: str, casts: int, max_per_day: int
+) -> tuple[int, int]:
+    """
+    제한(max_per_day) 안에서만 오늘 횟수를 올리는 조건부 upsert.
+    (이번에 허용된 횟수, 처리 후 count) 반환. 이미 다 썼으면 (0, count).
+    """
+    used = 0
+    if casts > 1:
+        # 여러 번 던질 때만 '몇 번이 허용됐는지' 계산용으로 이전 값을 본다
+        # (같은 쓰기 트랜잭션 안이라 그 사이에 바뀌지 않음)
         cursor = await db.execute(
             """
             SELECT count FROM fishing_limits
@@ -834,51 +2964,119 @@ async def get_fishing_daily_count(guild_id: int, db_user_id: int, date_str: str)
         )
         row = await cursor.fetchone()
         await cursor.close()
+        used = row[0] if row else 0
+
+    cursor = await db.execute(
+        """
+        INSERT INTO fishing_limits (guild_id, user_id, date, count)
+        VALUES (?, ?, ?, MIN(?, ?))
+        ON CONFLICT(guild_id, user_id, date) DO UPDATE
+            SET count = MIN(fishing_limits.count + excluded.count, ?)
+            WHERE fishing_limits.count < ?
+        RETURNING count
+        """,
+        (guild_id, db_user_id, date_str, casts, max_per_day, max_per_day, max_per_day),
+    )
+    row = await cursor.fetchone()
+    await cursor.close()
+
+    if row is None:
+        # 이미 제한에 도달 → 아무것도 바뀌지 않음
+        return 0, max(used, max_per_day)
+    new_count = row[0]
+    return (new_count - used if casts > 1 else 1), new_count
+
+
+async def cast_fishing(
+    guild_id: int,
+    db_user_id: int,
+    date_str: str,
+    loot_table: "LootTable",
+    casts: int,
+    max_per_day: int,
+) -> FishingResult:
+    """
+    남은 오늘 횟수 안에서 casts 번 낚시를 한 트랜잭션으로 처리.
+    횟수 증가 + 획득 아이템 인벤토리 반영을 한 번에 커밋한다.
+    casts 가 1 보다 작으면 아무것도 하지 않고 casts=0 결과를 돌려준다.
+    """
+    if casts < 1:
+        return FishingResult(casts=0, count=0, catches=[])
+    if max_per_day <= 0 or is_fishing_capped(guild_id, db_user_id, date_str):
+        return FishingResult(casts=0, count=max_per_day, catches=[])
+
+    async def job(db):
+        n, new_count = await _claim_fishing_casts(
+            db, guild_id, db_user_id, date_str, casts, max_per_day
+        )
+        if n == 0:
+            return FishingResult(casts=0, count=new_count, catches=[])
+
+        catches = [loot_table.draw() for _ in range(n)]
+        gained: dict[int, int] = {}
+        for c in catches:
+            if c is not None:
+                gained[c["item_id"]] = gained.get(c["item_id"], 0) + 1
+        for item_id, qty in gained.items():
+            await _apply_inventory_delta(db, db_user_id, item_id, qty)
+
+        return FishingResult(casts=n, count=new_count, catches=catches)
+
+    result = await write_queue.submit(job)
+    if result.count >= max_per_day:
+        _mark_fishing_capped(guild_id, db_user_id, date_str)
+    return result
 
-    return row[0] if row else 0
 
+# 한 번에 지우는 행 수 (쓰기 잠금을 오래 잡지 않도록)
+FISHING_LIMITS_PRUNE_CHUNK = 1000
 
-async def increment_fishing_daily_count(guild_id: int, db_user_id: int, date_str: str) -> int:
+
+async def prune_fishing_limits(
+    keep_date: str | None = None,
+    chunk_size: int = FISHING_LIMITS_PRUNE_CHUNK,
+) -> int:
     """
-    오늘 낚시 횟수를 1 증가시키고, 증가 후 count 를 반환.
+    fishing_limits 에서 keep_date 보다 이전 날짜 행을 chunk_size 개씩 삭제.
+    조회하는 건 오늘 행뿐이라 지난 날짜는 필요 없다.
+    keep_date 가 없으면 테이블에 있는 가장 최근 날짜를 기준으로 한다.
+    삭제한 행 수 반환.
     """
-    async with aiosqlite.connect(DB_PATH) as db:
+    if keep_date is None:
+        async with acquire() as db:
+            cursor = await db.execute("SELECT MAX(date) FROM fishing_limits")
+            row = await cursor.fetchone()
+            await cursor.close()
+        keep_date = row[0]
+        if keep_date is None:
+            return 0
+
+    async def job(db):
         cursor = await db.execute(
             """
-            SELECT id, count FROM fishing_limits
-            WHERE guild_id = ? AND user_id = ? AND date = ?
+            DELETE FROM fishing_limits
+            WHERE id IN (
+                SELECT id FROM fishing_limits WHERE date < ? LIMIT ?
+            )
             """,
-            (guild_id, db_user_id, date_str),
+            (keep_date, chunk_size),
         )
-        row = await cursor.fetchone()
-
-        if row:
-            limit_id, cnt = row
-            new_cnt = cnt + 1
-            await db.execute(
-                "UPDATE fishing_limits SET count = ? WHERE id = ?",
-                (new_cnt, limit_id),
-            )
-        else:
-            new_cnt = 1
-            await db.execute(
-                """
-                INSERT INTO fishing_limits (guild_id, user_id, date, count)
-                VALUES (?, ?, ?, ?)
-                """,
-                (guild_id, db_user_id, date_str, new_cnt),
-            )
-
-        await db.commit()
-        await cursor.close()
+        return cursor.rowcount
 
-    return new_cnt
+    deleted = 0
+    while True:
+        n = await write_queue.submit(job)
+        deleted += n
+        if n < chunk_size:
+            return deleted
+        # 청크 사이에 다른 명령어 쓰기가 끼어들 수 있게 양보
+        await asyncio.sleep(0)
 
 
 async def get_or_create_fishing_item_id(guild_id: int, item_name: str):
     item_name = item_name.strip()
 
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         db.row_factory = aiosqlite.Row
 
         # 🔍 1) 동일한 이름의 아이템이 이미 있는지 확인
@@ -899,12 +3097,14 @@ async def get_or_create_fishing_item_id(guild_id: int, item_name: str):
         )
         await db.commit()
 
-        return cursor.lastrowid
+    invalidate_shop_catalog(guild_id)
+    index_item_name(guild_id, cursor.lastrowid, item_name)
+    return cursor.lastrowid
 
 
 async def get_fishing_loot(guild_id: int):
     """길드별 낚시 아이템 + 확률 목록."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             """
@@ -922,6 +3122,73 @@ async def get_fishing_loot(guild_id: int):
         rows = await cursor.fetchall()
         await cursor.close()
         return [dict(r) for r in rows]
+
+
+# ---------------------------------------------------------
+# 낚시 확률표 컴파일 + 캐시
+# ---------------------------------------------------------
+
+# 확률 정수 단위: 1 = 0.0001% (100% = 1_000_000)
+LOOT_SCALE = 1_000_000
+
+
+class LootTable:
+    """
+    fishing_loot 를 정수 누적합으로 미리 컴파일한 확률표.
+    - 확률(%)을 LOOT_SCALE 단위 정수로 바꿔 누적 (부동소수 오차 없음)
+    - draw() 는 randrange 한 번 + bisect 한 번, DB 를 읽지 않는다
+    - 누적합이 LOOT_SCALE 보다 작으면 나머지는 꽝 (None)
+    """
+
+    def __init__(self, rows):
+        self.entries: list[dict] = []
+        self.cumulative: list[int] = []
+        acc = 0
+        for row in rows:
+            weight = round(float(row["chance"]) * LOOT_SCALE / 100)
+            if weight <= 0:
+                continue
+            # 합이 100%를 조금 넘는 오차는 잘라낸다 (기존 min(total, 100) 과 동일)
+            acc = min(acc + weight, LOOT_SCALE)
+            self.entries.append(dict(row))
+            self.cumulative.append(acc)
+            if acc >= LOOT_SCALE:
+                break
+        self.total = acc
+
+    def __bool__(self) -> bool:
+        return bool(self.entries)
+
+    @property
+    def miss_chance(self) -> float:
+        """꽝 확률(%)."""
+        return (LOOT_SCALE - self.total) * 100 / LOOT_SCALE
+
+    def draw(self, rng=random) -> dict | None:
+        """한 번 뽑기. 꽝이면 None."""
+        roll = rng.randrange(LOOT_SCALE)
+        if roll >= self.total:
+            return None
+        return self.entries[bisect_right(self.cumulative, roll)]
+
+
+_loot_tables: dict[int, LootTable] = {}
+
+
+async def get_loot_table(guild_id: int) -> LootTable:
+    """길드의 컴파일된 낚시 확률표. 캐시에 없을 때만 DB 를 읽는다."""
+    table = _loot_tables.get(guild_id)
+    if table is None:
+        table = LootTable(await get_fishing_loot(guild_id))
+        _loot_tables[guild_id] = table
+    return table
+
+
+def invalidate_loot_table(guild_id: int):
+    """낚시 확률/아이템 변경 후 호출."""
+    _loot_tables.pop(guild_id, None)
+
+
 # ---------------------------------------------------------
 # pets (펫 도감)
 # ---------------------------------------------------------
@@ -931,7 +3198,7 @@ async def add_or_update_pet(guild_id: int, name: str, description: str):
     같은 (guild_id, name) 이 이미 있으면 설명만 수정,
     없으면 새로 추가.
     """
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             """
             INSERT INTO pets (guild_id, name, description)
@@ -946,7 +3213,7 @@ async def add_or_update_pet(guild_id: int, name: str, description: str):
 
 async def list_pets(guild_id: int):
     """길드의 펫 전체 목록을 리스트[dict] 로 반환."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             """
@@ -959,4 +3226,350 @@ async def list_pets(guild_id: int):
         )
         rows = await cursor.fetchall()
         await cursor.close()
-        return [dict(r) for r in rows]
\ No newline at end of file
+        return [dict(r) for r in rows]
+
+# ---------------------------------------------------------
+# 길드 경제 데이터 가져오기 / 내보내기 (/경제가져오기, /경제내보내기, economy_io.py)
+# ---------------------------------------------------------
+
+# 종류별 필드. 순서가 곧 참조 순서 (아이템 → 재화, 낚시 확률 → 아이템, 잔액 → 재화)
+ECONOMY_FIELDS: dict[str, tuple[str, ...]] = {
+    "currency": ("code", "name", "is_main", "is_active"),
+    "item": ("name", "price", "currency", "description", "stock", "is_shop"),
+    "loot": ("item", "chance"),
+    "pet": ("name", "description"),
+    "balance": ("user_id", "currency", "amount"),
+}
+IMPORT_CHUNK_SIZE = 500
+IMPORT_MAX_ERRORS = 20
+
+
+@dataclass
+class ImportResult:
+    """
+    가져오기 결과.
+    status: "ok" | "invalid" (검증 실패, 아무것도 쓰지 않음) | "checked" (검증만 함)
+    counts: 종류 → 레코드 수 (ok 면 실제로 쓴 수, 아니면 검증을 통과한 수)
+    errors: "N행: 이유" 목록 (최대 IMPORT_MAX_ERRORS 개)
+    """
+    status: str
+    counts: dict[str, int]
+    errors: list[str]
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+def _import_value(record: dict, field: str, required: bool = True):
+    value = record.get(field)
+    if isinstance(value, str):
+        value = value.strip() or None
+    if value is None and required:
+        raise ValueError(f"`{field}` 값이 없습니다.")
+    return value
+
+
+def _import_text(record: dict, field: str, required: bool = True) -> str | None:
+    value = _import_value(record, field, required)
+    return None if value is None else str(value)
+
+
+def _import_int(record: dict, field: str, required: bool = True, minimum: int | None = None) -> int | None:
+    value = _import_value(record, field, required)
+    if value is None:
+        return None
+    try:
+        if isinstance(value, float) and not value.is_integer():
+            raise ValueError
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"`{field}` 는 정수여야 합니다: {value!r}") from None
+    if minimum is not None and number < minimum:
+        raise ValueError(f"`{field}` 는 {minimum} 이상이어야 합니다: {number}")
+    return number
+
+
+def _import_flag(record: dict, field: str, default: bool) -> int:
+    value = _import_value(record, field, required=False)
+    if value is None:
+        return int(default)
+    if isinstance(value, str):
+        key = value.casefold()
+        if key in ("1", "true", "yes", "y"):
+            return 1
+        if key in ("0", "false", "no", "n"):
+            return 0
+        raise ValueError(f"`{field}` 는 0/1 이어야 합니다: {value!r}")
+    return int(bool(value))
+
+
+def _economy_row(record: dict) -> tuple[str, tuple]:
+    """레코드 하나를 (종류, INSERT 파라미터 순서의 튜플) 로. 잘못된 값이면 ValueError."""
+    kind = str(record.get("kind") or "").strip().casefold()
+    if kind == "currency":
+        return kind, (
+            _import_text(record, "code"),
+            _import_text(record, "name"),
+            _import_flag(record, "is_main", False),
+            _import_flag(record, "is_active", True),
+        )
+    if kind == "item":
+        return kind, (
+            _import_text(record, "name"),
+            _import_int(record, "price", minimum=0),
+            _import_text(record, "currency"),
+            _import_text(record, "description", required=False),
+            _import_int(record, "stock", required=False, minimum=0),
+            _import_flag(record, "is_shop", True),
+        )
+    if kind == "loot":
+        raw = _import_value(record, "chance")
+        try:
+            chance = float(raw)
+        except (TypeError, ValueError):
+            raise ValueError(f"`chance` 는 숫자여야 합니다: {raw!r}") from None
+        if not 0 < chance <= 100:
+            raise ValueError(f"`chance` 는 0 초과 100 이하여야 합니다: {chance}")
+        return kind, (_import_text(record, "item"), chance)
+    if kind == "pet":
+        return kind, (
+            _import_text(record, "name"),
+            _import_text(record, "description", required=False),
+        )
+    if kind == "balance":
+        return kind, (
+            _import_int(record, "user_id", minimum=1),
+            _import_text(record, "currency"),
+            _import_int(record, "amount", minimum=0),
+        )
+    raise ValueError(f"알 수 없는 kind: {record.get('kind')!r} ({', '.join(ECONOMY_FIELDS)})")
+
+
+# 각 SQL 은 (guild_id, *_economy_row 튜플) 을 받는다. 참조는 이름/코드로 서브쿼리에서 찾는다.
+_IMPORT_SQL = {
+    "currency": """
+        INSERT INTO currencies (guild_id, code, name, is_main, is_active)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(guild_id, code COLLATE NOCASE)
+        DO UPDATE SET name = excluded.name,
+                      is_active = excluded.is_active
+    """,
+    "item": """
+        INSERT INTO items (guild_id, name, price, currency_id, description, stock, is_shop)
+        VALUES (?1, ?2, ?3,
+                (SELECT id FROM currencies WHERE guild_id = ?1 AND code = ?4 COLLATE NOCASE),
+                ?5, ?6, ?7)
+        ON CONFLICT(guild_id, name)
+        DO UPDATE SET price = excluded.price,
+                      currency_id = excluded.currency_id,
+                      description = excluded.description,
+                      stock = excluded.stock,
+                      is_shop = excluded.is_shop
+    """,
+    "loot": """
+        INSERT INTO fishing_loot (guild_id, item_id, chance)
+        VALUES (?1, (SELECT id FROM items WHERE guild_id = ?1 AND name = ?2), ?3)
+        ON CONFLICT(guild_id, item_id)
+        DO UPDATE SET chance = excluded.chance
+    """,
+    "pet": """
+        INSERT INTO pets (guild_id, name, description)
+        VALUES (?, ?, ?)
+        ON CONFLICT(guild_id, name)
+        DO UPDATE SET description = excluded.description
+    """,
+    "balance": """
+        INSERT INTO balances (user_id, currency_id, amount)
+        VALUES ((SELECT id FROM users WHERE guild_id = ?1 AND user_id = ?2),
+                (SELECT id FROM currencies WHERE guild_id = ?1 AND code = ?3 COLLATE NOCASE),
+                ?4)
+        ON CONFLICT(user_id, currency_id)
+        DO UPDATE SET amount = excluded.amount
+    """,
+}
+
+
+async def _validate_economy_records(guild_id: int, open_records) -> ImportResult:
+    """
+    한 번 훑으면서 값/참조를 검사한다. DB 에는 아무것도 쓰지 않는다.
+    참조는 이미 DB 에 있거나 파일 안에서 앞에 나온 것만 허용 (내보내기 파일 순서와 같음).
+    """
+    reg = await get_currency_registry(guild_id)
+    codes = set(reg.by_code)
+    async with acquire() as db:
+        cursor = await db.execute("SELECT name FROM items WHERE guild_id = ?", (guild_id,))
+        item_names = {r[0] async for r in cursor}
+        await cursor.close()
+
+    counts = dict.fromkeys(ECONOMY_FIELDS, 0)
+    errors: list[str] = []
+    try:
+        for line_no, record in open_records():
+            try:
+                kind, row = _economy_row(record)
+                code = row[2] if kind == "item" else row[1] if kind == "balance" else None
+                if code is not None and code.casefold() not in codes:
+                    raise ValueError(f"없는 재화 코드: `{code}`")
+                if kind == "loot" and row[0] not in item_names:
+                    raise ValueError(f"없는 아이템: `{row[0]}`")
+            except ValueError as e:
+                errors.append(f"{line_no}행: {e}")
+                if len(errors) >= IMPORT_MAX_ERRORS:
+                    break
+                continue
+
+            if kind == "currency":
+                codes.add(row[0].casefold())
+            elif kind == "item":
+                item_names.add(row[0])
+            counts[kind] += 1
+    except ValueError as e:
+        # 파일 형식 자체가 깨진 경우 (JSON 한 줄이 안 읽힘 등)
+        errors.append(str(e))
+
+    if errors:
+        return ImportResult("invalid", counts, errors)
+    return ImportResult("checked", counts, [])
+
+
+async def import_guild_economy(
+    guild_id: int,
+    open_records,
+    *,
+    check_only: bool = False,
+    progress=None,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> ImportResult:
+    """
+    재화/아이템/낚시 확률/펫/잔액 레코드를 한꺼번에 가져온다 (있으면 덮어쓰기).
+    - open_records() 는 호출할 때마다 처음부터 (행 번호, dict) 를 내주는 이터레이터를 돌려줘야 한다
+      (검증 한 번, 쓰기 한 번 두 번 읽는다. 레코드를 메모리에 쌓지 않는다)
+    - 검증을 전부 통과해야 쓰기 시작하고, 쓰기는 한 트랜잭션 안에서 chunk_size 개씩 executemany
+    - progress(counts) : 청크를 쓸 때마다 지금까지 쓴 개수로 호출 (트랜잭션 중이므로 가볍게)
+    """
+    checked = await _validate_economy_records(guild_id, open_records)
+    if check_only or checked.status == "invalid":
+        return checked
+
+    async def job(db):
+        buffers: dict[str, list[tuple]] = {kind: [] for kind in ECONOMY_FIELDS}
+        done = dict.fromkeys(ECONOMY_FIELDS, 0)
+        main_code = None
+
+        async def flush():
+            # 참조 순서대로 비워서 같은 청크 안의 앞 레코드를 서브쿼리가 찾을 수 있게 한다
+            for kind, rows in buffers.items():
+                if not rows:
+                    continue
+                if kind == "balance":
+                    await db.executemany(
+                        """
+                        INSERT INTO users (guild_id, user_id, last_attend_date)
+                        VALUES (?, ?, NULL)
+                        ON CONFLICT(guild_id, user_id) DO NOTHING
+                        """,
+                        [(guild_id, row[0]) for row in rows],
+                    )
+                await db.executemany(_IMPORT_SQL[kind], [(guild_id, *row) for row in rows])
+                done[kind] += len(rows)
+                rows.clear()
+            if progress is not None:
+                progress(dict(done))
+
+        pending = 0
+        for _, record in open_records():
+            kind, row = _economy_row(record)
+            if kind == "currency" and row[2]:
+                main_code = row[0]
+            buffers[kind].append(row)
+            pending += 1
+            if pending >= chunk_size:
+                await flush()
+                pending = 0
+        await flush()
+
+        if main_code is not None:
+            cursor = await db.execute(
+                """
+                UPDATE currencies SET is_main = (code = ? COLLATE NOCASE)
+                 WHERE guild_id = ?
+                RETURNING id, is_main
+                """,
+                (main_code, guild_id),
+            )
+            main_id = next(r[0] for r in await cursor.fetchall() if r[1])
+            await cursor.close()
+            await db.execute(
+                "UPDATE guild_settings SET main_currency_id = ? WHERE guild_id = ?",
+                (main_id, guild_id),
+            )
+        return done
+
+    counts = await write_queue.submit(job)
+
+    invalidate_guild_config(guild_id)
+    invalidate_currency_registry(guild_id)
+    invalidate_loot_table(guild_id)
+    invalidate_item_name_index(guild_id)
+    return ImportResult("ok", counts, [])
+
+
+_EXPORT_SQL = {
+    "currency": """
+        SELECT code, name, is_main, is_active
+          FROM currencies
+         WHERE guild_id = ?
+         ORDER BY id
+    """,
+    "item": """
+        SELECT i.name, i.price, c.code AS currency, i.description, i.stock, i.is_shop
+          FROM items AS i
+          LEFT JOIN currencies AS c ON c.id = i.currency_id
+         WHERE i.guild_id = ?
+         ORDER BY i.id
+    """,
+    "loot": """
+        SELECT i.name AS item, f.chance
+          FROM fishing_loot AS f
+          JOIN items AS i ON i.id = f.item_id
+         WHERE f.guild_id = ?
+         ORDER BY i.id
+    """,
+    "pet": """
+        SELECT name, description
+          FROM pets
+         WHERE guild_id = ?
+         ORDER BY id
+    """,
+    "balance": """
+        SELECT u.user_id, c.code AS currency, b.amount
+          FROM users AS u
+          JOIN balances AS b ON b.user_id = u.id
+          JOIN currencies AS c ON c.id = b.currency_id
+         WHERE u.guild_id = ? AND b.amount <> 0
+         ORDER BY u.id, c.id
+    """,
+}
+
+
+async def export_guild_economy(guild_id: int, kinds=None, *, progress=None, chunk_size: int = IMPORT_CHUNK_SIZE):
+    """
+    길드 경제 데이터를 {"kind": 종류, 필드...} dict 로 하나씩 내주는 async 제너레이터.
+    커서를 돌면서 내보내므로 큰 길드도 메모리에 한꺼번에 올리지 않는다.
+    kinds 가 없으면 전부, 순서는 항상 ECONOMY_FIELDS 순서 (그대로 다시 가져올 수 있게).
+    progress(counts) : chunk_size 개마다, 그리고 종류 하나가 끝날 때마다 호출.
+    """
+    wanted = set(ECONOMY_FIELDS if kinds is None else kinds)
+    counts = {kind: 0 for kind in ECONOMY_FIELDS if kind in wanted}
+    async with acquire() as db:
+        for kind in counts:
+            cursor = await db.execute(_EXPORT_SQL[kind], (guild_id,))
+            async for row in cursor:
+                yield {"kind": kind, **dict(row)}
+                counts[kind] += 1
+                if progress is not None and counts[kind] % chunk_size == 0:
+                    progress(dict(counts))
+            await cursor.close()
+            if progress is not None:
+                progress(dict(counts))
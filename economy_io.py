@@ -0,0 +1,165 @@
+# economy_io.py  ─ 길드 경제 데이터(재화/아이템/낚시 확률/펫/잔액) 가져오기 / 내보내기
+#
+# 새 시즌 세팅이나 다른 서버 설정 복사할 때 /아이템추가, /낚시확률, /펫등록 을
+# 수십 번 치는 대신 파일 하나로 옮긴다. 봇의 /경제가져오기, /경제내보내기 도 이 모듈을 쓴다.
+#
+# 형식 (확장자로 구분, .csv 가 아니면 JSON lines):
+#   JSON lines : 한 줄에 레코드 하나
+#       {"kind": "currency", "code": "coin", "name": "여우코인", "is_main": 1}
+#       {"kind": "item", "name": "붕어", "price": 10, "currency": "coin", "is_shop": 0}
+#       {"kind": "loot", "item": "붕어", "chance": 12.5}
+#       {"kind": "pet", "name": "여우", "description": "..."}
+#       {"kind": "balance", "user_id": 1234567890, "currency": "coin", "amount": 300}
+#   CSV        : 첫 줄이 ECONOMY_COLUMNS 헤더, 그 종류에 안 쓰는 칸은 비워 둔다
+#
+# 참조(아이템의 currency, 낚시 확률의 item)는 DB 에 이미 있거나 파일 앞쪽에 나와야 한다.
+# 내보낸 파일은 항상 이 순서라서 그대로 다시 가져올 수 있다.
+#
+# 사용법:
+#   python economy_io.py export --guild 123 -o season1.jsonl
+#   python economy_io.py export --guild 123 --kinds currency item loot pet -o setup.csv
+#   python economy_io.py import --guild 456 setup.csv --check      (검증만)
+#   python economy_io.py import --guild 456 setup.csv --db backup.db
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import sys
+from pathlib import Path
+
+import db
+from db import ECONOMY_FIELDS
+
+# CSV 헤더: kind + 모든 종류의 필드 (중복 없이, 처음 나온 순서)
+ECONOMY_COLUMNS = ["kind"] + list(dict.fromkeys(f for fields in ECONOMY_FIELDS.values() for f in fields))
+
+
+def detect_format(filename: str) -> str:
+    return "csv" if Path(filename).suffix.casefold() == ".csv" else "jsonl"
+
+
+def read_records(lines, fmt: str):
+    """텍스트 줄 이터레이터 → (행 번호, dict). 형식이 깨진 줄이 나오면 ValueError."""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line_no, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{line_no}행: JSON 형식 오류 ({e.msg})") from None
+        if not isinstance(record, dict):
+            raise ValueError(f"{line_no}행: {{...}} 형태의 레코드가 아닙니다.")
+        yield line_no, record
+
+
+def file_records(path, fmt: str):
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        yield from read_records(f, fmt)
+
+
+def text_records(text: str, fmt: str):
+    return read_records(io.StringIO(text, newline=""), fmt)
+
+
+async def export_to(fp, guild_id: int, fmt: str, kinds=None, progress=None) -> dict[str, int]:
+    """바이너리 파일 fp 에 UTF-8 로 한 줄씩 써 내려간다. 종류별 개수 반환."""
+    out = io.TextIOWrapper(fp, encoding="utf-8", newline="")
+    counts: dict[str, int] = {}
+
+    def on_progress(snapshot):
+        counts.update(snapshot)
+        if progress is not None:
+            progress(snapshot)
+
+    try:
+        if fmt == "csv":
+            writer = csv.DictWriter(out, fieldnames=ECONOMY_COLUMNS)
+            writer.writeheader()
+            write = writer.writerow
+        else:
+            def write(record):
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        async for record in db.export_guild_economy(guild_id, kinds, progress=on_progress):
+            write(record)
+        out.flush()
+    finally:
+        # 호출한 쪽이 fp 를 계속 쓸 수 있게 래퍼만 떼어낸다
+        out.detach()
+    return counts
+
+
+def format_counts(counts: dict[str, int]) -> str:
+    return ", ".join(f"{kind} {n:,}" for kind, n in counts.items() if n)
+
+
+def _print_progress(counts):
+    print(f"\r  {format_counts(counts)}", end="", file=sys.stderr, flush=True)
+
+
+async def run(args) -> int:
+    db.pool = db.ConnectionPool(args.db, min_size=1, max_size=2)
+    await db.open_pool()
+    try:
+        await db.init_db()
+        if args.command == "export":
+            fmt = args.format or detect_format(args.output or "")
+            if args.output:
+                with open(args.output, "wb") as fp:
+                    counts = await export_to(fp, args.guild, fmt, args.kinds, _print_progress)
+            else:
+                counts = await export_to(sys.stdout.buffer, args.guild, fmt, args.kinds, _print_progress)
+            print(f"\n내보내기 완료: {format_counts(counts) or '없음'}", file=sys.stderr)
+            return 0
+
+        fmt = args.format or detect_format(args.input)
+        result = await db.import_guild_economy(
+            args.guild,
+            lambda: file_records(args.input, fmt),
+            check_only=args.check,
+            progress=_print_progress,
+        )
+    finally:
+        await db.close_pool()
+
+    if result.status == "invalid":
+        print("검증 실패, 아무것도 쓰지 않았습니다:", file=sys.stderr)
+        for err in result.errors:
+            print(f"  - {err}", file=sys.stderr)
+        return 1
+    label = "검증 통과" if result.status == "checked" else "\n가져오기 완료"
+    print(f"{label}: {format_counts(result.counts) or '없음'}", file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="길드 경제 데이터 가져오기/내보내기")
+    parser.add_argument("--db", default=str(db.DB_PATH), help="SQLite DB 경로 (기본: data/arpg.db)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="파일 형식 (기본: 확장자로 판단)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="DB → 파일")
+    exp.add_argument("--guild", type=int, required=True, help="길드 ID")
+    exp.add_argument("-o", "--output", help="저장할 파일 (없으면 표준 출력)")
+    exp.add_argument("--kinds", nargs="+", choices=list(ECONOMY_FIELDS), help="내보낼 종류 (기본: 전부)")
+
+    imp = sub.add_parser("import", help="파일 → DB")
+    imp.add_argument("--guild", type=int, required=True, help="길드 ID")
+    imp.add_argument("input", help="가져올 파일 (.jsonl / .csv)")
+    imp.add_argument("--check", action="store_true", help="검증만 하고 쓰지 않음")
+
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,144 @@
+# fishing_sim.py  ─ 낚시 확률표 오프라인 시뮬레이터 / 벤치마크
+#
+# /낚시 와 똑같은 LootTable.draw() 로 수백만 번 뽑아서
+#   - 아이템별 설정 확률 vs 실제 나온 비율
+#   - 꽝 비율
+#   - 초당 뽑기 횟수
+# 를 출력한다. 봇을 켜지 않고 확률 설정을 검증할 때 사용.
+#
+# 사용법:
+#   python fishing_sim.py --guild 1234567890             (data/arpg.db 에서 읽기)
+#   python fishing_sim.py --db backup.db --guild 123 -n 5000000
+#   python fishing_sim.py --json loot.json --seed 42
+#
+# JSON 형식: [{"item_name": "붕어", "chance": 12.5}, ...]
+#   또는 {"loot": [...]} (item_id 가 없으면 순서대로 1, 2, 3 ... 부여)
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from pathlib import Path
+
+import db
+from db import LOOT_SCALE, LootTable
+
+
+def load_loot_json(path: str) -> list[dict]:
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    if isinstance(data, dict):
+        data = data.get("loot", [])
+
+    rows = []
+    for idx, entry in enumerate(data, start=1):
+        rows.append(
+            {
+                "item_id": entry.get("item_id", idx),
+                "item_name": entry.get("item_name") or entry.get("name") or f"#{idx}",
+                "item_description": entry.get("item_description"),
+                "chance": float(entry["chance"]),
+            }
+        )
+    return rows
+
+
+async def load_loot_db(path: str, guild_id: int) -> list[dict]:
+    # 봇이 쓰는 것과 같은 조회 함수(get_fishing_loot)를 그대로 사용
+    db.pool = db.ConnectionPool(path, min_size=1, max_size=1)
+    await db.open_pool()
+    try:
+        return await db.get_fishing_loot(guild_id)
+    finally:
+        await db.close_pool()
+
+
+def simulate(table: LootTable, draws: int, rng: random.Random) -> tuple[dict, int, float]:
+    """(item_id → 나온 횟수, 꽝 횟수, 걸린 시간 초) 반환."""
+    counts = {e["item_id"]: 0 for e in table.entries}
+    misses = 0
+    draw = table.draw
+
+    start = time.perf_counter()
+    for _ in range(draws):
+        chosen = draw(rng)
+        if chosen is None:
+            misses += 1
+        else:
+            counts[chosen["item_id"]] += 1
+    elapsed = time.perf_counter() - start
+    return counts, misses, elapsed
+
+
+def print_report(rows: list[dict], table: LootTable, draws: int, counts, misses, elapsed):
+    compiled = {}
+    prev = 0
+    for entry, acc in zip(table.entries, table.cumulative):
+        compiled[entry["item_id"]] = (acc - prev) * 100 / LOOT_SCALE
+        prev = acc
+
+    configured_total = sum(float(r["chance"]) for r in rows)
+    print(f"설정 확률 합: {configured_total:.4f}%  (컴파일 후 합: {table.total * 100 / LOOT_SCALE:.4f}%)")
+    if configured_total > 100.0 + 1e-6:
+        print("⚠️ 확률 합이 100% 를 넘어서 뒤쪽 아이템 확률이 잘렸습니다.")
+    print()
+
+    header = f"{'아이템':<20} {'설정%':>10} {'적용%':>10} {'관측%':>10} {'차이%p':>9} {'z':>7}"
+    print(header)
+    print("-" * len(header))
+
+    def line(name, configured, applied, hits):
+        observed = hits * 100 / draws
+        p = applied / 100
+        sd = math.sqrt(p * (1 - p) / draws) * 100 if 0 < p < 1 else 0.0
+        z = (observed - applied) / sd if sd else 0.0
+        flag = "  ⚠️" if abs(z) > 4 else ""
+        print(
+            f"{name:<20} {configured:>10.4f} {applied:>10.4f} {observed:>10.4f} "
+            f"{observed - applied:>+9.4f} {z:>7.2f}{flag}"
+        )
+
+    for r in rows:
+        applied = compiled.get(r["item_id"], 0.0)
+        hits = counts.get(r["item_id"], 0)
+        note = "" if r["item_id"] in compiled else " (적용 안 됨)"
+        line(f"{r['item_name']}{note}", float(r["chance"]), applied, hits)
+
+    line("꽝", max(0.0, 100.0 - configured_total), table.miss_chance, misses)
+
+    print()
+    rate = draws / elapsed if elapsed else float("inf")
+    print(f"뽑기 {draws:,}회 / {elapsed:.3f}초  →  {rate:,.0f} draws/sec")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="낚시 확률표 시뮬레이터")
+    src = parser.add_mutually_exclusive_group()
+    src.add_argument("--json", help="확률표 JSON 파일")
+    src.add_argument("--db", default=str(db.DB_PATH), help="SQLite DB 경로 (기본: data/arpg.db)")
+    parser.add_argument("--guild", type=int, help="--db 사용 시 길드 ID")
+    parser.add_argument("-n", "--draws", type=int, default=1_000_000, help="뽑기 횟수")
+    parser.add_argument("--seed", type=int, help="난수 시드 (재현용)")
+    args = parser.parse_args(argv)
+
+    if args.json:
+        rows = load_loot_json(args.json)
+    else:
+        if args.guild is None:
+            parser.error("--db 로 읽을 때는 --guild 가 필요합니다.")
+        rows = asyncio.run(load_loot_db(args.db, args.guild))
+
+    if not rows:
+        print("낚시 확률표가 비어 있습니다.")
+        return 1
+
+    table = LootTable(rows)
+    rng = random.Random(args.seed)
+    counts, misses, elapsed = simulate(table, args.draws, rng)
+    print_report(rows, table, args.draws, counts, misses, elapsed)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,111 @@
+# settle_bench.py  ─ /전체정산 오프라인 벤치마크
+#
+# 임시 DB 에 유저 N 명을 만들어 두고
+#   - settle_all()            : INSERT … SELECT … ON CONFLICT 한 문장 (현재 방식)
+#   - apply_balance_delta 반복 : 유저마다 한 번씩 (예전 방식, --loop 줄 때만)
+# 을 돌려서 유저 수에 따라 걸리는 시간이 어떻게 늘어나는지 출력한다.
+#
+# 사용법:
+#   python settle_bench.py                         (1000, 5000, 20000 명)
+#   python settle_bench.py -u 500 5000 50000 --amount -30
+#   python settle_bench.py -u 1000 5000 --loop     (예전 방식도 같이 측정)
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import db
+
+BENCH_GUILD_ID = 1
+
+
+async def seed(users: int, rng: random.Random) -> int:
+    """유저 users 명 생성 + 절반 정도에 잔액을 깔아두고 currency_id 반환."""
+    cur = await db.add_currency(BENCH_GUILD_ID, "벤치코인", "bench", is_main=True)
+    async with db.transaction() as conn:
+        await conn.executemany(
+            "INSERT INTO users (guild_id, user_id) VALUES (?, ?)",
+            ((BENCH_GUILD_ID, 10_000 + i) for i in range(users)),
+        )
+        cursor = await conn.execute(
+            "SELECT id FROM users WHERE guild_id = ?", (BENCH_GUILD_ID,)
+        )
+        ids = [row[0] for row in await cursor.fetchall()]
+        await cursor.close()
+        await conn.executemany(
+            "INSERT INTO balances (user_id, currency_id, amount) VALUES (?, ?, ?)",
+            ((uid, cur["id"], rng.randint(0, 100)) for uid in ids if rng.random() < 0.5),
+        )
+    return cur["id"]
+
+
+async def bench_one(users: int, amount: int, loop: bool, seed_value: int | None) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db.pool = db.ConnectionPool(Path(tmp) / "bench.db", min_size=1, max_size=2)
+        await db.open_pool()
+        try:
+            await db.init_db()
+            currency_id = await seed(users, random.Random(seed_value))
+
+            start = time.perf_counter()
+            result = await db.settle_all(BENCH_GUILD_ID, currency_id, amount)
+            set_elapsed = time.perf_counter() - start
+
+            loop_elapsed = None
+            if loop:
+                async with db.acquire() as conn:
+                    cursor = await conn.execute(
+                        "SELECT id FROM users WHERE guild_id = ?", (BENCH_GUILD_ID,)
+                    )
+                    ids = [row[0] for row in await cursor.fetchall()]
+                    await cursor.close()
+                start = time.perf_counter()
+                for uid in ids:
+                    await db.apply_balance_delta(uid, currency_id, amount)
+                loop_elapsed = time.perf_counter() - start
+        finally:
+            await db.close_pool()
+
+    return {"users": users, "result": result, "set": set_elapsed, "loop": loop_elapsed}
+
+
+def print_report(rows: list[dict]):
+    header = f"{'유저 수':>10} {'영향':>10} {'총 변화량':>12} {'0 바닥':>8} {'한 문장 ms':>12} {'us/유저':>9} {'반복 ms':>12}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        res = r["result"]
+        per_user = r["set"] * 1_000_000 / r["users"] if r["users"] else 0.0
+        loop_ms = f"{r['loop'] * 1000:>12.1f}" if r["loop"] is not None else f"{'-':>12}"
+        print(
+            f"{r['users']:>10,} {res['affected']:>10,} {res['net']:>12,} {res['clamped']:>8,} "
+            f"{r['set'] * 1000:>12.1f} {per_user:>9.2f} {loop_ms}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="/전체정산 벤치마크")
+    parser.add_argument(
+        "-u", "--users", type=int, nargs="+", default=[1_000, 5_000, 20_000], help="유저 수 목록"
+    )
+    parser.add_argument("--amount", type=int, default=-50, help="1인당 변화량 (음수면 차감)")
+    parser.add_argument("--loop", action="store_true", help="유저별 apply_balance_delta 반복도 측정")
+    parser.add_argument("--seed", type=int, default=0, help="초기 잔액 난수 시드")
+    args = parser.parse_args(argv)
+
+    if args.amount == 0:
+        parser.error("--amount 는 0 이 아니어야 합니다.")
+
+    rows = [
+        asyncio.run(bench_one(n, args.amount, args.loop, args.seed))
+        for n in args.users
+    ]
+    print_report(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,47 @@
+# tests/test_shop_embed.py  ─ 상점 임베드 캐시 회귀 테스트
+import asyncio
+
+import db
+from bot import get_shop_embed
+
+GUILD_ID = 1
+
+
+async def _setup():
+    # 기본 설정을 만들면 메인 재화 coin(코인) 도 같이 생긴다
+    settings = await db.get_or_create_guild_settings(GUILD_ID)
+    currency_id = settings["main_currency_id"]
+    item_id = await db.add_item(GUILD_ID, "붕어", 10, "물고기", currency_id, stock=5)
+    await db.upsert_sell_item(GUILD_ID, item_id, 3, currency_id)
+    buyer = await db.get_user_id(GUILD_ID, 100)
+    await db.apply_balance_delta(buyer, currency_id, 100)
+    return item_id, buyer
+
+
+def test_sell_embed_survives_purchase_of_sell_item(tmp_path):
+    async def run():
+        db.pool = db.ConnectionPool(tmp_path / "shop.db", min_size=1, max_size=2)
+        await db.open_pool()
+        try:
+            await db.init_db()
+            item_id, buyer = await _setup()
+
+            sell_embed = await get_shop_embed(GUILD_ID, "sell")
+            shop_embed = await get_shop_embed(GUILD_ID, "all")
+            assert "재고: 5개" in shop_embed.fields[0].name
+
+            result = await db.purchase(GUILD_ID, buyer, item_id, 2)
+            assert result.stock == 3
+
+            # 판매 상점 칸은 sell 행으로 그린 그대로 (재고 패치 대상 아님)
+            again = await get_shop_embed(GUILD_ID, "sell")
+            assert again.fields[0].name == sell_embed.fields[0].name
+            assert "1개당 3 코인" in again.fields[0].name
+
+            # 일반 상점 칸은 재고만 고쳐진다
+            shop_embed = await get_shop_embed(GUILD_ID, "all")
+            assert "재고: 3개" in shop_embed.fields[0].name
+        finally:
+            await db.close_pool()
+
+    asyncio.run(run())